@@ -1,20 +1,48 @@
 """Jobs API endpoints."""
 
+import json
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import aclosing
 
-from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
-from fastapi.responses import JSONResponse
+import redis
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.deps import current_user, require_session
 from app.db.models import JobStatus, TranscriptionJob, User
-from app.db.session import get_db
-from app.services import jobs_service, submission_service
+from app.db.session import async_session_factory, get_db
+from app.logging import get_logger
+from app.services import admission, job_events, jobs_service, resumable_uploads, submission_service
+
+logger = get_logger(__name__)
 
 router = APIRouter(tags=["Jobs"])
 
 ALLOWED_EXTENSIONS = submission_service.ALLOWED_EXTENSIONS
 MAX_UPLOAD_SIZE = submission_service.MAX_UPLOAD_SIZE
+# Longest ?wait= a long-poll may ask for, and how long one event stream stays open
+MAX_WAIT_SECONDS = 60
+EVENT_STREAM_SECONDS = 3600
+
+
+def _submission_error(exc: submission_service.SubmissionError, status_code: int = 400) -> HTTPException:
+    """The HTTP error for a refused submission: 429 with Retry-After when admission control refused it."""
+    if isinstance(exc, admission.AdmissionRejectedError):
+        return HTTPException(status_code=429, detail=exc.detail, headers={"Retry-After": str(exc.retry_after)})
+    return HTTPException(status_code=status_code, detail=exc.detail)
+
+
+async def _json_object(request: Request) -> dict:
+    """The request's JSON body, or 400 when it is not valid JSON or not an object."""
+    try:
+        body = await request.json()
+    except ValueError as exc:  # JSONDecodeError and UnicodeDecodeError alike
+        raise HTTPException(status_code=400, detail="Request body must be valid JSON") from exc
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    return body
 
 
 def _job_to_dict(job: TranscriptionJob, overall_confidence: float | None = None) -> dict:
@@ -59,20 +87,71 @@ async def list_jobs(
 @router.get("/jobs/{job_id}", dependencies=[Depends(require_session)])
 async def get_job(
     job_id: uuid.UUID,
+    wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS),
+    after: float | None = None,
     user: User = Depends(current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get a single job by ID."""
+    """Get a single job by ID.
+
+    With ``?wait=N`` an unfinished job is returned once it publishes a new event (or after
+    N seconds). Pass the ``progress.at`` of the previous response as ``after`` so a change
+    between two polls is returned at once.
+    """
     job = await jobs_service.get_job_by_id(db, job_id, user.id)
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
+    progress = None
+    try:
+        if wait and job.status.value not in job_events.TERMINAL_STATUSES:
+            # Hand the connection back to the pool while the request is parked
+            await db.commit()
+            if await job_events.wait_for_event(job.id, wait, after) is not None:
+                await db.refresh(job)
+        progress = await job_events.latest(job.id)
+    except redis.RedisError:
+        logger.warning("Job events unavailable; answering without waiting")
+
     overall_conf = None
     if job.status == JobStatus.completed:
         segments = await jobs_service.get_segments_for_job(db, job.id)
         overall_conf = jobs_service.compute_overall_confidence(segments)
 
-    return _job_to_dict(job, overall_conf)
+    return {**_job_to_dict(job, overall_conf), "progress": progress}
+
+
+@router.get("/jobs/{job_id}/events", dependencies=[Depends(require_session)])
+async def stream_job_events(job_id: uuid.UUID, session_data: dict = Depends(require_session)):
+    """Stream a job's status and progress as Server-Sent Events until it finishes."""
+    # One short ownership query per stream; nothing holds a DB connection while it is open
+    async with async_session_factory() as db:
+        job = await jobs_service.get_job_for_subject(db, job_id, session_data["sub"])
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        _event_stream(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: dict) -> str:
+    return f"event: status\ndata: {json.dumps(event)}\n\n"
+
+
+async def _event_stream(job: TranscriptionJob) -> AsyncIterator[str]:
+    # The stored state first: jobs that finished before anyone watched have no live events
+    yield "retry: 3000\n"
+    yield _sse({"job_id": str(job.id), "status": job.status.value, "stage": None, "progress": None})
+    if job.status.value in job_events.TERMINAL_STATUSES:
+        return
+    try:
+        async with aclosing(job_events.subscribe(job.id, EVENT_STREAM_SECONDS)) as events:
+            async for event in events:
+                yield ": keep-alive\n\n" if event is None else _sse(event)
+    except redis.RedisError:
+        logger.warning("Job events unavailable; closing event stream for job %s", job.id)
 
 
 @router.post("/jobs", dependencies=[Depends(require_session)])
@@ -89,16 +168,16 @@ async def create_job(
         try:
             job = await submission_service.create_upload_job(file, user, db)
         except submission_service.SubmissionError as exc:
-            raise HTTPException(status_code=400, detail=exc.detail) from exc
+            raise _submission_error(exc) from exc
         return JSONResponse(status_code=201, content=_job_to_dict(job))
     elif "application/json" in content_type:
-        body = await request.json()
+        body = await _json_object(request)
         url = body.get("url")
         label = body.get("label")
         try:
             job = await submission_service.create_url_job(url, label, user, db)
         except submission_service.SubmissionError as exc:
-            raise HTTPException(status_code=400, detail=exc.detail) from exc
+            raise _submission_error(exc) from exc
         return JSONResponse(status_code=201, content=_job_to_dict(job))
     else:
         raise HTTPException(
@@ -107,6 +186,140 @@ async def create_job(
         )
 
 
+@router.post("/jobs/batch", dependencies=[Depends(require_session)])
+async def create_jobs_batch(
+    request: Request,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create many URL jobs in one request. Returns a result per item, in order."""
+    body = await _json_object(request)
+    try:
+        results = await submission_service.create_url_jobs_batch(body.get("jobs"), user, db)
+    except submission_service.SubmissionError as exc:
+        raise _submission_error(exc) from exc
+
+    items = []
+    for result in results:
+        if "job" in result:
+            items.append({"index": result["index"], "status": "created", "job": _job_to_dict(result["job"])})
+        else:
+            items.append({"index": result["index"], "status": "rejected", "error": result["error"]})
+    created = sum(1 for item in items if item["status"] == "created")
+    return JSONResponse(
+        status_code=201 if created else 400,
+        content={"created": created, "rejected": len(items) - created, "results": items},
+    )
+
+
+@router.post("/jobs/uploads", dependencies=[Depends(require_session)])
+async def create_direct_upload(
+    request: Request,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Create a job awaiting a direct-to-storage upload and return presigned part URLs."""
+    body = await _json_object(request)
+    try:
+        upload = await submission_service.create_direct_upload(
+            body.get("filename"), body.get("size"), body.get("content_type"), user, db
+        )
+    except submission_service.SubmissionError as exc:
+        raise _submission_error(exc) from exc
+    return JSONResponse(
+        status_code=201,
+        content={
+            "job": _job_to_dict(upload.job),
+            "part_size": upload.part_size,
+            "parts": [{"part_number": i, "url": url} for i, url in enumerate(upload.part_urls, start=1)],
+        },
+    )
+
+
+@router.post("/jobs/{job_id}/upload/complete", dependencies=[Depends(require_session)])
+async def complete_direct_upload(
+    job_id: uuid.UUID,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Finalize a direct upload and queue the job for transcription."""
+    try:
+        # Resumable uploads were hashed chunk by chunk on the way in; presigned ones yield None
+        digest = await resumable_uploads.content_digest(job_id)
+        job = await submission_service.complete_direct_upload(job_id, user, db, content_sha256=digest)
+    except submission_service.SubmissionError as exc:
+        status_code = 404 if exc.code == "upload_not_found" else 400
+        raise HTTPException(status_code=status_code, detail=exc.detail) from exc
+    await resumable_uploads.clear_chunks(job.id)
+    return _job_to_dict(job)
+
+
+@router.post("/jobs/{job_id}/retry", dependencies=[Depends(require_session)])
+async def retry_job(
+    job_id: uuid.UUID,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Retry a failed job from its last finished pipeline stage."""
+    try:
+        job = await submission_service.retry_job(job_id, user, db)
+    except submission_service.SubmissionError as exc:
+        status_code = 404 if exc.code == "job_not_found" else 400
+        raise HTTPException(status_code=status_code, detail=exc.detail) from exc
+    await job_events.clear(job.id)
+    return JSONResponse(status_code=202, content=_job_to_dict(job))
+
+
+@router.post("/jobs/uploads/resumable", dependencies=[Depends(require_session)])
+async def create_resumable_upload(
+    request: Request,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Open a resumable chunked upload. Finalize it with the upload complete endpoint."""
+    body = await _json_object(request)
+    try:
+        upload = await resumable_uploads.start_upload(
+            body.get("filename"), body.get("size"), body.get("content_type"), user, db
+        )
+    except submission_service.SubmissionError as exc:
+        raise _submission_error(exc) from exc
+    return JSONResponse(status_code=201, content=upload)
+
+
+@router.get("/jobs/{job_id}/chunks", dependencies=[Depends(require_session)])
+async def get_resumable_upload(
+    job_id: uuid.UUID,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Report which byte ranges of a resumable upload are already stored."""
+    try:
+        return await resumable_uploads.get_upload_status(job_id, user, db)
+    except submission_service.SubmissionError as exc:
+        raise HTTPException(status_code=404, detail=exc.detail) from exc
+
+
+@router.put("/jobs/{job_id}/chunks/{offset}", dependencies=[Depends(require_session)])
+async def put_resumable_chunk(
+    job_id: uuid.UUID,
+    offset: int,
+    request: Request,
+    user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Store one chunk at a byte offset; the body must match its X-Chunk-SHA256 header."""
+    data = await request.body()
+    try:
+        start, end = await resumable_uploads.put_chunk(
+            job_id, offset, data, request.headers.get("x-chunk-sha256"), user, db
+        )
+    except submission_service.SubmissionError as exc:
+        status_code = 404 if exc.code == "upload_not_found" else 400
+        raise HTTPException(status_code=status_code, detail=exc.detail) from exc
+    return {"job_id": str(job_id), "range": [start, end]}
+
+
 @router.get("/jobs/{job_id}/transcript", dependencies=[Depends(require_session)])
 async def get_transcript(
     job_id: uuid.UUID,
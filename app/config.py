@@ -21,10 +21,67 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str = "minioadmin"
     MINIO_BUCKET: str = "vod-transcription"
     MINIO_SECURE: bool = False
+    MINIO_REGION: str = "us-east-1"
+    # Endpoint browsers use for presigned upload URLs (defaults to MINIO_ENDPOINT)
+    MINIO_PUBLIC_ENDPOINT: str = ""
+    MINIO_PUBLIC_SECURE: bool = True
+    PRESIGNED_URL_EXPIRY_SECONDS: int = 3600
+    # Parallel parts per upload/download and the shared connection pool they draw from
+    MINIO_TRANSFER_CONCURRENCY: int = 4
+    MINIO_MAX_CONNECTIONS: int = 32
 
     # OpenAI
     OPENAI_API_KEY: str = ""
     OPENAI_TRANSCRIBE_MODEL: str = "whisper-1"
+    # Long audio is split at silences into chunks of at most this length, transcribed in parallel
+    TRANSCRIBE_CHUNK_SECONDS: int = 600
+    TRANSCRIBE_MAX_CONCURRENCY: int = 4
+    # Point at an OpenAI-compatible endpoint instead of api.openai.com
+    OPENAI_BASE_URL: str = ""
+    # Cluster-wide Whisper limits shared through Redis (0 disables a limit); excess requests wait
+    TRANSCRIBE_GLOBAL_CONCURRENCY: int = 16
+    TRANSCRIBE_REQUESTS_PER_MINUTE: int = 50
+    TRANSCRIBE_SLOT_LEASE_SECONDS: int = 900
+    TRANSCRIBE_QUEUE_TIMEOUT_SECONDS: int = 1800
+    # Strip non-speech audio before transcription (needs the "vad" extra for NumPy)
+    VAD_ENABLED: bool = False
+
+    # Media limits
+    MAX_DURATION_SECONDS: int = 4 * 3600
+    # Pipe front-to-back URL sources straight into ffmpeg instead of downloading them first
+    STREAM_URL_SOURCES: bool = True
+    # Parallel Range connections per URL download when the server supports ranges
+    URL_DOWNLOAD_CONNECTIONS: int = 4
+    # ffmpeg threads per transcode, so one job cannot take every core on a worker
+    TRANSCODE_THREADS: int = 2
+
+    # Pipeline retries: transient failures resume from the last finished stage with backoff
+    PIPELINE_MAX_ATTEMPTS: int = 4
+    PIPELINE_RETRY_BACKOFF_SECONDS: int = 30
+    # A running stage's Redis lease; renewed every third of this, so a redelivery exits at once
+    STAGE_LEASE_SECONDS: int = 60
+    # Running jobs refresh heartbeat_at this often. The reaper requeues (or, out of attempts,
+    # fails) processing jobs whose heartbeat is older than JOB_STALE_SECONDS. A job whose next
+    # stage is waiting in a queue is left alone until JOB_QUEUED_STALE_SECONDS, when its
+    # message is presumed lost with the broker.
+    JOB_HEARTBEAT_SECONDS: int = 30
+    JOB_STALE_SECONDS: int = 1800
+    JOB_QUEUED_STALE_SECONDS: int = 86400
+
+    # Scheduler: jobs wait in per-user Redis queues and start while fewer than this many run
+    # (0 sends every job straight to Celery). Jobs up to the fast-lane length go first, but
+    # every Nth start prefers the slow lane. Size-based estimates assume this many bytes/s.
+    SCHEDULER_MAX_IN_FLIGHT: int = 32
+    SCHEDULER_FAST_LANE_MAX_SECONDS: int = 900
+    SCHEDULER_SLOW_LANE_EVERY: int = 4
+    SCHEDULER_BYTES_PER_SECOND: int = 250_000
+    SCHEDULER_LEASE_SECONDS: int = 6 * 3600
+    # Admission control: refuse new jobs with 429 past these limits (0 disables a limit).
+    # Retry-After is the time the excess takes to drain at the measured throughput, clamped.
+    ADMISSION_MAX_WAITING: int = 5000
+    ADMISSION_MAX_ACTIVE_PER_USER: int = 1000
+    ADMISSION_RETRY_AFTER_MIN_SECONDS: int = 10
+    ADMISSION_RETRY_AFTER_MAX_SECONDS: int = 900
 
     # Logto Cloud (OIDC)
     LOGTO_ENDPOINT: str = "https://your-tenant.logto.app"
@@ -5,6 +5,7 @@ import uuid
 from datetime import UTC, datetime
 
 from sqlalchemy import (
+    JSON,
     BigInteger,
     DateTime,
     Double,
@@ -15,6 +16,7 @@ from sqlalchemy import (
     String,
     Text,
     Uuid,
+    text,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -24,6 +26,7 @@ class Base(DeclarativeBase):
 
 
 class JobStatus(enum.Enum):
+    uploading = "uploading"
     queued = "queued"
     processing = "processing"
     completed = "completed"
@@ -57,11 +60,22 @@ class TranscriptionJob(Base):
     source_url: Mapped[str | None] = mapped_column(Text, nullable=True)
     original_object_key: Mapped[str | None] = mapped_column(String(1024), nullable=True)
     audio_object_key: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    upload_id: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    size_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    content_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
     input_format: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    # How the audio was produced: "copy", "remux" or "encode" (see worker.media.ffmpeg.plan_transcode)
+    transcode_path: Mapped[str | None] = mapped_column(String(16), nullable=True)
     duration_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
     status: Mapped[JobStatus] = mapped_column(Enum(JobStatus), nullable=False, default=JobStatus.queued)
     failure_code: Mapped[str | None] = mapped_column(String(128), nullable=True)
     failure_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Last pipeline stage that finished and the context it handed on, so retries resume there
+    pipeline_stage: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    pipeline_context: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    attempt_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Times this job went back to wait on an in-flight duplicate (capped by DUPLICATE_MAX_WAITS)
+    dedup_waits: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC))
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -69,6 +83,12 @@ class TranscriptionJob(Base):
         onupdate=lambda: datetime.now(UTC),
     )
     started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Refreshed by the worker while the job is processing; a stale one means the worker died
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Set when a stage's message is queued, cleared when the stage starts: the job is waiting, not lost
+    dispatched_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # New on every claim; stage messages carry it, so leftovers from an earlier run are dropped
+    claim_token: Mapped[uuid.UUID | None] = mapped_column(Uuid, nullable=True)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     user: Mapped["User"] = relationship(back_populates="jobs")
@@ -80,6 +100,12 @@ class TranscriptionJob(Base):
         Index("ix_transcription_jobs_created_at_desc", created_at.desc()),
         Index("ix_transcription_jobs_status_created_at", "status", "created_at"),
         Index("ix_transcription_jobs_user_id_created_at", "user_id", created_at.desc()),
+        Index("ix_transcription_jobs_content_sha256_status", "content_sha256", "status"),
+        Index(
+            "ix_transcription_jobs_processing_heartbeat",
+            "heartbeat_at",
+            postgresql_where=text("status = 'processing'"),
+        ),
     )
 
 
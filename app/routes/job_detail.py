@@ -7,8 +7,10 @@ from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.deps import current_user, get_session_data
+from app.db.models import JobStatus
 from app.db.session import get_db
 from app.services import jobs_service
+from app.services.submission_service import NON_RETRYABLE_FAILURES
 
 router = APIRouter()
 
@@ -58,5 +60,6 @@ async def job_detail(
             "job": job,
             "segments": segments,
             "overall_confidence": overall_confidence,
+            "can_retry": job.status == JobStatus.failed and job.failure_code not in NON_RETRYABLE_FAILURES,
         },
     )
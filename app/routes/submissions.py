@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import uuid
+
 from fastapi import APIRouter, Depends, File, Form, Request, UploadFile
 from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -45,7 +47,7 @@ async def submit_upload(
                 "message": error_view["message"],
                 "details": error_view["details"],
             },
-            status_code=400,
+            **submission_errors.error_response_args(exc),
         )
     except Exception:
         logger.exception("Unexpected error during upload submission")
@@ -75,6 +77,66 @@ async def submit_upload(
     return RedirectResponse(url="/", status_code=303)
 
 
+@router.post("/submit/upload/complete")
+async def submit_upload_complete(
+    request: Request,
+    job_id: str | None = Form(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Finalize a direct-to-storage upload started by the dashboard and confirm it."""
+    session_data = await get_session_data(request)
+    if session_data is None:
+        return RedirectResponse(url="/login", status_code=307)
+
+    user = await current_user(session_data, db)
+
+    try:
+        try:
+            parsed_job_id = uuid.UUID(job_id or "")
+        except ValueError as exc:
+            raise submission_service.SubmissionError("upload_not_found", "No pending upload for this job") from exc
+        job = await submission_service.complete_direct_upload(parsed_job_id, user, db)
+    except submission_service.SubmissionError as exc:
+        error_view = submission_errors.build_submission_error(exc)
+        from app.main import templates
+
+        return templates.TemplateResponse(
+            "submission_error.html",
+            {
+                "request": request,
+                "message": error_view["message"],
+                "details": error_view["details"],
+            },
+            status_code=400,
+        )
+    except Exception:
+        logger.exception("Unexpected error while completing upload")
+        error_view = submission_errors.build_unexpected_error("Upload failed. Please try again.")
+        from app.main import templates
+
+        return templates.TemplateResponse(
+            "submission_error.html",
+            {
+                "request": request,
+                "message": error_view["message"],
+                "details": error_view["details"],
+            },
+            status_code=400,
+        )
+
+    await set_flash(
+        request,
+        CONFIRMATION_FLASH_KEY,
+        {
+            "job_id": str(job.id),
+            "label": job.source_label,
+            "status": job.status.value,
+        },
+    )
+
+    return RedirectResponse(url="/", status_code=303)
+
+
 @router.post("/submit/url")
 async def submit_url(
     request: Request,
@@ -101,7 +163,7 @@ async def submit_url(
                 "message": error_view["message"],
                 "details": error_view["details"],
             },
-            status_code=400,
+            **submission_errors.error_response_args(exc),
         )
     except Exception:
         logger.exception("Unexpected error during URL submission")
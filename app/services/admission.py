@@ -0,0 +1,96 @@
+"""Admission control for new jobs: turn bursts away before they become hours of backlog.
+
+A submission is refused with a ``Retry-After`` when the scheduler already has
+``ADMISSION_MAX_WAITING`` jobs waiting to start, or when the user already has
+``ADMISSION_MAX_ACTIVE_PER_USER`` jobs uploading, queued or processing. Below both
+limits jobs are accepted and wait in the scheduler until a slot frees up.
+
+The retry delay is how long the excess takes to drain at the cluster's measured
+throughput; for the per-user limit, at that user's round-robin share of it.
+"""
+
+from __future__ import annotations
+
+import math
+
+import redis
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.db.models import JobStatus, TranscriptionJob, User
+from app.logging import get_logger
+from app.metrics import inc
+from app.services import scheduler
+from app.services.submission_service import SubmissionError
+
+logger = get_logger(__name__)
+
+ACTIVE_STATUSES = (JobStatus.uploading, JobStatus.queued, JobStatus.processing)
+
+
+class AdmissionRejectedError(SubmissionError):
+    """The cluster or the user is at capacity; try again after ``retry_after`` seconds."""
+
+    def __init__(self, code: str, detail: str, retry_after: int):
+        super().__init__(code, detail)
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(excess: int, jobs_per_second: float) -> int:
+    """Seconds until ``excess`` jobs have drained at ``jobs_per_second``, within the configured bounds."""
+    low, high = settings.ADMISSION_RETRY_AFTER_MIN_SECONDS, settings.ADMISSION_RETRY_AFTER_MAX_SECONDS
+    if jobs_per_second <= 0:
+        return high
+    return min(high, max(low, math.ceil(excess / jobs_per_second)))
+
+
+async def active_jobs(db: AsyncSession, user: User) -> int:
+    result = await db.execute(
+        select(func.count())
+        .select_from(TranscriptionJob)
+        .where(TranscriptionJob.user_id == user.id, TranscriptionJob.status.in_(ACTIVE_STATUSES))
+    )
+    return int(result.scalar_one())
+
+
+def _load() -> tuple[scheduler.Backlog, float]:
+    return scheduler.backlog(), scheduler.throughput()
+
+
+async def admit(db: AsyncSession, user: User, count: int = 1) -> None:
+    """Raise AdmissionRejectedError unless ``count`` more jobs for ``user`` fit under the limits."""
+    max_waiting, max_per_user = settings.ADMISSION_MAX_WAITING, settings.ADMISSION_MAX_ACTIVE_PER_USER
+    if max_waiting <= 0 and max_per_user <= 0:
+        return
+
+    user_excess = 0
+    if max_per_user > 0:
+        user_excess = await active_jobs(db, user) + count - max_per_user
+    try:
+        backlog, rate = await run_in_threadpool(_load)
+    except redis.RedisError:
+        # The scheduler is unreachable: only the database-backed per-user limit applies
+        logger.warning("Scheduler backlog unavailable; skipping the cluster admission check")
+        backlog, rate = None, 0.0
+
+    if backlog is not None and max_waiting > 0:
+        excess = backlog.waiting + count - max_waiting
+        if excess > 0:
+            inc("admission_rejected_busy")
+            raise AdmissionRejectedError(
+                "over_capacity",
+                "The transcription queue is full. Please try again later.",
+                retry_after_seconds(excess, rate),
+            )
+
+    if user_excess > 0:
+        inc("admission_rejected_user")
+        # Users take turns, so this user's share of the throughput shrinks with every other waiting user
+        share = rate / max(1, backlog.waiting_users if backlog is not None else 1)
+        raise AdmissionRejectedError(
+            "too_many_jobs",
+            f"You already have {max_per_user} or more jobs in progress. Please wait for some to finish.",
+            retry_after_seconds(user_excess, share),
+        )
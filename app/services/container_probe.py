@@ -0,0 +1,223 @@
+"""Container header probe — sniff MP4/MOV/MKV and read duration and tracks from the first bytes.
+
+This runs on the first few MB of a submission (an upload stream, a MinIO range read or
+an HTTP Range request), so files without audio, over the duration limit, or that are not
+really MP4/MOV/MKV are rejected before the bulk transfer. It is pure Python so the API
+container needs no ffmpeg. Anything the header does not reveal is left as ``None`` and
+checked later by ffprobe in the worker.
+"""
+
+import struct
+from dataclasses import dataclass
+
+from app.config import settings
+
+PROBE_BYTES = 4 * 1024 * 1024  # 4 MiB is enough for MKV headers and front-loaded moov atoms
+
+_MP4_TOP_LEVEL = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"uuid", b"moof", b"styp", b"sidx"}
+
+_EBML_HEADER = 0x1A45DFA3
+_EBML_DOCTYPE = 0x4282
+_MKV_SEGMENT = 0x18538067
+_MKV_INFO = 0x1549A966
+_MKV_TIMECODE_SCALE = 0x2AD7B1
+_MKV_DURATION = 0x4489
+_MKV_TRACKS = 0x1654AE6B
+_MKV_TRACK_ENTRY = 0xAE
+_MKV_TRACK_TYPE = 0x83
+_MKV_CLUSTER = 0x1F43B675
+_MKV_TRACK_TYPE_AUDIO = 2
+
+
+@dataclass
+class ContainerInfo:
+    """What the container header revealed. ``None`` means "not in the probed bytes"."""
+
+    container: str | None  # "mp4", "mov", "mkv" or None when unrecognised
+    duration_seconds: float | None = None
+    has_audio: bool | None = None
+    # True when the index precedes the media data, so the file can be decoded front to back
+    streamable: bool = False
+    # MP4/MOV with the moov atom after mdat: absolute offset where the moov atom starts
+    moov_offset: int | None = None
+
+
+def probe_header(data: bytes) -> ContainerInfo:
+    """Identify the container in ``data`` (the start of a file) and parse what it can."""
+    if data[:4] == _EBML_HEADER.to_bytes(4, "big"):
+        return _probe_mkv(data)
+    if len(data) >= 8 and data[4:8] in _MP4_TOP_LEVEL:
+        return _probe_mp4(data)
+    return ContainerInfo(container=None)
+
+
+def probe_moov(data: bytes, info: ContainerInfo) -> ContainerInfo:
+    """Fill ``info`` from a moov atom read separately (``data`` starts at ``info.moov_offset``)."""
+    for box_type, start, end in _iter_boxes(data, 0, len(data)):
+        if box_type == b"moov":
+            if end <= len(data):
+                _parse_moov(data, start, end, info)
+            break
+    return info
+
+
+def rejection_code(info: ContainerInfo) -> str | None:
+    """Failure code for a header that already disqualifies the file, else None."""
+    if info.container is None:
+        return "unsupported_format"
+    if info.has_audio is False:
+        return "no_audio_track"
+    if info.duration_seconds is not None and info.duration_seconds > settings.MAX_DURATION_SECONDS:
+        return "duration_exceeded"
+    return None
+
+
+# --- MP4 / MOV -------------------------------------------------------------------------
+
+
+def _iter_boxes(data: bytes, start: int, end: int):
+    """Yield ``(type, payload_start, box_end)`` for boxes in ``data[start:end]``.
+
+    ``box_end`` may lie past the end of ``data`` for a box that is only partially read.
+    """
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack(">I4s", data[offset : offset + 8])
+        header = 8
+        if size == 1:
+            if offset + 16 > len(data):
+                return
+            size = struct.unpack(">Q", data[offset + 8 : offset + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def _probe_mp4(data: bytes) -> ContainerInfo:
+    info = ContainerInfo(container="mp4")
+    seen_mdat = False
+    for box_type, start, end in _iter_boxes(data, 0, len(data)):
+        if box_type == b"ftyp" and data[start : start + 4] == b"qt  ":
+            info.container = "mov"
+        elif box_type == b"moov":
+            info.streamable = not seen_mdat
+            if end <= len(data):
+                _parse_moov(data, start, end, info)
+            return info
+        elif box_type == b"mdat":
+            seen_mdat = True
+            if end > len(data):
+                # The moov atom (if any) follows the media data
+                info.moov_offset = end
+                return info
+        elif box_type not in _MP4_TOP_LEVEL:
+            break
+    return info
+
+
+def _parse_moov(data: bytes, start: int, end: int, info: ContainerInfo) -> None:
+    info.has_audio = False
+    for box_type, b_start, b_end in _iter_boxes(data, start, end):
+        if box_type == b"mvhd":
+            version = data[b_start]
+            if version == 1:
+                timescale, duration = struct.unpack(">IQ", data[b_start + 20 : b_start + 32])
+            else:
+                timescale, duration = struct.unpack(">II", data[b_start + 12 : b_start + 20])
+            if timescale:
+                info.duration_seconds = duration / timescale
+        elif box_type == b"trak" and _trak_handler(data, b_start, b_end) == b"soun":
+            info.has_audio = True
+
+
+def _trak_handler(data: bytes, start: int, end: int) -> bytes | None:
+    for box_type, b_start, b_end in _iter_boxes(data, start, end):
+        if box_type == b"mdia":
+            for inner_type, i_start, _ in _iter_boxes(data, b_start, b_end):
+                if inner_type == b"hdlr":
+                    # version/flags (4) + pre_defined (4) + handler_type (4)
+                    return data[i_start + 8 : i_start + 12]
+    return None
+
+
+# --- Matroska ---------------------------------------------------------------------------
+
+
+def _read_vint(data: bytes, offset: int, keep_marker: bool) -> tuple[int, int] | None:
+    """Read an EBML variable-length integer. Returns ``(value, length)``; value -1 means unknown size."""
+    if offset >= len(data):
+        return None
+    first = data[offset]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8 or offset + length > len(data):
+        return None
+    value = first if keep_marker else first & (mask - 1)
+    for byte in data[offset + 1 : offset + length]:
+        value = (value << 8) | byte
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return -1, length
+    return value, length
+
+
+def _iter_elements(data: bytes, start: int, end: int):
+    """Yield ``(id, payload_start, payload_end)``; ``payload_end`` is ``end`` for unknown sizes."""
+    offset = start
+    while offset < end:
+        element_id = _read_vint(data, offset, keep_marker=True)
+        if element_id is None:
+            return
+        size = _read_vint(data, offset + element_id[1], keep_marker=False)
+        if size is None:
+            return
+        payload_start = offset + element_id[1] + size[1]
+        payload_end = end if size[0] == -1 else payload_start + size[0]
+        yield element_id[0], payload_start, payload_end
+        offset = payload_end
+
+
+def _probe_mkv(data: bytes) -> ContainerInfo:
+    info = ContainerInfo(container=None, streamable=True)
+    for element_id, start, end in _iter_elements(data, 0, len(data)):
+        if element_id == _EBML_HEADER:
+            for child_id, c_start, c_end in _iter_elements(data, start, min(end, len(data))):
+                if child_id == _EBML_DOCTYPE and data[c_start:c_end] in (b"matroska", b"webm"):
+                    info.container = "mkv"
+        elif element_id == _MKV_SEGMENT and info.container:
+            _parse_segment(data, start, min(end, len(data)), info)
+            break
+    return info
+
+
+def _parse_segment(data: bytes, start: int, end: int, info: ContainerInfo) -> None:
+    timecode_scale = 1_000_000
+    raw_duration: float | None = None
+    for element_id, e_start, e_end in _iter_elements(data, start, end):
+        if element_id == _MKV_CLUSTER or e_end > len(data):
+            break
+        if element_id == _MKV_INFO:
+            for child_id, c_start, c_end in _iter_elements(data, e_start, e_end):
+                if child_id == _MKV_TIMECODE_SCALE:
+                    timecode_scale = int.from_bytes(data[c_start:c_end], "big")
+                elif child_id == _MKV_DURATION and c_end - c_start in (4, 8):
+                    fmt = ">f" if c_end - c_start == 4 else ">d"
+                    raw_duration = struct.unpack(fmt, data[c_start:c_end])[0]
+        elif element_id == _MKV_TRACKS:
+            info.has_audio = False
+            for child_id, c_start, c_end in _iter_elements(data, e_start, e_end):
+                if child_id != _MKV_TRACK_ENTRY:
+                    continue
+                for field_id, f_start, f_end in _iter_elements(data, c_start, c_end):
+                    if field_id == _MKV_TRACK_TYPE and int.from_bytes(data[f_start:f_end], "big") == (
+                        _MKV_TRACK_TYPE_AUDIO
+                    ):
+                        info.has_audio = True
+    if raw_duration is not None:
+        info.duration_seconds = raw_duration * timecode_scale / 1e9
@@ -0,0 +1,87 @@
+"""Content-hash deduplication — reuse transcripts of identical media.
+
+Statements are built here and executed by both the async API session and the
+sync worker session.
+"""
+
+import uuid
+from datetime import UTC, datetime
+
+from sqlalchemy import Insert, Select, Uuid, insert, literal, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import JobStatus, TranscriptionJob, TranscriptSegment
+from app.logging import get_logger
+
+logger = get_logger(__name__)
+
+# A duplicate waits this long between checks on the job already transcribing the same media.
+DUPLICATE_WAIT_SECONDS = 30
+DUPLICATE_MAX_WAITS = 240  # ~2 hours, then transcribe independently
+
+
+def completed_duplicate_stmt(content_sha256: str, exclude_job_id: uuid.UUID) -> Select:
+    """Select a completed job with the same content hash."""
+    return (
+        select(TranscriptionJob)
+        .where(
+            TranscriptionJob.content_sha256 == content_sha256,
+            TranscriptionJob.status == JobStatus.completed,
+            TranscriptionJob.id != exclude_job_id,
+        )
+        .order_by(TranscriptionJob.completed_at)
+        .limit(1)
+    )
+
+
+def in_flight_leader_stmt(job: TranscriptionJob) -> Select:
+    """Select an older in-flight job with the same content hash, which this job should wait on.
+
+    The oldest job (by created_at, then id) for a hash never waits, so duplicates cannot
+    deadlock waiting on each other.
+    """
+    return (
+        select(TranscriptionJob)
+        .where(
+            TranscriptionJob.content_sha256 == job.content_sha256,
+            or_(TranscriptionJob.status == JobStatus.processing, TranscriptionJob.status == JobStatus.queued),
+            tuple_(TranscriptionJob.created_at, TranscriptionJob.id) < tuple_(job.created_at, job.id),
+        )
+        .order_by(TranscriptionJob.created_at)
+        .limit(1)
+    )
+
+
+def clone_segments_stmt(source_job_id: uuid.UUID, target_job_id: uuid.UUID) -> Insert:
+    """Copy every segment of the source job onto the target job in one INSERT ... SELECT."""
+    columns = ["segment_index", "start_ms", "end_ms", "text", "avg_logprob", "confidence"]
+    source = select(
+        literal(target_job_id, Uuid).label("job_id"),
+        *[getattr(TranscriptSegment, c) for c in columns],
+    ).where(TranscriptSegment.job_id == source_job_id)
+    return insert(TranscriptSegment).from_select(["job_id", *columns], source)
+
+
+def mark_completed_from(job: TranscriptionJob, source: TranscriptionJob) -> None:
+    """Copy result metadata from the source job and mark the duplicate completed."""
+    now = datetime.now(UTC)
+    job.duration_seconds = source.duration_seconds
+    job.status = JobStatus.completed
+    job.started_at = job.started_at or now
+    job.completed_at = now
+
+
+async def complete_from_duplicate(db: AsyncSession, job: TranscriptionJob) -> bool:
+    """Complete ``job`` from an already transcribed job with the same hash, if one exists."""
+    if not job.content_sha256:
+        return False
+    result = await db.execute(completed_duplicate_stmt(job.content_sha256, job.id))
+    source = result.scalar_one_or_none()
+    if source is None:
+        return False
+
+    await db.flush()
+    await db.execute(clone_segments_stmt(source.id, job.id))
+    mark_completed_from(job, source)
+    logger.info("Job %s reused transcript of job %s (same content hash)", job.id, source.id)
+    return True
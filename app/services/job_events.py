@@ -0,0 +1,163 @@
+"""Live job progress: workers publish to Redis pub/sub, the API fans events out to watchers.
+
+Every event is also kept as the job's latest snapshot, so a new subscriber or a
+long-poll sees the current state straight from Redis instead of querying Postgres.
+Publishing is best effort: a Redis outage costs live updates, never a job.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections.abc import AsyncGenerator
+from contextlib import aclosing
+
+import redis
+
+from app.auth.session_store import get_redis
+from app.config import settings
+from app.logging import get_logger
+
+logger = get_logger(__name__)
+
+CHANNEL_PREFIX = "job-events:"
+SNAPSHOT_PREFIX = "job-events:last:"
+SNAPSHOT_TTL_SECONDS = 24 * 3600
+TERMINAL_STATUSES = {"completed", "failed"}
+# Progress within a stage is published at most this often (and only when the percent moves)
+PROGRESS_MIN_INTERVAL = 0.5
+
+_redis: redis.Redis | None = None
+
+
+def channel(job_id: uuid.UUID | str) -> str:
+    return f"{CHANNEL_PREFIX}{job_id}"
+
+
+def snapshot_key(job_id: uuid.UUID | str) -> str:
+    return f"{SNAPSHOT_PREFIX}{job_id}"
+
+
+def _client() -> redis.Redis:
+    # Short timeouts: a stalled Redis must not stall the pipeline that is reporting to it
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+    return _redis
+
+
+def publish(job_id: uuid.UUID | str, status: str, stage: str | None = None, progress: float | None = None) -> None:
+    """Publish a job's status, current stage and percent progress within that stage."""
+    event = {
+        "job_id": str(job_id),
+        "status": status,
+        "stage": stage,
+        "progress": None if progress is None else round(min(max(progress, 0.0), 100.0), 1),
+        "at": time.time(),
+    }
+    payload = json.dumps(event)
+    try:
+        pipe = _client().pipeline(transaction=False)
+        pipe.set(snapshot_key(job_id), payload, ex=SNAPSHOT_TTL_SECONDS)
+        pipe.publish(channel(job_id), payload)
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Could not publish progress for job %s: %s", job_id, exc)
+
+
+class ProgressReporter:
+    """Percent progress of one stage, from byte counts, media time or finished chunks.
+
+    Thread-safe, so parallel transcription chunks can report into one reporter. Events are
+    throttled to whole-percent changes at most every PROGRESS_MIN_INTERVAL seconds.
+    """
+
+    def __init__(self, job_id: uuid.UUID | str, stage: str, total: float | None = None):
+        self.job_id = job_id
+        self.stage = stage
+        self.total = total
+        self._done = 0.0
+        self._last_percent = -1
+        self._last_at = 0.0
+        self._lock = threading.Lock()
+
+    def report(self, done: float, total: float | None = None) -> None:
+        """Record progress: ``done`` out of ``total`` (or the total given earlier)."""
+        with self._lock:
+            if total:
+                self.total = total
+            self._done = done
+            self._maybe_publish()
+
+    def _maybe_publish(self) -> None:
+        if not self.total:
+            return
+        percent = min(100, int(self._done * 100 / self.total))
+        now = time.monotonic()
+        if percent <= self._last_percent or (percent < 100 and now - self._last_at < PROGRESS_MIN_INTERVAL):
+            return
+        self._last_percent, self._last_at = percent, now
+        publish(self.job_id, "processing", self.stage, percent)
+
+
+async def latest(job_id: uuid.UUID) -> dict | None:
+    """The job's most recent event, or None when nothing was published recently."""
+    r = await get_redis()
+    raw = await r.get(snapshot_key(job_id))
+    return None if raw is None else dict(json.loads(raw))
+
+
+async def clear(job_id: uuid.UUID) -> None:
+    """Forget a job's last event, e.g. a stale ``failed`` once the job is retried."""
+    r = await get_redis()
+    try:
+        await r.delete(snapshot_key(job_id))
+    except redis.RedisError:
+        logger.warning("Could not clear progress snapshot for job %s", job_id)
+
+
+async def subscribe(job_id: uuid.UUID, timeout: float, snapshot: bool = True) -> AsyncGenerator[dict | None]:
+    """Yield the job's events as they are published, for up to ``timeout`` seconds.
+
+    Starts with the current snapshot (if any, and unless ``snapshot`` is False) and stops
+    after a terminal event. Yields None when nothing arrived for a while, so callers can
+    send keep-alives.
+    """
+    r = await get_redis()
+    pubsub = r.pubsub()
+    # Subscribe before reading the snapshot, so no event falls between the two
+    await pubsub.subscribe(channel(job_id))
+    try:
+        current = await latest(job_id) if snapshot else None
+        if current is not None:
+            yield current
+            if current["status"] in TERMINAL_STATUSES:
+                return
+        deadline = asyncio.get_running_loop().time() + timeout
+        while (remaining := deadline - asyncio.get_running_loop().time()) > 0:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=min(remaining, 15.0))
+            if message is None:
+                yield None
+                continue
+            event = dict(json.loads(message["data"]))
+            yield event
+            if event["status"] in TERMINAL_STATUSES:
+                return
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.reset()
+
+
+async def wait_for_event(job_id: uuid.UUID, timeout: float, after: float | None = None) -> dict | None:
+    """Wait up to ``timeout`` seconds for an event newer than ``after`` (an event's ``at``).
+
+    Returns at once when the snapshot is already newer, so a long-poll client that
+    passes the ``at`` it last saw never misses a change between polls. Without
+    ``after`` only events published from now on count.
+    """
+    async with aclosing(subscribe(job_id, timeout, snapshot=after is not None)) as events:
+        async for event in events:
+            if event is not None and (after is None or event["at"] > after):
+                return event
+    return None
@@ -5,7 +5,7 @@ import uuid
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import TranscriptionJob, TranscriptSegment
+from app.db.models import TranscriptionJob, TranscriptSegment, User
 
 
 async def list_jobs_for_user(db: AsyncSession, user_id: uuid.UUID) -> list[TranscriptionJob]:
@@ -24,6 +24,16 @@ async def get_job_by_id(db: AsyncSession, job_id: uuid.UUID, user_id: uuid.UUID)
     return result.scalar_one_or_none()
 
 
+async def get_job_for_subject(db: AsyncSession, job_id: uuid.UUID, logto_sub: str) -> TranscriptionJob | None:
+    """Get a single job by ID, scoped to the signed-in subject without touching the user row."""
+    result = await db.execute(
+        select(TranscriptionJob)
+        .join(User, User.id == TranscriptionJob.user_id)
+        .where(TranscriptionJob.id == job_id, User.logto_sub == logto_sub)
+    )
+    return result.scalar_one_or_none()
+
+
 async def get_segments_for_job(db: AsyncSession, job_id: uuid.UUID) -> list[TranscriptSegment]:
     """Get all transcript segments for a job, ordered by index."""
     result = await db.execute(
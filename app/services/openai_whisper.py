@@ -1,9 +1,14 @@
 """OpenAI Whisper API client wrapper."""
 
 import math
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 
+import httpx
 import openai
 
 from app.config import settings
@@ -24,14 +29,66 @@ class WhisperSegment:
     confidence: float | None
 
 
+@dataclass
+class AudioChunk:
+    """One piece of a long recording, transcribed on its own.
+
+    The file covers ``[read_start_ms, end_ms)`` of the recording. The chunk owns
+    ``[start_ms, end_ms)``; anything before ``start_ms`` is lead-in overlap with the
+    previous chunk, present only when there was no silence to cut at.
+    """
+
+    path: str
+    start_ms: int
+    end_ms: int
+    read_start_ms: int
+
+
+_client: openai.OpenAI | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> openai.OpenAI:
+    """The process-wide OpenAI client; its connection pool keeps connections alive across jobs."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=settings.TRANSCRIBE_MAX_CONCURRENCY * 2,
+                    max_keepalive_connections=settings.TRANSCRIBE_MAX_CONCURRENCY,
+                    keepalive_expiry=120,
+                ),
+                timeout=httpx.Timeout(600, connect=10),
+            )
+            _client = openai.OpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL or None,
+                http_client=http_client,
+            )
+        return _client
+
+
+def _reset_client() -> None:
+    # A forked child must not share the parent's sockets
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_client)
+
+
 def transcribe_audio(audio_path: str | Path) -> list[WhisperSegment]:
     """Send audio to OpenAI Whisper and return parsed segments.
 
-    Uses verbose_json response format with segment-level timestamps.
+    Uses verbose_json response format with segment-level timestamps. Each request holds
+    a cluster-wide transcription slot, so bursts queue here instead of hitting rate limits.
     """
-    client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+    from app.services.transcription_limiter import transcription_slot
 
-    with open(audio_path, "rb") as audio_file:
+    client = get_client()
+    with open(audio_path, "rb") as audio_file, transcription_slot():
         logger.info("Sending audio to Whisper API (model=%s)", settings.OPENAI_TRANSCRIBE_MODEL)
         response = client.audio.transcriptions.create(
             model=settings.OPENAI_TRANSCRIBE_MODEL,
@@ -67,3 +124,65 @@ def transcribe_audio(audio_path: str | Path) -> list[WhisperSegment]:
 
     logger.info("Whisper returned %d segments", len(segments))
     return segments
+
+
+def merge_chunk_segments(chunks: list[AudioChunk], results: list[list[WhisperSegment]]) -> list[WhisperSegment]:
+    """Stitch per-chunk segments into one transcript on the recording's timeline.
+
+    Timestamps are shifted by each chunk's offset, segments centred in another chunk's
+    overlap are dropped so shared audio is transcribed once, and indexes are renumbered.
+    """
+    merged: list[WhisperSegment] = []
+    for position, (chunk, segments) in enumerate(zip(chunks, results, strict=True)):
+        is_last = position == len(chunks) - 1
+        for seg in segments:
+            start_ms = seg.start_ms + chunk.read_start_ms
+            end_ms = seg.end_ms + chunk.read_start_ms
+            midpoint = (start_ms + end_ms) // 2
+            # The last chunk keeps everything past its nominal end (durations are rounded down)
+            if midpoint < chunk.start_ms or (midpoint >= chunk.end_ms and not is_last):
+                continue
+            merged.append(
+                WhisperSegment(
+                    segment_index=len(merged),
+                    start_ms=start_ms,
+                    end_ms=end_ms,
+                    text=seg.text,
+                    avg_logprob=seg.avg_logprob,
+                    confidence=seg.confidence,
+                )
+            )
+    return merged
+
+
+def transcribe_chunks(
+    chunks: list[AudioChunk],
+    max_workers: int | None = None,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> list[WhisperSegment]:
+    """Transcribe chunks concurrently and merge them into one segment list.
+
+    A failed chunk fails the whole transcription. ``on_progress`` is called with
+    ``(chunks done, total chunks)`` as each chunk comes back.
+    """
+    done = 0
+    done_lock = threading.Lock()
+
+    def transcribe(chunk: AudioChunk) -> list[WhisperSegment]:
+        nonlocal done
+        segments = transcribe_audio(chunk.path)
+        if on_progress is not None:
+            with done_lock:
+                done += 1
+                finished = done
+            on_progress(finished, len(chunks))
+        return segments
+
+    if len(chunks) == 1 and chunks[0].read_start_ms == 0:
+        return transcribe(chunks[0])
+
+    workers = min(max_workers or settings.TRANSCRIBE_MAX_CONCURRENCY, len(chunks))
+    logger.info("Transcribing %d chunks with %d parallel Whisper requests", len(chunks), workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whisper") as pool:
+        results = list(pool.map(transcribe, chunks))
+    return merge_chunk_segments(chunks, results)
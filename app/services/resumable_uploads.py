@@ -0,0 +1,186 @@
+"""Resumable chunked uploads with per-chunk checksums.
+
+A resumable upload is a job in ``uploading`` status backed by a MinIO multipart
+upload. Each chunk maps to exactly one multipart part (offset / chunk size + 1),
+is verified against its SHA-256 before it is stored, and is recorded in Redis so
+clients can ask which byte ranges are already present after a dropped connection.
+Finalizing goes through ``submission_service.complete_direct_upload``, with the
+content digest built from the chunk checksums so the worker never reads the object
+back just to hash it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.auth.session_store import get_redis
+from app.db.models import TranscriptionJob, User
+from app.logging import get_logger
+from app.services.container_probe import PROBE_BYTES
+from app.services.submission_service import (
+    SubmissionError,
+    check_header,
+    get_pending_upload,
+    part_size_for,
+    start_pending_upload,
+)
+
+logger = get_logger(__name__)
+
+CHUNKS_PREFIX = "upload-chunks:"
+CHUNKS_TTL = 86400  # matches the retention window for abandoned uploads
+
+
+def _chunks_key(job_id: uuid.UUID) -> str:
+    return f"{CHUNKS_PREFIX}{job_id}"
+
+
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merge half-open ``[start, end)`` byte ranges into sorted, non-overlapping ranges."""
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def expected_chunk_length(offset: int, size: int, chunk_size: int) -> int:
+    """Length a chunk at ``offset`` must have: a full chunk, or the remainder for the last one."""
+    if offset < 0 or offset >= size or offset % chunk_size != 0:
+        raise SubmissionError("invalid_offset", f"Offset must be a multiple of {chunk_size} below {size}")
+    return min(chunk_size, size - offset)
+
+
+async def put_chunk(
+    job_id: uuid.UUID,
+    offset: int,
+    data: bytes,
+    checksum: str | None,
+    user: User,
+    db: AsyncSession,
+) -> tuple[int, int]:
+    """Verify and store one chunk. Returns the ``[start, end)`` range it covers.
+
+    Re-sending a chunk that is already present simply replaces the part, so
+    clients can retry blindly after a timeout.
+    """
+    job = await get_pending_upload(job_id, user, db)
+    size = job.size_bytes or 0
+    chunk_size = part_size_for(size)
+
+    if len(data) != expected_chunk_length(offset, size, chunk_size):
+        raise SubmissionError("invalid_chunk", "Chunk length does not match its offset")
+    if not checksum:
+        raise SubmissionError("missing_checksum", "X-Chunk-SHA256 header is required")
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != checksum.strip().lower():
+        raise SubmissionError("checksum_mismatch", "Chunk checksum does not match its contents")
+
+    from app.services import storage_minio
+
+    if offset == 0:
+        # The first chunk carries the container header: reject bad files before the rest arrives
+        try:
+            check_header(data[:PROBE_BYTES])
+        except SubmissionError:
+            await run_in_threadpool(
+                storage_minio.abort_multipart_upload, str(job.original_object_key), str(job.upload_id)
+            )
+            await db.delete(job)
+            await db.commit()
+            raise
+
+    part_number = offset // chunk_size + 1
+    etag = await run_in_threadpool(
+        storage_minio.upload_part, str(job.original_object_key), str(job.upload_id), part_number, data
+    )
+
+    r = await get_redis()
+    key = _chunks_key(job.id)
+    record = {"offset": offset, "length": len(data), "sha256": digest, "etag": etag}
+    await r.hset(key, str(part_number), json.dumps(record))
+    await r.expire(key, CHUNKS_TTL)
+
+    logger.info("Stored chunk %d for upload job %s", part_number, job.id)
+    return offset, offset + len(data)
+
+
+async def content_digest(job_id: uuid.UUID) -> str | None:
+    """Deduplication key of a resumable upload: SHA-256 over its chunks' SHA-256s, in offset order.
+
+    Chunking depends only on the file size, so identical files uploaded this way share
+    the key. It never equals a whole-file hash, so they do not match URL or form uploads.
+    None when the job has no chunk records, as for presigned direct uploads.
+    """
+    r = await get_redis()
+    raw = await r.hgetall(_chunks_key(job_id))
+    if not raw:
+        return None
+    hasher = hashlib.sha256()
+    for record in sorted((json.loads(value) for value in raw.values()), key=lambda rec: rec["offset"]):
+        hasher.update(bytes.fromhex(record["sha256"]))
+    return hasher.hexdigest()
+
+
+async def get_upload_status(job_id: uuid.UUID, user: User, db: AsyncSession) -> dict:
+    """Describe a resumable upload: chunk size plus received and missing byte ranges."""
+    job = await get_pending_upload(job_id, user, db)
+    return await _describe(job)
+
+
+async def _describe(job: TranscriptionJob) -> dict:
+    size = job.size_bytes or 0
+    chunk_size = part_size_for(size)
+
+    r = await get_redis()
+    raw = await r.hgetall(_chunks_key(job.id))
+    received: list[tuple[int, int]] = []
+    for value in raw.values():
+        record = json.loads(value)
+        received.append((record["offset"], record["offset"] + record["length"]))
+    received = merge_ranges(received)
+
+    missing: list[tuple[int, int]] = []
+    cursor = 0
+    for start, end in received:
+        if start > cursor:
+            missing.append((cursor, start))
+        cursor = end
+    if cursor < size:
+        missing.append((cursor, size))
+
+    return {
+        "job_id": str(job.id),
+        "size": size,
+        "chunk_size": chunk_size,
+        "chunk_count": math.ceil(size / chunk_size),
+        "received": [list(rng) for rng in received],
+        "missing": [list(rng) for rng in missing],
+    }
+
+
+async def start_upload(
+    filename: str | None,
+    size: int | None,
+    content_type: str | None,
+    user: User,
+    db: AsyncSession,
+) -> dict:
+    """Open a resumable upload and return its initial status."""
+    job = await start_pending_upload(filename, size, content_type, user, db)
+    logger.info("Started resumable upload job %s for file %s", job.id, job.source_label)
+    return await _describe(job)
+
+
+async def clear_chunks(job_id: uuid.UUID) -> None:
+    """Forget chunk records once the upload has been finalized."""
+    r = await get_redis()
+    await r.delete(_chunks_key(job_id))
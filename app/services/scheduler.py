@@ -0,0 +1,299 @@
+"""Job scheduler in front of the pipeline: duration lanes with per-user fair share.
+
+Submitted jobs wait in Redis, one list per (lane, user), instead of going straight onto
+the Celery queue. Short jobs go to the ``fast`` lane, long or unknown-length jobs to
+the ``slow`` one. The dispatcher starts jobs while fewer than
+``SCHEDULER_MAX_IN_FLIGHT`` are running. It takes the next job round-robin across the
+users waiting in a lane, so one user's bulk submission cannot hold back everyone
+else. The fast lane goes first, except that every ``SCHEDULER_SLOW_LANE_EVERY``-th
+pick prefers the slow lane, so long jobs are never starved.
+
+Dispatched jobs carry their lane's Celery priority through every pipeline stage, so
+a worker busy with a backlog still picks up a short job's next stage first. Each
+running job holds a lease in a sorted set: it is released when the job finishes, and
+a crashed job's lease expires after ``SCHEDULER_LEASE_SECONDS``.
+
+A job submitted with a delay (a duplicate waiting on the job already transcribing the
+same media) waits in a sorted set until it is due, holding neither a slot nor a
+Celery message; the next dispatch after that moves it onto its pending list.
+"""
+
+import time
+import uuid
+from dataclasses import dataclass
+
+import redis
+from redis.commands.core import Script
+
+from app.config import settings
+from app.logging import get_logger
+from app.metrics import inc
+
+logger = get_logger(__name__)
+
+FAST_LANE = "fast"
+SLOW_LANE = "slow"
+# The Redis broker serves priority 0 before 3, 6 and 9 on each queue
+LANE_PRIORITY = {FAST_LANE: 0, SLOW_LANE: 6}
+
+PENDING_PREFIX = "sched:pending:"
+IN_FLIGHT_KEY = "sched:in-flight"
+DELAYED_KEY = "sched:delayed"
+TURN_KEY = "sched:turn"
+FINISHED_PREFIX = "sched:finished:"
+# Throughput is measured over this many whole minutes plus the current one
+THROUGHPUT_WINDOW_MINUTES = 5
+# Most jobs started by one dispatch call; the rest wait for the next release or tick
+DISPATCH_BATCH = 100
+
+
+def _users_key(lane: str) -> str:
+    return f"sched:users:{lane}"
+
+
+def _pending_key(lane: str, user_id: uuid.UUID | str) -> str:
+    return f"{PENDING_PREFIX}{lane}:{user_id}"
+
+
+# A user enters the lane's ring when their pending list goes from empty to non-empty
+_SUBMIT_LUA = """
+for i = 2, #ARGV, 2 do
+  local pending = ARGV[1] .. ARGV[i + 1]
+  if redis.call('RPUSH', pending, ARGV[i]) == 1 then
+    redis.call('RPUSH', KEYS[1], ARGV[i + 1])
+  end
+end
+return 1
+"""
+
+# Delayed entries are "lane:user:job" members scored by the time they are due
+_SUBMIT_DELAYED_LUA = """
+local t = redis.call('TIME')
+local due = t[1] * 1000 + math.floor(t[2] / 1000) + tonumber(ARGV[1])
+for i = 2, #ARGV do
+  redis.call('ZADD', KEYS[1], due, ARGV[i])
+end
+return 1
+"""
+
+# Returns a flat list of lane, job id pairs for the jobs to start now. Pending lists
+# are per user, so their keys are built here rather than passed in (single Redis only).
+_DISPATCH_LUA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local max_in_flight = tonumber(ARGV[1])
+local lease_ms = tonumber(ARGV[2])
+local slow_every = tonumber(ARGV[3])
+local prefix = ARGV[4]
+local batch = tonumber(ARGV[5])
+local rings = {fast = KEYS[2], slow = KEYS[3]}
+
+for _, entry in ipairs(redis.call('ZRANGEBYSCORE', KEYS[5], '-inf', now)) do
+  local lane, user, job = string.match(entry, '^(%a+):([^:]+):(.+)$')
+  if redis.call('RPUSH', prefix .. lane .. ':' .. user, job) == 1 then
+    redis.call('RPUSH', rings[lane], user)
+  end
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[5], '-inf', now)
+
+local function pop(lane)
+  local ring = rings[lane]
+  for _ = 1, redis.call('LLEN', ring) do
+    local user = redis.call('LMOVE', ring, ring, 'LEFT', 'RIGHT')
+    local pending = prefix .. lane .. ':' .. user
+    local job = redis.call('LPOP', pending)
+    if redis.call('LLEN', pending) == 0 then
+      redis.call('LREM', ring, -1, user)
+    end
+    if job then
+      return job
+    end
+  end
+  return nil
+end
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+local free = max_in_flight - redis.call('ZCARD', KEYS[1])
+local started = {}
+while free > 0 and #started < batch * 2 do
+  local first, second = 'fast', 'slow'
+  if slow_every > 0 and redis.call('INCR', KEYS[4]) % slow_every == 0 then
+    first, second = 'slow', 'fast'
+  end
+  local lane = first
+  local job = pop(first)
+  if not job then
+    lane = second
+    job = pop(second)
+  end
+  if not job then
+    break
+  end
+  redis.call('ZADD', KEYS[1], now + lease_ms, job)
+  table.insert(started, lane)
+  table.insert(started, job)
+  free = free - 1
+end
+return started
+"""
+
+# Returns waiting jobs, users with waiting jobs (counted once per lane) and live leases
+_BACKLOG_LUA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local jobs, users = 0, 0
+for i = 2, #KEYS do
+  local lane = ARGV[i - 1]
+  for _, user in ipairs(redis.call('LRANGE', KEYS[i], 0, -1)) do
+    jobs = jobs + redis.call('LLEN', ARGV[#ARGV] .. lane .. ':' .. user)
+    users = users + 1
+  end
+end
+return {jobs, users, redis.call('ZCOUNT', KEYS[1], '(' .. now, '+inf')}
+"""
+
+
+@dataclass(frozen=True)
+class Backlog:
+    waiting: int
+    waiting_users: int
+    in_flight: int
+
+
+@dataclass(frozen=True)
+class _Scripts:
+    submit: Script
+    submit_delayed: Script
+    dispatch: Script
+    backlog: Script
+
+
+_redis: redis.Redis | None = None
+_scripts: _Scripts | None = None
+
+
+def _client() -> tuple[redis.Redis, _Scripts]:
+    global _redis, _scripts
+    if _redis is None or _scripts is None:
+        _redis = redis.Redis.from_url(settings.REDIS_URL)
+        _scripts = _Scripts(
+            submit=_redis.register_script(_SUBMIT_LUA),
+            submit_delayed=_redis.register_script(_SUBMIT_DELAYED_LUA),
+            dispatch=_redis.register_script(_DISPATCH_LUA),
+            backlog=_redis.register_script(_BACKLOG_LUA),
+        )
+    return _redis, _scripts
+
+
+def enabled() -> bool:
+    return settings.SCHEDULER_MAX_IN_FLIGHT > 0
+
+
+def estimated_duration(duration_seconds: int | None, size_bytes: int | None) -> float | None:
+    """The probed duration, else one estimated from the file size, else None."""
+    if duration_seconds is not None:
+        return float(duration_seconds)
+    if size_bytes:
+        return size_bytes / settings.SCHEDULER_BYTES_PER_SECOND
+    return None
+
+
+def lane_for(duration_seconds: int | None, size_bytes: int | None) -> str:
+    """Fast lane for jobs known to be short; long and unknown-length jobs go slow."""
+    estimate = estimated_duration(duration_seconds, size_bytes)
+    if estimate is not None and estimate <= settings.SCHEDULER_FAST_LANE_MAX_SECONDS:
+        return FAST_LANE
+    return SLOW_LANE
+
+
+def _start(job_id: str, lane: str, countdown: int | None = None) -> None:
+    from worker.tasks import process_transcription_job
+
+    process_transcription_job.apply_async((job_id,), countdown=countdown, priority=LANE_PRIORITY[lane])
+    inc(f"scheduler_started_{lane}")
+
+
+def submit(jobs: list[tuple[uuid.UUID, uuid.UUID, str]], delay_seconds: int = 0) -> None:
+    """Queue ``(job_id, user_id, lane)`` entries and start as many as there is room for.
+
+    With ``delay_seconds`` the entries only join the queue once that long has passed.
+    """
+    if not jobs:
+        return
+    if not enabled():
+        for job_id, _, lane in jobs:
+            _start(str(job_id), lane, countdown=delay_seconds or None)
+        return
+
+    client, scripts = _client()
+    if delay_seconds:
+        members = [f"{lane}:{user_id}:{job_id}" for job_id, user_id, lane in jobs]
+        scripts.submit_delayed(keys=[DELAYED_KEY], args=[delay_seconds * 1000, *members])
+        return
+    pipe = client.pipeline(transaction=False)
+    for lane in (FAST_LANE, SLOW_LANE):
+        args = [
+            value for job_id, user_id, job_lane in jobs if job_lane == lane for value in (str(job_id), str(user_id))
+        ]
+        if args:
+            scripts.submit(keys=[_users_key(lane)], args=[_pending_key(lane, ""), *args], client=pipe)
+    pipe.execute()
+    dispatch()
+
+
+def dispatch() -> int:
+    """Queue delayed jobs that are due, then start waiting jobs while there is room. Returns how many started."""
+    if not enabled():
+        return 0
+    _, scripts = _client()
+    result = scripts.dispatch(
+        keys=[IN_FLIGHT_KEY, _users_key(FAST_LANE), _users_key(SLOW_LANE), TURN_KEY, DELAYED_KEY],
+        args=[
+            settings.SCHEDULER_MAX_IN_FLIGHT,
+            settings.SCHEDULER_LEASE_SECONDS * 1000,
+            settings.SCHEDULER_SLOW_LANE_EVERY,
+            PENDING_PREFIX,
+            DISPATCH_BATCH,
+        ],
+    )
+    started = [value.decode() if isinstance(value, bytes) else str(value) for value in result]
+    for lane, job_id in zip(started[::2], started[1::2], strict=True):
+        _start(job_id, lane)
+    return len(started) // 2
+
+
+def release(job_id: uuid.UUID | str) -> None:
+    """Free a finished job's slot and start the next waiting job in its place."""
+    if not enabled():
+        return
+    try:
+        client, _ = _client()
+        pipe = client.pipeline(transaction=False)
+        pipe.zrem(IN_FLIGHT_KEY, str(job_id))
+        finished_key = f"{FINISHED_PREFIX}{int(time.time() // 60)}"
+        pipe.incr(finished_key)
+        pipe.expire(finished_key, (THROUGHPUT_WINDOW_MINUTES + 2) * 60)
+        pipe.execute()
+        dispatch()
+    except redis.RedisError:
+        logger.warning("Could not release scheduler slot of job %s; its lease will expire", job_id)
+
+
+def backlog() -> Backlog:
+    """How many jobs wait to start, for how many users, and how many are running."""
+    _, scripts = _client()
+    lanes = (FAST_LANE, SLOW_LANE)
+    waiting, users, in_flight = scripts.backlog(
+        keys=[IN_FLIGHT_KEY, *(_users_key(lane) for lane in lanes)], args=[*lanes, PENDING_PREFIX]
+    )
+    return Backlog(int(waiting), int(users), int(in_flight))
+
+
+def throughput() -> float:
+    """Jobs finished per second over the last few minutes (0.0 when none finished)."""
+    client, _ = _client()
+    now = time.time()
+    minute = int(now // 60)
+    keys = [f"{FINISHED_PREFIX}{m}" for m in range(minute - THROUGHPUT_WINDOW_MINUTES, minute + 1)]
+    finished = sum(int(count) for count in client.mget(keys) if count is not None)
+    return finished / (THROUGHPUT_WINDOW_MINUTES * 60 + now % 60)
@@ -1,8 +1,22 @@
-"""MinIO storage client wrapper."""
+"""MinIO storage client wrapper.
 
+Transfers stream: files and iterators go up as multipart uploads with parts sent in
+parallel, and large objects come down as parallel ranged GETs written in place, so
+memory per transfer is a few parts regardless of object size. All requests share one
+tuned urllib3 pool per process.
+"""
+
+import os
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from io import BytesIO
+from typing import Any, BinaryIO, cast
 
+import certifi
+import urllib3
 from minio import Minio
+from minio.datatypes import Part
 from minio.error import S3Error
 
 from app.config import settings
@@ -10,7 +24,46 @@ from app.logging import get_logger
 
 logger = get_logger(__name__)
 
+UPLOAD_PART_SIZE = 16 * 1024 * 1024  # 16 MiB per multipart part
+DOWNLOAD_PART_SIZE = 16 * 1024 * 1024  # bytes per ranged GET when downloading in parallel
+STREAM_CHUNK_SIZE = 1024 * 1024
+
 _client: Minio | None = None
+_presign_client: Minio | None = None
+
+
+class ObjectTooLargeError(ValueError):
+    """Raised when a streamed upload grows past its size limit."""
+
+
+class _LimitedReader:
+    """File-like wrapper that counts (and optionally hashes) bytes read and enforces a size limit."""
+
+    def __init__(self, stream: BinaryIO, max_size: int | None, hasher: Any = None):
+        self._stream = stream
+        self.max_size = max_size
+        self.hasher = hasher
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self.bytes_read += len(data)
+        if self.max_size is not None and self.bytes_read > self.max_size:
+            raise ObjectTooLargeError(f"Stream exceeds maximum size of {self.max_size} bytes")
+        if self.hasher is not None:
+            self.hasher.update(data)
+        return data
+
+
+def _http_pool() -> urllib3.PoolManager:
+    """Connection pool sized for parallel part transfers, with MinIO's default retry policy."""
+    return urllib3.PoolManager(
+        maxsize=settings.MINIO_MAX_CONNECTIONS,
+        timeout=urllib3.Timeout(connect=10, read=300),
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        retries=urllib3.Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+    )
 
 
 def get_minio_client() -> Minio:
@@ -21,10 +74,27 @@ def get_minio_client() -> Minio:
             access_key=settings.MINIO_ACCESS_KEY,
             secret_key=settings.MINIO_SECRET_KEY,
             secure=settings.MINIO_SECURE,
+            http_client=_http_pool(),
         )
     return _client
 
 
+def get_presign_client() -> Minio:
+    """Client used only to sign URLs handed to browsers (no requests are sent with it)."""
+    global _presign_client
+    if _presign_client is None:
+        public_endpoint = settings.MINIO_PUBLIC_ENDPOINT
+        _presign_client = Minio(
+            endpoint=public_endpoint or settings.MINIO_ENDPOINT,
+            access_key=settings.MINIO_ACCESS_KEY,
+            secret_key=settings.MINIO_SECRET_KEY,
+            secure=settings.MINIO_PUBLIC_SECURE if public_endpoint else settings.MINIO_SECURE,
+            # A fixed region keeps signing offline instead of probing the bucket location.
+            region=settings.MINIO_REGION,
+        )
+    return _presign_client
+
+
 def ensure_bucket() -> None:
     """Create the bucket if it doesn't exist."""
     client = get_minio_client()
@@ -55,6 +125,196 @@ def put_object(key: str, data: bytes | BytesIO, content_type: str = "application
     logger.info("Uploaded object: %s (%d bytes)", key, size)
 
 
+def put_stream(
+    key: str,
+    stream: BinaryIO,
+    content_type: str = "application/octet-stream",
+    max_size: int | None = None,
+    part_size: int = UPLOAD_PART_SIZE,
+    hasher: Any = None,
+) -> int:
+    """Upload a file-like object of unknown length as a multipart upload. Returns bytes written.
+
+    The stream is read one ``part_size`` part at a time and up to MINIO_TRANSFER_CONCURRENCY
+    parts upload in parallel; the reader blocks while all uploaders are busy, so memory stays
+    bounded at a few parts. If the stream fails or exceeds ``max_size``, MinIO aborts the
+    multipart upload and the error propagates. A ``hashlib`` object passed as ``hasher``
+    sees every byte as it streams.
+    """
+    client = get_minio_client()
+    reader = _LimitedReader(stream, max_size, hasher)
+    client.put_object(
+        bucket_name=settings.MINIO_BUCKET,
+        object_name=key,
+        data=cast(BinaryIO, reader),
+        length=-1,
+        part_size=part_size,
+        content_type=content_type,
+        num_parallel_uploads=settings.MINIO_TRANSFER_CONCURRENCY,
+    )
+    logger.info("Streamed object: %s (%d bytes)", key, reader.bytes_read)
+    return reader.bytes_read
+
+
+def put_file(key: str, path: str, content_type: str = "application/octet-stream") -> int:
+    """Upload a local file without loading it into memory; large files go up in parallel parts."""
+    client = get_minio_client()
+    client.fput_object(
+        settings.MINIO_BUCKET,
+        key,
+        path,
+        content_type=content_type,
+        part_size=UPLOAD_PART_SIZE,
+        num_parallel_uploads=settings.MINIO_TRANSFER_CONCURRENCY,
+    )
+    size = os.path.getsize(path)
+    logger.info("Uploaded file: %s (%d bytes)", key, size)
+    return size
+
+
+def get_file(key: str, path: str, part_size: int = DOWNLOAD_PART_SIZE) -> int:
+    """Download an object to a local file. Returns its size.
+
+    Objects larger than one part are fetched as parallel ranged GETs, each written at its
+    offset with ``pwrite``; memory stays at one read buffer per connection. Every range is
+    pinned to the ETag seen up front, so an object replaced mid-download fails instead of
+    producing a spliced file.
+    """
+    client = get_minio_client()
+    stat = client.stat_object(settings.MINIO_BUCKET, key)
+    size = int(stat.size or 0)
+    ranges = [(offset, min(part_size, size - offset)) for offset in range(0, size, part_size)]
+    headers = {"If-Match": stat.etag} if stat.etag else None
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, size)
+        workers = min(settings.MINIO_TRANSFER_CONCURRENCY, len(ranges))
+        if workers <= 1:
+            for offset, length in ranges:
+                _get_range_into(fd, key, offset, length, headers)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="minio-get") as pool:
+                list(pool.map(lambda r: _get_range_into(fd, key, r[0], r[1], headers), ranges))
+    finally:
+        os.close(fd)
+    logger.info("Downloaded object: %s (%d bytes in %d ranges)", key, size, len(ranges))
+    return size
+
+
+def _get_range_into(fd: int, key: str, offset: int, length: int, headers: dict | None) -> None:
+    client = get_minio_client()
+    response = client.get_object(settings.MINIO_BUCKET, key, offset=offset, length=length, request_headers=headers)
+    position = offset
+    try:
+        for chunk in response.stream(STREAM_CHUNK_SIZE):
+            view = memoryview(chunk)
+            while view:
+                written = os.pwrite(fd, view, position)
+                view = view[written:]
+                position += written
+    finally:
+        response.close()
+        response.release_conn()
+    if position != offset + length:
+        raise OSError(f"Short read for {key} at offset {offset}: got {position - offset} of {length} bytes")
+
+
+def create_multipart_upload(key: str, content_type: str = "application/octet-stream") -> str:
+    """Start a multipart upload and return its upload id."""
+    client = get_minio_client()
+    upload_id = client._create_multipart_upload(settings.MINIO_BUCKET, key, {"Content-Type": content_type})
+    logger.info("Started multipart upload: %s", key)
+    return upload_id
+
+
+def presign_upload_part(key: str, upload_id: str, part_number: int) -> str:
+    """Return a presigned PUT URL for one part of a multipart upload."""
+    return get_presign_client().get_presigned_url(
+        "PUT",
+        settings.MINIO_BUCKET,
+        key,
+        expires=timedelta(seconds=settings.PRESIGNED_URL_EXPIRY_SECONDS),
+        extra_query_params={"uploadId": upload_id, "partNumber": str(part_number)},
+    )
+
+
+def upload_part(key: str, upload_id: str, part_number: int, data: bytes) -> str:
+    """Upload one part of a multipart upload and return its ETag."""
+    client = get_minio_client()
+    return client._upload_part(settings.MINIO_BUCKET, key, data, None, upload_id, part_number)
+
+
+def list_uploaded_parts(key: str, upload_id: str) -> list[Part]:
+    """List the parts MinIO has received for a multipart upload."""
+    client = get_minio_client()
+    parts: list[Part] = []
+    marker: str | None = None
+    while True:
+        result = client._list_parts(settings.MINIO_BUCKET, key, upload_id, part_number_marker=marker)
+        parts.extend(result.parts)
+        if not result.is_truncated:
+            return parts
+        marker = result.next_part_number_marker
+
+
+def complete_multipart_upload(key: str, upload_id: str, parts: list[Part]) -> None:
+    """Assemble the given parts into the final object."""
+    client = get_minio_client()
+    client._complete_multipart_upload(settings.MINIO_BUCKET, key, upload_id, parts)
+    logger.info("Completed multipart upload: %s (%d parts)", key, len(parts))
+
+
+def abort_multipart_upload(key: str, upload_id: str) -> None:
+    """Abort a multipart upload, discarding any uploaded parts."""
+    client = get_minio_client()
+    try:
+        client._abort_multipart_upload(settings.MINIO_BUCKET, key, upload_id)
+        logger.info("Aborted multipart upload: %s", key)
+    except S3Error:
+        logger.warning("Failed to abort multipart upload: %s", key)
+
+
+def get_object_size(key: str) -> int:
+    """Return the size of a stored object in bytes."""
+    client = get_minio_client()
+    return int(client.stat_object(settings.MINIO_BUCKET, key).size or 0)
+
+
+def iter_object(key: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """Stream an object from the bucket in chunks."""
+    client = get_minio_client()
+    response = client.get_object(settings.MINIO_BUCKET, key)
+    try:
+        yield from response.stream(chunk_size)
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def presign_get_object(key: str, expires_seconds: int | None = None) -> str:
+    """Return a presigned GET URL on the internal endpoint, for ffprobe/ffmpeg to read directly.
+
+    Both tools issue HTTP Range requests against it, so only the bytes they need are fetched.
+    """
+    return get_minio_client().presigned_get_object(
+        settings.MINIO_BUCKET,
+        key,
+        expires=timedelta(seconds=expires_seconds or settings.PRESIGNED_URL_EXPIRY_SECONDS),
+    )
+
+
+def get_object_range(key: str, offset: int, length: int) -> bytes:
+    """Read ``length`` bytes of an object starting at ``offset``."""
+    client = get_minio_client()
+    response = client.get_object(settings.MINIO_BUCKET, key, offset=offset, length=length)
+    try:
+        return response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+
 def get_object(key: str) -> bytes:
     """Download an object from the bucket."""
     client = get_minio_client()
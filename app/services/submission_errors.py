@@ -29,6 +29,15 @@ def build_submission_error(error: submission_service.SubmissionError) -> dict[st
     }
 
 
+def error_response_args(error: submission_service.SubmissionError) -> dict[str, Any]:
+    """Status code (and Retry-After header, when admission control refused the job) for the error page."""
+    from app.services.admission import AdmissionRejectedError
+
+    if isinstance(error, AdmissionRejectedError):
+        return {"status_code": 429, "headers": {"Retry-After": str(error.retry_after)}}
+    return {"status_code": 400}
+
+
 def build_unexpected_error(details: str) -> dict[str, Any]:
     """Return a friendly error view model for unexpected failures."""
     return {
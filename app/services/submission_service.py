@@ -2,21 +2,40 @@
 
 from __future__ import annotations
 
+import hashlib
+import math
 import os
 import uuid
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
 
 from fastapi import UploadFile
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.db.models import JobSourceType, JobStatus, TranscriptionJob, User
 from app.logging import get_logger
 from app.metrics import inc
+from app.services.container_probe import PROBE_BYTES, ContainerInfo, probe_header, rejection_code
 
 logger = get_logger(__name__)
 
 ALLOWED_EXTENSIONS = {".mp4", ".mov", ".mkv"}
 MAX_UPLOAD_SIZE = 2 * 1024 * 1024 * 1024  # 2 GB
+MAX_UPLOAD_PARTS = 10_000  # S3 multipart limit
+MAX_BATCH_SIZE = 1000
+
+# Failures caused by the media itself: retrying cannot change the outcome
+NON_RETRYABLE_FAILURES = {
+    "unsupported_format",
+    "no_audio_track",
+    "duration_exceeded",
+    "ssrf_blocked",
+    "download_size_exceeded",
+}
 
 
 class SubmissionError(Exception):
@@ -28,9 +47,51 @@ class SubmissionError(Exception):
         self.detail = detail
 
 
-def _derive_label_from_url(url: str) -> str:
-    from urllib.parse import urlparse
+@dataclass
+class DirectUpload:
+    """A pending direct-to-storage upload: the job plus presigned part URLs."""
+
+    job: TranscriptionJob
+    part_size: int
+    part_urls: list[str]
+
+
+def _validate_upload_filename(filename: str) -> str:
+    ext = Path(filename).suffix.lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise SubmissionError("unsupported_format", f"Unsupported format. Allowed: {', '.join(ALLOWED_EXTENSIONS)}")
+    return ext
+
+
+def check_header(header: bytes) -> ContainerInfo:
+    """Reject a submission whose container header already disqualifies it."""
+    info = probe_header(header)
+    code = rejection_code(info)
+    if code:
+        from app.services.failures import get_failure_message
+
+        raise SubmissionError(code, get_failure_message(code))
+    return info
+
+
+def _enqueue_job(job: TranscriptionJob) -> None:
+    _enqueue_jobs([job])
+
+
+def _enqueue_jobs(jobs: list[TranscriptionJob]) -> None:
+    """Hand jobs to the scheduler in one round trip, each in the lane for its (estimated) length."""
+    from app.services import scheduler
+
+    scheduler.submit([(job.id, job.user_id, scheduler.lane_for(job.duration_seconds, job.size_bytes)) for job in jobs])
+
+
+async def _admit(db: AsyncSession, user: User, count: int = 1) -> None:
+    from app.services import admission
+
+    await admission.admit(db, user, count)
 
+
+def _derive_label_from_url(url: str) -> str:
     parsed = urlparse(url)
     path = parsed.path.rstrip("/")
     return os.path.basename(path) if path else parsed.netloc
@@ -39,21 +100,110 @@ def _derive_label_from_url(url: str) -> str:
 async def create_upload_job(file: UploadFile, user: User, db: AsyncSession) -> TranscriptionJob:
     """Handle file upload job creation."""
     filename = file.filename or "unknown"
-    ext = Path(filename).suffix.lower()
+    ext = _validate_upload_filename(filename)
 
-    if ext not in ALLOWED_EXTENSIONS:
-        raise SubmissionError("unsupported_format", f"Unsupported format. Allowed: {', '.join(ALLOWED_EXTENSIONS)}")
+    if file.size is not None and file.size > MAX_UPLOAD_SIZE:
+        raise SubmissionError("file_too_large", "File too large (max 2 GB)")
 
     job_id = uuid.uuid4()
     object_key = f"uploads/{job_id}/{filename}"
 
-    file_data = await file.read()
-    if len(file_data) > MAX_UPLOAD_SIZE:
+    from app.services.storage_minio import ObjectTooLargeError, put_stream
+
+    # Probe the container header before anything is stored
+    await file.seek(0)
+    info = check_header(await file.read(PROBE_BYTES))
+    await _admit(db, user)
+
+    # Stream the spooled upload into MinIO part by part instead of reading it into memory,
+    # hashing it on the way for deduplication.
+    hasher = hashlib.sha256()
+    await file.seek(0)
+    try:
+        size = await run_in_threadpool(
+            put_stream,
+            object_key,
+            file.file,
+            content_type=file.content_type or "application/octet-stream",
+            max_size=MAX_UPLOAD_SIZE,
+            hasher=hasher,
+        )
+    except ObjectTooLargeError as exc:
+        raise SubmissionError("file_too_large", "File too large (max 2 GB)") from exc
+
+    job = TranscriptionJob(
+        id=job_id,
+        user_id=user.id,
+        source_type=JobSourceType.upload,
+        source_label=filename,
+        original_object_key=object_key,
+        size_bytes=size,
+        content_sha256=hasher.hexdigest(),
+        duration_seconds=int(info.duration_seconds) if info.duration_seconds is not None else None,
+        input_format=ext.lstrip("."),
+        status=JobStatus.queued,
+    )
+    db.add(job)
+
+    from app.services.dedup import complete_from_duplicate
+
+    reused = await complete_from_duplicate(db, job)
+    if reused:
+        job.original_object_key = None
+    await db.commit()
+
+    inc("jobs_created")
+    if reused:
+        from app.services.storage_minio import delete_object
+
+        await run_in_threadpool(delete_object, object_key)
+        inc("jobs_deduplicated")
+        logger.info("Created upload job %s for file %s from an identical earlier upload", job_id, filename)
+        return job
+
+    _enqueue_job(job)
+    logger.info("Created upload job %s for file %s", job_id, filename)
+
+    return job
+
+
+def part_size_for(size: int) -> int:
+    """Multipart part size for an upload of ``size`` bytes (stays within the S3 part count limit)."""
+    from app.services.storage_minio import UPLOAD_PART_SIZE
+
+    return max(UPLOAD_PART_SIZE, math.ceil(size / MAX_UPLOAD_PARTS))
+
+
+async def start_pending_upload(
+    filename: str | None,
+    size: int | None,
+    content_type: str | None,
+    user: User,
+    db: AsyncSession,
+) -> TranscriptionJob:
+    """Create a job in ``uploading`` status backed by a fresh MinIO multipart upload."""
+    if not filename:
+        raise SubmissionError("missing_file", "File is required")
+    if not isinstance(filename, str):
+        raise SubmissionError("invalid_filename", "File name must be a string")
+    ext = _validate_upload_filename(filename)
+    # JSON bodies reach here unchecked: a string or a boolean is not a size
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        raise SubmissionError("invalid_size", "File size must be a positive number of bytes")
+    if size > MAX_UPLOAD_SIZE:
         raise SubmissionError("file_too_large", "File too large (max 2 GB)")
+    if content_type is not None and not isinstance(content_type, str):
+        raise SubmissionError("invalid_content_type", "Content type must be a string")
+    # Checked before the upload starts, so nobody uploads 2 GB only to be turned away
+    await _admit(db, user)
 
-    from app.services.storage_minio import put_object
+    from app.services import storage_minio
 
-    put_object(object_key, file_data, content_type=file.content_type or "application/octet-stream")
+    job_id = uuid.uuid4()
+    object_key = f"uploads/{job_id}/{filename}"
+    upload_id = await run_in_threadpool(
+        storage_minio.create_multipart_upload, object_key, content_type or "application/octet-stream"
+    )
 
     job = TranscriptionJob(
         id=job_id,
@@ -61,28 +211,108 @@ async def create_upload_job(file: UploadFile, user: User, db: AsyncSession) -> T
         source_type=JobSourceType.upload,
         source_label=filename,
         original_object_key=object_key,
+        upload_id=upload_id,
+        size_bytes=size,
         input_format=ext.lstrip("."),
-        status=JobStatus.queued,
+        status=JobStatus.uploading,
     )
     db.add(job)
     await db.commit()
+    return job
+
 
-    from worker.tasks import process_transcription_job
+async def get_pending_upload(job_id: uuid.UUID, user: User, db: AsyncSession) -> TranscriptionJob:
+    """Return the user's job awaiting upload, or raise ``upload_not_found``."""
+    result = await db.execute(
+        select(TranscriptionJob).where(TranscriptionJob.id == job_id, TranscriptionJob.user_id == user.id)
+    )
+    job = result.scalar_one_or_none()
+    if job is None or job.status != JobStatus.uploading or not job.original_object_key or not job.upload_id:
+        raise SubmissionError("upload_not_found", "No pending upload for this job")
+    return job
 
-    process_transcription_job.delay(str(job_id))
+
+async def create_direct_upload(
+    filename: str | None,
+    size: int | None,
+    content_type: str | None,
+    user: User,
+    db: AsyncSession,
+) -> DirectUpload:
+    """Create a job awaiting a direct-to-storage upload and presign its multipart parts."""
+    job = await start_pending_upload(filename, size, content_type, user, db)
+    object_key, upload_id, total_size = str(job.original_object_key), str(job.upload_id), job.size_bytes or 0
+
+    from app.services import storage_minio
+
+    part_size = part_size_for(total_size)
+    part_count = math.ceil(total_size / part_size)
+    part_urls = [
+        storage_minio.presign_upload_part(object_key, upload_id, part_number)
+        for part_number in range(1, part_count + 1)
+    ]
+
+    logger.info("Created direct upload job %s for file %s (%d parts)", job.id, job.source_label, part_count)
+    return DirectUpload(job=job, part_size=part_size, part_urls=part_urls)
+
+
+async def complete_direct_upload(
+    job_id: uuid.UUID, user: User, db: AsyncSession, content_sha256: str | None = None
+) -> TranscriptionJob:
+    """Finalize a direct upload: assemble the object, verify it, and queue the job.
+
+    ``content_sha256`` is the deduplication key when the bytes were hashed on the way in
+    (resumable uploads). Presigned uploads never pass through us and are not deduplicated.
+    """
+    job = await get_pending_upload(job_id, user, db)
+
+    from app.services import storage_minio
+
+    object_key, upload_id = str(job.original_object_key), str(job.upload_id)
+    _validate_upload_filename(object_key)
+
+    parts = await run_in_threadpool(storage_minio.list_uploaded_parts, object_key, upload_id)
+    received = sum(part.size or 0 for part in parts)
+    if not parts or received != job.size_bytes:
+        raise SubmissionError("upload_incomplete", "Upload is incomplete. Please upload all parts and retry.")
+
+    await run_in_threadpool(storage_minio.complete_multipart_upload, object_key, upload_id, parts)
+    size = await run_in_threadpool(storage_minio.get_object_size, object_key)
+    try:
+        if size != job.size_bytes or size > MAX_UPLOAD_SIZE:
+            raise SubmissionError("upload_incomplete", "Uploaded file does not match the declared size.")
+        header = await run_in_threadpool(storage_minio.get_object_range, object_key, 0, PROBE_BYTES)
+        info = check_header(header)
+    except SubmissionError:
+        await run_in_threadpool(storage_minio.delete_object, object_key)
+        await db.delete(job)
+        await db.commit()
+        raise
+
+    if info.duration_seconds is not None:
+        job.duration_seconds = int(info.duration_seconds)
+
+    job.upload_id = None
+    job.content_sha256 = content_sha256
+    job.status = JobStatus.queued
+    await db.commit()
+
+    _enqueue_job(job)
 
     inc("jobs_created")
-    logger.info("Created upload job %s for file %s", job_id, filename)
+    logger.info("Completed direct upload for job %s (%d bytes)", job.id, size)
 
     return job
 
 
-async def create_url_job(url: str | None, label: str | None, user: User, db: AsyncSession) -> TranscriptionJob:
-    """Handle URL-based job creation."""
+def _validate_url_submission(url: str | None, label: str | None) -> tuple[str, str]:
+    """Validate a URL submission and return ``(url, label)``."""
     if not url:
         raise SubmissionError("missing_url", "URL is required")
-
-    from urllib.parse import urlparse
+    if not isinstance(url, str):
+        raise SubmissionError("invalid_url", "URL must be a string")
+    if label is not None and not isinstance(label, str):
+        raise SubmissionError("invalid_label", "Label must be a string")
 
     parsed = urlparse(url)
     if parsed.scheme not in ("http", "https"):
@@ -90,6 +320,13 @@ async def create_url_job(url: str | None, label: str | None, user: User, db: Asy
 
     if not label:
         label = _derive_label_from_url(url)
+    return url, label
+
+
+async def create_url_job(url: str | None, label: str | None, user: User, db: AsyncSession) -> TranscriptionJob:
+    """Handle URL-based job creation."""
+    url, label = _validate_url_submission(url, label)
+    await _admit(db, user)
 
     job_id = uuid.uuid4()
     job = TranscriptionJob(
@@ -103,11 +340,86 @@ async def create_url_job(url: str | None, label: str | None, user: User, db: Asy
     db.add(job)
     await db.commit()
 
-    from worker.tasks import process_transcription_job
-
-    process_transcription_job.delay(str(job_id))
+    _enqueue_job(job)
 
     inc("jobs_created")
-    logger.info("Created URL job %s for %s", job_id, parsed.netloc)
+    logger.info("Created URL job %s for %s", job_id, urlparse(url).netloc)
+
+    return job
+
+
+async def create_url_jobs_batch(items: list | None, user: User, db: AsyncSession) -> list[dict[str, Any]]:
+    """Create many URL jobs at once: one validation pass, one INSERT, one scheduler round trip.
+
+    Returns one result per input item, in order: ``{"index", "job"}`` for created jobs
+    or ``{"index", "error": {"code", "message"}}`` for rejected ones.
+    """
+    if not isinstance(items, list) or not items:
+        raise SubmissionError("invalid_batch", "Provide a non-empty list of jobs")
+    if len(items) > MAX_BATCH_SIZE:
+        raise SubmissionError("batch_too_large", f"At most {MAX_BATCH_SIZE} jobs per batch")
+
+    results: list[dict[str, Any]] = []
+    rows: list[dict[str, Any]] = []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise SubmissionError("invalid_item", "Each job must be an object with a url")
+            url, label = _validate_url_submission(item.get("url"), item.get("label"))
+        except SubmissionError as exc:
+            results.append({"index": index, "error": {"code": exc.code, "message": exc.detail}})
+            continue
+        rows.append(
+            {
+                "id": uuid.uuid4(),
+                "user_id": user.id,
+                "source_type": JobSourceType.url,
+                "source_label": label,
+                "source_url": url,
+                "status": JobStatus.queued,
+            }
+        )
+        results.append({"index": index, "job_id": rows[-1]["id"]})
+
+    jobs: dict[uuid.UUID, TranscriptionJob] = {}
+    if rows:
+        await _admit(db, user, len(rows))
+        created = await db.scalars(insert(TranscriptionJob).returning(TranscriptionJob), rows)
+        jobs = {job.id: job for job in created}
+        await db.commit()
+        _enqueue_jobs(list(jobs.values()))
+
+        inc("jobs_created", len(jobs))
+        logger.info("Created %d URL jobs in batch (%d rejected)", len(jobs), len(items) - len(jobs))
+
+    for result in results:
+        job_id = result.pop("job_id", None)
+        if job_id is not None:
+            result["job"] = jobs[job_id]
+    return results
+
+
+async def retry_job(job_id: uuid.UUID, user: User, db: AsyncSession) -> TranscriptionJob:
+    """Re-queue a failed job. The worker resumes after the last pipeline stage that finished."""
+    result = await db.execute(
+        select(TranscriptionJob).where(TranscriptionJob.id == job_id, TranscriptionJob.user_id == user.id)
+    )
+    job = result.scalar_one_or_none()
+    if job is None:
+        raise SubmissionError("job_not_found", "Job not found")
+    if job.status != JobStatus.failed:
+        raise SubmissionError("not_retryable", "Only failed jobs can be retried")
+    if job.failure_code in NON_RETRYABLE_FAILURES:
+        raise SubmissionError("not_retryable", job.failure_message or "This job cannot be retried")
+
+    job.status = JobStatus.queued
+    job.failure_code = None
+    job.failure_message = None
+    job.completed_at = None
+    job.attempt_count = 0
+    await db.commit()
 
+    _enqueue_job(job)
+    inc("jobs_retried")
+    logger.info("Retrying job %s after stage %s", job.id, job.pipeline_stage or "none")
     return job
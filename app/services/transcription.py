@@ -1,9 +1,18 @@
-"""Transcription orchestration — persist segments and derive confidence."""
+"""Transcription orchestration — persist segments and derive confidence.
 
+Segments are written in bulk: one executemany INSERT, which SQLAlchemy batches into
+multi-row VALUES statements, or PostgreSQL ``COPY`` for long transcripts on the sync
+worker connection. Nothing builds an ORM object per segment.
+"""
+
+import csv
+import io
 import uuid
 from datetime import UTC, datetime
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from app.db.models import JobStatus, TranscriptionJob, TranscriptSegment
 from app.logging import get_logger
@@ -11,6 +20,62 @@ from app.services.openai_whisper import WhisperSegment
 
 logger = get_logger(__name__)
 
+SEGMENT_COLUMNS = ("job_id", "segment_index", "start_ms", "end_ms", "text", "avg_logprob", "confidence", "created_at")
+# Below this many rows a batched INSERT is as fast as COPY and works on every driver
+COPY_MIN_ROWS = 2000
+
+
+def segment_rows(job_id: uuid.UUID, whisper_segments: list[WhisperSegment]) -> list[dict]:
+    """Column values for each segment, ready for an executemany INSERT."""
+    now = datetime.now(UTC)
+    return [
+        {
+            "job_id": job_id,
+            "segment_index": ws.segment_index,
+            "start_ms": ws.start_ms,
+            "end_ms": ws.end_ms,
+            "text": ws.text,
+            "avg_logprob": ws.avg_logprob,
+            "confidence": ws.confidence,
+            "created_at": now,
+        }
+        for ws in whisper_segments
+    ]
+
+
+def copy_buffer(rows: list[dict]) -> io.StringIO:
+    """Encode rows as CSV for ``COPY ... FROM STDIN``; None becomes an unquoted empty field (NULL)."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in SEGMENT_COLUMNS])
+    buf.seek(0)
+    return buf
+
+
+def write_segments(db: Session, job_id: uuid.UUID, whisper_segments: list[WhisperSegment]) -> None:
+    """Insert segments in the session's current transaction (sync worker path)."""
+    if not whisper_segments:
+        return
+    rows = segment_rows(job_id, whisper_segments)
+    if len(rows) >= COPY_MIN_ROWS and db.get_bind().dialect.driver == "psycopg2":
+        _copy_segments(db, rows)
+    else:
+        db.execute(insert(TranscriptSegment), rows)
+
+
+def _copy_segments(db: Session, rows: list[dict]) -> None:
+    # FORCE_NOT_NULL keeps an empty transcript line an empty string rather than NULL
+    sql = (
+        f"COPY {TranscriptSegment.__tablename__} ({', '.join(SEGMENT_COLUMNS)}) "
+        "FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (text))"
+    )
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(sql, copy_buffer(rows))
+    finally:
+        cursor.close()
+
 
 async def persist_segments(
     db: AsyncSession,
@@ -18,17 +83,8 @@ async def persist_segments(
     whisper_segments: list[WhisperSegment],
 ) -> None:
     """Save Whisper segments to DB and update job status to completed."""
-    for ws in whisper_segments:
-        segment = TranscriptSegment(
-            job_id=job.id,
-            segment_index=ws.segment_index,
-            start_ms=ws.start_ms,
-            end_ms=ws.end_ms,
-            text=ws.text,
-            avg_logprob=ws.avg_logprob,
-            confidence=ws.confidence,
-        )
-        db.add(segment)
+    if whisper_segments:
+        await db.execute(insert(TranscriptSegment), segment_rows(job.id, whisper_segments))
 
     job.status = JobStatus.completed
     job.completed_at = datetime.now(UTC)
@@ -0,0 +1,135 @@
+"""Cluster-wide limits on Whisper requests, shared through Redis.
+
+Every worker process takes a slot before calling the transcription API. A slot needs
+both room under ``TRANSCRIBE_GLOBAL_CONCURRENCY`` (a sorted set of holders, each with a
+lease so a crashed worker cannot leak its slot) and a token from a bucket refilled at
+``TRANSCRIBE_REQUESTS_PER_MINUTE``. Both checks and the grant happen in one Lua script,
+timed by the Redis clock so hosts with skewed clocks agree. Callers that cannot get a
+slot wait and poll instead of sending a request the provider would reject with a 429.
+"""
+
+import random
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import redis
+from redis.commands.core import Script
+
+from app.config import settings
+from app.logging import get_logger
+from app.metrics import inc, observe
+
+logger = get_logger(__name__)
+
+HOLDERS_KEY = "transcribe-limit:holders"
+BUCKET_KEY = "transcribe-limit:bucket"
+# How often a waiter re-checks for a free concurrency slot
+BUSY_POLL_MS = 250
+
+# Returns 0 when the slot was granted, otherwise how many ms to wait before asking again
+_ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local max_concurrent = tonumber(ARGV[2])
+local lease_ms = tonumber(ARGV[3])
+local per_minute = tonumber(ARGV[4])
+local busy_poll_ms = tonumber(ARGV[5])
+
+if max_concurrent > 0 then
+  redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+  if redis.call('ZCARD', KEYS[1]) >= max_concurrent then
+    return busy_poll_ms
+  end
+end
+
+if per_minute > 0 then
+  local tokens = tonumber(redis.call('HGET', KEYS[2], 'tokens') or per_minute)
+  local updated = tonumber(redis.call('HGET', KEYS[2], 'updated') or now)
+  tokens = math.min(per_minute, tokens + (now - updated) * per_minute / 60000)
+  if tokens < 1 then
+    redis.call('HSET', KEYS[2], 'tokens', tostring(tokens), 'updated', now)
+    return math.ceil((1 - tokens) * 60000 / per_minute)
+  end
+  redis.call('HSET', KEYS[2], 'tokens', tostring(tokens - 1), 'updated', now)
+  redis.call('PEXPIRE', KEYS[2], 120000)
+end
+
+if max_concurrent > 0 then
+  redis.call('ZADD', KEYS[1], now + lease_ms, ARGV[1])
+  redis.call('PEXPIRE', KEYS[1], lease_ms)
+end
+return 0
+"""
+
+_redis: redis.Redis | None = None
+_acquire_script: Script | None = None
+
+
+class TranscriptionQueueTimeoutError(TimeoutError):
+    """No transcription slot became free within TRANSCRIBE_QUEUE_TIMEOUT_SECONDS."""
+
+
+def _client() -> tuple[redis.Redis, Script]:
+    # redis-py pools reconnect after a fork, so one client per process is safe under prefork
+    global _redis, _acquire_script
+    if _redis is None or _acquire_script is None:
+        _redis = redis.Redis.from_url(settings.REDIS_URL)
+        _acquire_script = _redis.register_script(_ACQUIRE_LUA)
+    return _redis, _acquire_script
+
+
+def limits_enabled() -> bool:
+    return settings.TRANSCRIBE_GLOBAL_CONCURRENCY > 0 or settings.TRANSCRIBE_REQUESTS_PER_MINUTE > 0
+
+
+def try_acquire(holder: str) -> int:
+    """Ask once for a slot. Returns 0 when granted, else the ms to wait before retrying."""
+    _, script = _client()
+    result = script(
+        keys=[HOLDERS_KEY, BUCKET_KEY],
+        args=[
+            holder,
+            settings.TRANSCRIBE_GLOBAL_CONCURRENCY,
+            settings.TRANSCRIBE_SLOT_LEASE_SECONDS * 1000,
+            settings.TRANSCRIBE_REQUESTS_PER_MINUTE,
+            BUSY_POLL_MS,
+        ],
+    )
+    return int(result)
+
+
+def release(holder: str) -> None:
+    client, _ = _client()
+    client.zrem(HOLDERS_KEY, holder)
+
+
+@contextmanager
+def transcription_slot() -> Iterator[None]:
+    """Hold one cluster-wide transcription slot for the duration of the block, waiting for it if needed."""
+    if not limits_enabled():
+        yield
+        return
+
+    holder = uuid.uuid4().hex
+    started = time.monotonic()
+    deadline = started + settings.TRANSCRIBE_QUEUE_TIMEOUT_SECONDS
+    while (wait_ms := try_acquire(holder)) > 0:
+        if time.monotonic() + wait_ms / 1000 > deadline:
+            inc("transcription_queue_timeouts")
+            raise TranscriptionQueueTimeoutError("Timed out waiting for a transcription slot")
+        # Jitter keeps waiters from polling in lockstep
+        time.sleep(wait_ms / 1000 * (1 + random.random() / 5))  # noqa: S311
+    waited = time.monotonic() - started
+    if waited > 0.05:
+        logger.info("Waited %.1fs for a transcription slot", waited)
+    observe("transcription_slot_wait", waited)
+
+    try:
+        yield
+    finally:
+        try:
+            release(holder)
+        except redis.RedisError:
+            logger.warning("Failed to release transcription slot %s; its lease will expire", holder)
@@ -0,0 +1 @@
+"""Ad-hoc performance benchmarks; run against a real database, not part of the test suite."""
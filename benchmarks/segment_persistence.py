@@ -0,0 +1,105 @@
+"""Benchmark: rows per second when persisting transcript segments.
+
+Compares one ORM object per segment (the old path), a batched executemany INSERT,
+and PostgreSQL COPY, for 1k, 10k and 100k segments. Each run happens in a
+transaction that is rolled back, so the database is left as it was.
+
+    python -m benchmarks.segment_persistence [--url postgresql+psycopg2://...] [--sizes 1000 10000]
+
+Needs a migrated PostgreSQL database; defaults to DATABASE_URL (switched to psycopg2).
+COPY is skipped on other drivers.
+"""
+
+import argparse
+import time
+import uuid
+from collections.abc import Callable
+
+from app.config import settings
+from app.db.models import JobSourceType, JobStatus, TranscriptionJob, TranscriptSegment, User
+from app.services import transcription
+from app.services.openai_whisper import WhisperSegment
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+
+def _segments(count: int) -> list[WhisperSegment]:
+    return [
+        WhisperSegment(
+            segment_index=i,
+            start_ms=i * 1000,
+            end_ms=i * 1000 + 900,
+            text=f'segment {i}, with a comma and "quotes"',
+            avg_logprob=-0.25,
+            confidence=0.78,
+        )
+        for i in range(count)
+    ]
+
+
+def _orm(db: Session, job_id: uuid.UUID, segments: list[WhisperSegment]) -> None:
+    for ws in segments:
+        db.add(
+            TranscriptSegment(
+                job_id=job_id,
+                segment_index=ws.segment_index,
+                start_ms=ws.start_ms,
+                end_ms=ws.end_ms,
+                text=ws.text,
+                avg_logprob=ws.avg_logprob,
+                confidence=ws.confidence,
+            )
+        )
+    db.flush()
+
+
+def _executemany(db: Session, job_id: uuid.UUID, segments: list[WhisperSegment]) -> None:
+    db.execute(insert(TranscriptSegment), transcription.segment_rows(job_id, segments))
+
+
+def _copy(db: Session, job_id: uuid.UUID, segments: list[WhisperSegment]) -> None:
+    transcription._copy_segments(db, transcription.segment_rows(job_id, segments))
+
+
+def _run(factory: sessionmaker, writer: Callable, segments: list[WhisperSegment]) -> float:
+    with factory() as db:
+        user = User(id=uuid.uuid4(), logto_sub=f"bench-{uuid.uuid4()}")
+        job = TranscriptionJob(
+            id=uuid.uuid4(),
+            user_id=user.id,
+            source_type=JobSourceType.upload,
+            source_label="bench.mp4",
+            status=JobStatus.processing,
+        )
+        db.add_all([user, job])
+        db.flush()
+        started = time.perf_counter()
+        writer(db, job.id, segments)
+        db.flush()
+        elapsed = time.perf_counter() - started
+        db.rollback()
+    return len(segments) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=settings.DATABASE_URL.replace("+asyncpg", "+psycopg2"))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    factory = sessionmaker(bind=engine)
+
+    writers: dict[str, Callable] = {"orm": _orm, "executemany": _executemany}
+    if engine.dialect.driver == "psycopg2":
+        writers["copy"] = _copy
+
+    print(f"{'rows':>8}  " + "  ".join(f"{name:>14}" for name in writers))
+    for size in args.sizes:
+        segments = _segments(size)
+        rates = [_run(factory, writer, segments) for writer in writers.values()]
+        print(f"{size:>8}  " + "  ".join(f"{rate:>10,.0f} r/s" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Direct-to-storage uploads: uploading status, multipart upload id and source size.
+
+Revision ID: 002_direct_uploads
+Revises: 001_init
+Create Date: 2026-10-17
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "002_direct_uploads"
+down_revision: str | None = "001_init"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE jobstatus ADD VALUE IF NOT EXISTS 'uploading' BEFORE 'queued'")
+    op.add_column("transcription_jobs", sa.Column("upload_id", sa.String(1024), nullable=True))
+    op.add_column("transcription_jobs", sa.Column("size_bytes", sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("transcription_jobs", "size_bytes")
+    op.drop_column("transcription_jobs", "upload_id")
+    # Postgres cannot drop enum values; retire pending uploads so the old code never sees them.
+    op.execute("DELETE FROM transcription_jobs WHERE status = 'uploading'")
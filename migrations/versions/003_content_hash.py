@@ -0,0 +1,31 @@
+"""Content hash on transcription jobs for deduplication.
+
+Revision ID: 003_content_hash
+Revises: 002_direct_uploads
+Create Date: 2026-10-17
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "003_content_hash"
+down_revision: str | None = "002_direct_uploads"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("transcription_jobs", sa.Column("content_sha256", sa.String(64), nullable=True))
+    op.create_index(
+        "ix_transcription_jobs_content_sha256_status",
+        "transcription_jobs",
+        ["content_sha256", "status"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transcription_jobs_content_sha256_status", table_name="transcription_jobs")
+    op.drop_column("transcription_jobs", "content_sha256")
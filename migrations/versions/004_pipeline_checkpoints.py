@@ -0,0 +1,32 @@
+"""Pipeline stage checkpoints and retry attempts on transcription jobs.
+
+Revision ID: 004_pipeline_checkpoints
+Revises: 003_content_hash
+Create Date: 2026-10-17
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "004_pipeline_checkpoints"
+down_revision: str | None = "003_content_hash"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("transcription_jobs", sa.Column("pipeline_stage", sa.String(32), nullable=True))
+    op.add_column("transcription_jobs", sa.Column("pipeline_context", sa.JSON(), nullable=True))
+    op.add_column(
+        "transcription_jobs",
+        sa.Column("attempt_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("transcription_jobs", "attempt_count")
+    op.drop_column("transcription_jobs", "pipeline_context")
+    op.drop_column("transcription_jobs", "pipeline_stage")
@@ -0,0 +1,25 @@
+"""Record how each job's audio was produced (stream copy, remux or encode).
+
+Revision ID: 005_transcode_path
+Revises: 004_pipeline_checkpoints
+Create Date: 2026-10-17
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "005_transcode_path"
+down_revision: str | None = "004_pipeline_checkpoints"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("transcription_jobs", sa.Column("transcode_path", sa.String(16), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("transcription_jobs", "transcode_path")
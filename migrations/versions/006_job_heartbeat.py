@@ -0,0 +1,34 @@
+"""Heartbeat timestamp on processing jobs, so the reaper can find ones whose worker died.
+
+Revision ID: 006_job_heartbeat
+Revises: 005_transcode_path
+Create Date: 2026-10-17
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "006_job_heartbeat"
+down_revision: str | None = "005_transcode_path"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("transcription_jobs", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+    # Jobs already running get a heartbeat as of now, so the first sweep does not reap them
+    op.execute("UPDATE transcription_jobs SET heartbeat_at = now() WHERE status = 'processing'")
+    op.create_index(
+        "ix_transcription_jobs_processing_heartbeat",
+        "transcription_jobs",
+        ["heartbeat_at"],
+        postgresql_where=sa.text("status = 'processing'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transcription_jobs_processing_heartbeat", table_name="transcription_jobs")
+    op.drop_column("transcription_jobs", "heartbeat_at")
@@ -0,0 +1,27 @@
+"""When a job's next stage was queued, so the reaper leaves jobs waiting between stages alone.
+
+Revision ID: 007_stage_dispatched
+Revises: 006_job_heartbeat
+Create Date: 2026-10-17
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "007_stage_dispatched"
+down_revision: str | None = "006_job_heartbeat"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("transcription_jobs", sa.Column("dispatched_at", sa.DateTime(timezone=True), nullable=True))
+    # Processing jobs may have a stage message waiting right now; a running stage clears this
+    op.execute("UPDATE transcription_jobs SET dispatched_at = now() WHERE status = 'processing'")
+
+
+def downgrade() -> None:
+    op.drop_column("transcription_jobs", "dispatched_at")
@@ -0,0 +1,25 @@
+"""Claim token per pipeline run, so stage messages left over from an earlier run are dropped.
+
+Revision ID: 008_claim_token
+Revises: 007_stage_dispatched
+Create Date: 2026-10-17
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "008_claim_token"
+down_revision: str | None = "007_stage_dispatched"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("transcription_jobs", sa.Column("claim_token", sa.Uuid(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("transcription_jobs", "claim_token")
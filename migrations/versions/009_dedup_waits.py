@@ -0,0 +1,25 @@
+"""Count of waits on an in-flight duplicate, kept on the job instead of in the Celery message.
+
+Revision ID: 009_dedup_waits
+Revises: 008_claim_token
+Create Date: 2026-10-17
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "009_dedup_waits"
+down_revision: str | None = "008_claim_token"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("transcription_jobs", sa.Column("dedup_waits", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("transcription_jobs", "dedup_waits")
@@ -0,0 +1,94 @@
+"""Test: submissions past the queue or per-user limits are refused with a computed Retry-After."""
+
+from types import SimpleNamespace
+
+import pytest
+import redis
+from app.services import admission, scheduler
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def cluster(monkeypatch):
+    state = SimpleNamespace(backlog=scheduler.Backlog(waiting=0, waiting_users=0, in_flight=0), rate=0.5, active=0)
+
+    async def active_jobs(db, user):
+        return state.active
+
+    def backlog():
+        if isinstance(state.backlog, Exception):
+            raise state.backlog
+        return state.backlog
+
+    monkeypatch.setattr(admission, "active_jobs", active_jobs)
+    monkeypatch.setattr(scheduler, "backlog", backlog)
+    monkeypatch.setattr(scheduler, "throughput", lambda: state.rate)
+    monkeypatch.setattr(admission.settings, "ADMISSION_MAX_WAITING", 100)
+    monkeypatch.setattr(admission.settings, "ADMISSION_MAX_ACTIVE_PER_USER", 10)
+    monkeypatch.setattr(admission.settings, "ADMISSION_RETRY_AFTER_MIN_SECONDS", 10)
+    monkeypatch.setattr(admission.settings, "ADMISSION_RETRY_AFTER_MAX_SECONDS", 900)
+    return state
+
+
+def test_retry_after_is_drain_time_within_bounds(cluster):
+    assert admission.retry_after_seconds(30, 0.5) == 60
+    assert admission.retry_after_seconds(1, 0.5) == 10
+    assert admission.retry_after_seconds(10_000, 0.5) == 900
+    assert admission.retry_after_seconds(5, 0.0) == 900  # nothing finished lately
+
+
+@pytest.mark.anyio
+async def test_jobs_under_the_limits_are_admitted(cluster):
+    cluster.backlog = scheduler.Backlog(waiting=90, waiting_users=3, in_flight=32)
+    cluster.active = 5
+
+    await admission.admit(None, SimpleNamespace(id=1), count=5)
+
+
+@pytest.mark.anyio
+async def test_full_queue_is_refused_until_the_excess_drains(cluster):
+    cluster.backlog = scheduler.Backlog(waiting=120, waiting_users=3, in_flight=32)
+
+    with pytest.raises(admission.AdmissionRejectedError) as exc:
+        await admission.admit(None, SimpleNamespace(id=1))
+
+    assert exc.value.code == "over_capacity"
+    assert exc.value.retry_after == 42  # 21 jobs over the limit at 0.5 jobs/s
+
+
+@pytest.mark.anyio
+async def test_user_over_limit_waits_for_their_round_robin_share(cluster):
+    cluster.backlog = scheduler.Backlog(waiting=50, waiting_users=4, in_flight=32)
+    cluster.active = 12
+
+    with pytest.raises(admission.AdmissionRejectedError) as exc:
+        await admission.admit(None, SimpleNamespace(id=1), count=3)
+
+    assert exc.value.code == "too_many_jobs"
+    assert exc.value.retry_after == 40  # 5 jobs at a quarter of 0.5 jobs/s
+
+
+@pytest.mark.anyio
+async def test_scheduler_outage_leaves_only_the_user_limit(cluster):
+    cluster.backlog = redis.ConnectionError("down")
+
+    await admission.admit(None, SimpleNamespace(id=1))
+
+    cluster.active = 10
+    with pytest.raises(admission.AdmissionRejectedError) as exc:
+        await admission.admit(None, SimpleNamespace(id=1))
+    assert exc.value.retry_after == 900
+
+
+def test_refusal_maps_to_429_with_retry_after():
+    from app.api.jobs import _submission_error
+
+    error = _submission_error(admission.AdmissionRejectedError("over_capacity", "full", 42))
+
+    assert error.status_code == 429
+    assert error.headers == {"Retry-After": "42"}
+    assert _submission_error(admission.SubmissionError("invalid_url", "bad")).status_code == 400
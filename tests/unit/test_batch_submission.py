@@ -0,0 +1,81 @@
+"""Test: batch URL submission validates per item and inserts/enqueues once."""
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from app.services import submission_service
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeDb:
+    def __init__(self):
+        self.statements: list[tuple] = []
+        self.commits = 0
+
+    async def scalars(self, stmt, rows):
+        self.statements.append((stmt, rows))
+        return [SimpleNamespace(**row) for row in rows]
+
+    async def commit(self):
+        self.commits += 1
+
+
+async def _admit_all(db, user, count=1):
+    pass
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    calls: list[list] = []
+    monkeypatch.setattr(submission_service, "_enqueue_jobs", lambda jobs: calls.append(jobs))
+    monkeypatch.setattr(submission_service, "_admit", _admit_all)
+    return calls
+
+
+@pytest.mark.anyio
+async def test_batch_inserts_valid_items_once_and_reports_rejections(enqueued):
+    db = FakeDb()
+    items = [
+        {"url": "https://cdn.example.com/a.mp4", "label": "A"},
+        {"url": "ftp://cdn.example.com/b.mp4"},
+        {"url": "https://cdn.example.com/c.mp4"},
+        "not-an-object",
+        {"url": ["https://cdn.example.com/d.mp4"]},
+    ]
+
+    results = await submission_service.create_url_jobs_batch(items, SimpleNamespace(id=uuid.uuid4()), db)
+
+    assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+    assert results[0]["job"].source_label == "A"
+    assert results[1]["error"]["code"] == "invalid_url"
+    assert results[2]["job"].source_label == "c.mp4"
+    assert results[3]["error"]["code"] == "invalid_item"
+    assert results[4]["error"]["code"] == "invalid_url"
+    assert len(db.statements) == 1
+    assert len(db.statements[0][1]) == 2
+    assert db.commits == 1
+    assert enqueued == [[results[0]["job"], results[2]["job"]]]
+
+
+@pytest.mark.anyio
+async def test_batch_with_only_invalid_items_touches_nothing(enqueued):
+    db = FakeDb()
+
+    results = await submission_service.create_url_jobs_batch([{"url": None}], SimpleNamespace(id=uuid.uuid4()), db)
+
+    assert results[0]["error"]["code"] == "missing_url"
+    assert db.statements == []
+    assert enqueued == []
+
+
+@pytest.mark.anyio
+async def test_batch_size_is_capped(enqueued):
+    items = [{"url": "https://cdn.example.com/a.mp4"}] * (submission_service.MAX_BATCH_SIZE + 1)
+
+    with pytest.raises(submission_service.SubmissionError):
+        await submission_service.create_url_jobs_batch(items, SimpleNamespace(id=uuid.uuid4()), FakeDb())
@@ -0,0 +1,83 @@
+"""Test: silence-aware chunk planning and stitching of per-chunk transcripts."""
+
+from app.services.openai_whisper import AudioChunk, WhisperSegment, merge_chunk_segments, transcribe_chunks
+from worker.media.chunking import plan_chunks
+
+
+def _seg(start_ms: int, end_ms: int, text: str) -> WhisperSegment:
+    return WhisperSegment(
+        segment_index=0, start_ms=start_ms, end_ms=end_ms, text=text, avg_logprob=None, confidence=None
+    )
+
+
+class TestPlanChunks:
+    def test_short_audio_is_one_chunk(self):
+        assert plan_chunks(300, [], chunk_seconds=600) == [(0.0, 300, 0.0)]
+
+    def test_cuts_at_latest_silence_in_window(self):
+        plan = plan_chunks(1500, [(200, 202), (550, 552), (1000, 1004)], chunk_seconds=600)
+
+        assert plan == [(0.0, 551.0, 0.0), (551.0, 1002.0, 551.0), (1002.0, 1500, 1002.0)]
+
+    def test_silence_too_early_is_ignored(self):
+        plan = plan_chunks(1000, [(100, 102)], chunk_seconds=600)
+
+        assert plan[0][1] == 600
+
+    def test_hard_cut_overlaps_next_chunk(self):
+        plan = plan_chunks(1000, [], chunk_seconds=600, overlap_s=2.0)
+
+        assert plan == [(0.0, 600.0, 0.0), (600.0, 1000, 598.0)]
+
+    def test_chunks_never_exceed_limit(self):
+        plan = plan_chunks(7200, [(t, t + 1) for t in range(0, 7200, 37)], chunk_seconds=600)
+
+        assert all(end - read_start <= 602 for _, end, read_start in plan)
+        assert plan[-1][1] == 7200
+
+
+class TestMerge:
+    def test_offsets_and_reindexes(self):
+        chunks = [
+            AudioChunk(path="a", start_ms=0, end_ms=10_000, read_start_ms=0),
+            AudioChunk(path="b", start_ms=10_000, end_ms=20_000, read_start_ms=10_000),
+        ]
+        results = [[_seg(0, 4000, "one"), _seg(4000, 9000, "two")], [_seg(0, 5000, "three")]]
+
+        merged = merge_chunk_segments(chunks, results)
+
+        assert [s.text for s in merged] == ["one", "two", "three"]
+        assert [s.segment_index for s in merged] == [0, 1, 2]
+        assert (merged[2].start_ms, merged[2].end_ms) == (10_000, 15_000)
+
+    def test_overlap_is_transcribed_once(self):
+        chunks = [
+            AudioChunk(path="a", start_ms=0, end_ms=10_000, read_start_ms=0),
+            AudioChunk(path="b", start_ms=10_000, end_ms=20_000, read_start_ms=8_000),
+        ]
+        # "two" appears in both chunks; the second copy is centred in the lead-in overlap
+        results = [[_seg(0, 7000, "one"), _seg(7000, 9800, "two")], [_seg(0, 1800, "two"), _seg(1800, 6000, "three")]]
+
+        merged = merge_chunk_segments(chunks, results)
+
+        assert [s.text for s in merged] == ["one", "two", "three"]
+        assert merged[2].start_ms == 9_800
+
+    def test_last_chunk_keeps_tail_past_rounded_duration(self):
+        chunks = [AudioChunk(path="a", start_ms=0, end_ms=5_000, read_start_ms=0)]
+
+        assert len(merge_chunk_segments(chunks, [[_seg(4800, 5600, "end")]])) == 1
+
+
+def test_transcribe_chunks_runs_every_chunk(monkeypatch):
+    from app.services import openai_whisper
+
+    monkeypatch.setattr(openai_whisper, "transcribe_audio", lambda path: [_seg(0, 1000, path)])
+    chunks = [
+        AudioChunk(path=f"c{i}", start_ms=i * 5000, end_ms=(i + 1) * 5000, read_start_ms=i * 5000) for i in range(5)
+    ]
+
+    merged = transcribe_chunks(chunks, max_workers=3)
+
+    assert [s.text for s in merged] == ["c0", "c1", "c2", "c3", "c4"]
+    assert [s.start_ms for s in merged] == [0, 5000, 10000, 15000, 20000]
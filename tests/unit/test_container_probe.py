@@ -0,0 +1,96 @@
+"""Test: container header probe for MP4/MOV/MKV."""
+
+import struct
+
+from app.config import settings
+from app.services.container_probe import probe_header, probe_moov, rejection_code
+
+TOO_LONG_S = settings.MAX_DURATION_SECONDS + 60
+
+
+def _box(box_type: bytes, payload: bytes = b"") -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + box_type + payload
+
+
+def _moov(duration_s: int, handler: bytes = b"soun") -> bytes:
+    # mvhd v0: version/flags, creation, modification, timescale, duration
+    mvhd = _box(b"mvhd", struct.pack(">IIIII", 0, 0, 0, 1000, duration_s * 1000) + b"\x00" * 80)
+    hdlr = _box(b"hdlr", struct.pack(">II4s", 0, 0, handler) + b"\x00" * 12)
+    trak = _box(b"trak", _box(b"mdia", hdlr))
+    return _box(b"moov", mvhd + trak)
+
+
+def _ftyp(brand: bytes = b"isom") -> bytes:
+    return _box(b"ftyp", brand + b"\x00\x00\x00\x00")
+
+
+def _element(element_id: bytes, payload: bytes) -> bytes:
+    return element_id + bytes([0x80 | len(payload)]) + payload
+
+
+def _mkv(duration_ms: float, track_type: int = 2) -> bytes:
+    ebml = _element(b"\x1a\x45\xdf\xa3", _element(b"\x42\x82", b"matroska"))
+    info = _element(
+        b"\x15\x49\xa9\x66",
+        _element(b"\x2a\xd7\xb1", (1_000_000).to_bytes(3, "big"))
+        + _element(b"\x44\x89", struct.pack(">d", duration_ms)),
+    )
+    tracks = _element(b"\x16\x54\xae\x6b", _element(b"\xae", _element(b"\x83", bytes([track_type]))))
+    segment = b"\x18\x53\x80\x67" + b"\x01\xff\xff\xff\xff\xff\xff\xff" + info + tracks
+    return ebml + segment
+
+
+class TestMp4:
+    def test_front_loaded_moov_gives_duration_and_audio(self):
+        info = probe_header(_ftyp() + _moov(120) + _box(b"mdat", b"\x00" * 32))
+
+        assert info.container == "mp4"
+        assert info.duration_seconds == 120
+        assert info.has_audio is True
+        assert info.streamable is True
+        assert rejection_code(info) is None
+
+    def test_quicktime_brand_is_mov(self):
+        assert probe_header(_ftyp(b"qt  ") + _moov(10)).container == "mov"
+
+    def test_video_only_is_rejected(self):
+        info = probe_header(_ftyp() + _moov(10, handler=b"vide"))
+
+        assert info.has_audio is False
+        assert rejection_code(info) == "no_audio_track"
+
+    def test_moov_after_mdat_points_at_tail(self):
+        mdat = struct.pack(">I", 8 + 10_000) + b"mdat" + b"\x00" * 100  # only the start of mdat was read
+        head = _ftyp() + mdat
+        info = probe_header(head)
+
+        assert info.duration_seconds is None
+        assert info.streamable is False
+        assert info.moov_offset == len(_ftyp()) + 8 + 10_000
+        assert rejection_code(info) is None
+
+        probe_moov(_moov(TOO_LONG_S), info)
+        assert rejection_code(info) == "duration_exceeded"
+
+
+class TestMkv:
+    def test_header_gives_duration_and_audio(self):
+        info = probe_header(_mkv(90_000.0))
+
+        assert info.container == "mkv"
+        assert info.duration_seconds == 90
+        assert info.has_audio is True
+        assert rejection_code(info) is None
+
+    def test_too_long_is_rejected(self):
+        assert rejection_code(probe_header(_mkv(TOO_LONG_S * 1000.0))) == "duration_exceeded"
+
+    def test_video_only_is_rejected(self):
+        assert rejection_code(probe_header(_mkv(1000.0, track_type=1))) == "no_audio_track"
+
+
+def test_unknown_bytes_are_not_a_container():
+    info = probe_header(b"<html><body>not a video</body></html>")
+
+    assert info.container is None
+    assert rejection_code(info) == "unsupported_format"
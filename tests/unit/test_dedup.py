@@ -0,0 +1,99 @@
+"""Test: content-hash deduplication statements."""
+
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from app.db.models import Base, JobSourceType, JobStatus, TranscriptionJob, User
+from app.services.dedup import clone_segments_stmt, completed_duplicate_stmt, in_flight_leader_stmt
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+HASH = "a" * 64
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _job(db, user, status, created_at, content_sha256=HASH):
+    job = TranscriptionJob(
+        id=uuid.uuid4(),
+        user_id=user.id,
+        source_type=JobSourceType.url,
+        source_label="clip.mp4",
+        status=status,
+        content_sha256=content_sha256,
+        created_at=created_at,
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+@pytest.fixture
+def user(db):
+    user = User(id=uuid.uuid4(), logto_sub="sub")
+    db.add(user)
+    db.flush()
+    return user
+
+
+def test_clone_segments_is_a_single_insert_from_select():
+    source_id, target_id = uuid.uuid4(), uuid.uuid4()
+
+    compiled = clone_segments_stmt(source_id, target_id).compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+
+    assert sql.startswith("INSERT INTO transcript_segments (job_id, segment_index")
+    assert "SELECT" in sql
+    assert "WHERE transcript_segments.job_id" in sql
+    assert target_id in compiled.params.values()
+    assert source_id in compiled.params.values()
+
+
+def test_completed_duplicate_ignores_other_hashes_and_self(db, user):
+    now = datetime.now(UTC)
+    job = _job(db, user, JobStatus.processing, now)
+    _job(db, user, JobStatus.completed, now, content_sha256="b" * 64)
+    assert db.execute(completed_duplicate_stmt(HASH, job.id)).scalar_one_or_none() is None
+
+    done = _job(db, user, JobStatus.completed, now)
+    assert db.execute(completed_duplicate_stmt(HASH, job.id)).scalar_one() == done
+
+
+def test_only_newer_duplicates_wait_on_the_oldest_in_flight_job(db, user):
+    now = datetime.now(UTC)
+    leader = _job(db, user, JobStatus.processing, now - timedelta(minutes=5))
+    follower = _job(db, user, JobStatus.processing, now)
+
+    assert db.execute(in_flight_leader_stmt(follower)).scalar_one() == leader
+    assert db.execute(in_flight_leader_stmt(leader)).scalar_one_or_none() is None
+
+
+def test_follower_gives_back_its_slot_and_waits_in_the_scheduler(db, user, monkeypatch):
+    from worker import job_state, tasks
+
+    monkeypatch.setattr(job_state, "session", lambda: Session(db.get_bind()))
+    calls: dict[str, list] = {"released": [], "submitted": []}
+    monkeypatch.setattr(tasks.scheduler, "release", calls["released"].append)
+    monkeypatch.setattr(
+        tasks.scheduler, "submit", lambda jobs, delay_seconds: calls["submitted"].append((jobs, delay_seconds))
+    )
+    monkeypatch.setattr(tasks.job_events, "publish", lambda *a, **kw: None)
+    now = datetime.now(UTC)
+    _job(db, user, JobStatus.processing, now - timedelta(minutes=5))
+    follower = _job(db, user, JobStatus.processing, now)
+    db.commit()
+
+    assert tasks._dedupe(follower.id) is True
+
+    db.refresh(follower)
+    assert (follower.status, follower.dedup_waits) == (JobStatus.queued, 1)
+    assert calls["released"] == [follower.id]
+    assert calls["submitted"] == [([(follower.id, user.id, "slow")], 30)]
@@ -0,0 +1,141 @@
+"""Test: direct-to-storage upload flow (presign + complete)."""
+
+import struct
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from app.db.models import JobStatus
+from app.services import storage_minio, submission_service
+
+MP4_HEADER = struct.pack(">I4s4sI", 16, b"ftyp", b"isom", 0)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeResult:
+    def __init__(self, value):
+        self._value = value
+
+    def scalar_one_or_none(self):
+        return self._value
+
+
+class FakeDb:
+    def __init__(self, job=None):
+        self.job = job
+        self.added: list = []
+        self.commits = 0
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def delete(self, obj):
+        self.job = None
+
+    async def execute(self, stmt):
+        return FakeResult(self.job)
+
+
+async def _admit_all(db, user, count=1):
+    pass
+
+
+@pytest.fixture
+def fake_storage(monkeypatch):
+    calls: dict = {"enqueued": []}
+    monkeypatch.setattr(storage_minio, "create_multipart_upload", lambda key, content_type: "upload-1")
+    monkeypatch.setattr(
+        storage_minio, "presign_upload_part", lambda key, upload_id, n: f"https://minio/{key}?partNumber={n}"
+    )
+    monkeypatch.setattr(submission_service, "_enqueue_job", lambda job: calls["enqueued"].append(job.id))
+    monkeypatch.setattr(submission_service, "_admit", _admit_all)
+    return calls
+
+
+@pytest.mark.anyio
+async def test_create_direct_upload_presigns_every_part(fake_storage):
+    user = SimpleNamespace(id=uuid.uuid4())
+    db = FakeDb()
+    size = storage_minio.UPLOAD_PART_SIZE * 2 + 1
+
+    upload = await submission_service.create_direct_upload("clip.mp4", size, "video/mp4", user, db)
+
+    assert upload.job.status == JobStatus.uploading
+    assert upload.job.upload_id == "upload-1"
+    assert upload.job.size_bytes == size
+    assert len(upload.part_urls) == 3
+    assert fake_storage["enqueued"] == []
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("filename", "size", "code"),
+    [
+        ("clip.avi", 100, "unsupported_format"),
+        ("clip.mp4", 0, "invalid_size"),
+        ("clip.mp4", "100", "invalid_size"),
+        ("clip.mp4", True, "invalid_size"),
+        (["clip.mp4"], 100, "invalid_filename"),
+        ("clip.mp4", submission_service.MAX_UPLOAD_SIZE + 1, "file_too_large"),
+    ],
+)
+async def test_create_direct_upload_rejects_invalid_requests(fake_storage, filename, size, code):
+    user = SimpleNamespace(id=uuid.uuid4())
+
+    with pytest.raises(submission_service.SubmissionError) as exc_info:
+        await submission_service.create_direct_upload(filename, size, None, user, FakeDb())
+
+    assert exc_info.value.code == code
+
+
+def _pending_job(size: int):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        status=JobStatus.uploading,
+        original_object_key="uploads/x/clip.mp4",
+        upload_id="upload-1",
+        size_bytes=size,
+    )
+
+
+@pytest.mark.anyio
+async def test_complete_direct_upload_rejects_missing_parts(fake_storage, monkeypatch):
+    job = _pending_job(size=100)
+    monkeypatch.setattr(storage_minio, "list_uploaded_parts", lambda key, upload_id: [SimpleNamespace(size=60)])
+
+    with pytest.raises(submission_service.SubmissionError) as exc_info:
+        await submission_service.complete_direct_upload(job.id, SimpleNamespace(id=uuid.uuid4()), FakeDb(job))
+
+    assert exc_info.value.code == "upload_incomplete"
+    assert job.status == JobStatus.uploading
+    assert fake_storage["enqueued"] == []
+
+
+@pytest.mark.anyio
+async def test_complete_direct_upload_queues_job(fake_storage, monkeypatch):
+    job = _pending_job(size=100)
+    completed: list = []
+    monkeypatch.setattr(
+        storage_minio,
+        "list_uploaded_parts",
+        lambda key, upload_id: [SimpleNamespace(size=60), SimpleNamespace(size=40)],
+    )
+    monkeypatch.setattr(
+        storage_minio, "complete_multipart_upload", lambda key, upload_id, parts: completed.append(len(parts))
+    )
+    monkeypatch.setattr(storage_minio, "get_object_size", lambda key: 100)
+    monkeypatch.setattr(storage_minio, "get_object_range", lambda key, offset, length: MP4_HEADER)
+
+    result = await submission_service.complete_direct_upload(job.id, SimpleNamespace(id=uuid.uuid4()), FakeDb(job))
+
+    assert result.status == JobStatus.queued
+    assert result.upload_id is None
+    assert completed == [2]
+    assert fake_storage["enqueued"] == [job.id]
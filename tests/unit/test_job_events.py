@@ -0,0 +1,146 @@
+"""Test: job progress events published by workers and fanned out to watchers."""
+
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from app.db.models import JobStatus
+from app.services import job_events
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeBus:
+    """Snapshot keys plus pub/sub channels, for both the worker and the API side."""
+
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self.subscribers: dict[str, list[asyncio.Queue]] = {}
+
+    # Worker side (sync pipeline)
+    def pipeline(self, transaction=False):
+        bus, ops = self, []
+
+        class Pipeline:
+            def set(self, key, value, ex=None):
+                ops.append(lambda: bus.values.__setitem__(key, value))
+
+            def publish(self, channel, payload):
+                ops.append(lambda: [q.put_nowait({"data": payload}) for q in bus.subscribers.get(channel, [])])
+
+            def execute(self):
+                for op in ops:
+                    op()
+
+        return Pipeline()
+
+    # API side (asyncio)
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+    def pubsub(self):
+        bus, queue = self, asyncio.Queue()
+
+        class PubSub:
+            async def subscribe(self, channel):
+                bus.subscribers.setdefault(channel, []).append(queue)
+
+            async def get_message(self, ignore_subscribe_messages=True, timeout=None):
+                try:
+                    return await asyncio.wait_for(queue.get(), timeout)
+                except TimeoutError:
+                    return None
+
+            async def unsubscribe(self):
+                for queues in bus.subscribers.values():
+                    if queue in queues:
+                        queues.remove(queue)
+
+            async def reset(self):
+                pass
+
+        return PubSub()
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    fake = FakeBus()
+
+    async def get_redis():
+        return fake
+
+    monkeypatch.setattr(job_events, "_client", lambda: fake)
+    monkeypatch.setattr(job_events, "get_redis", get_redis)
+    return fake
+
+
+def test_progress_is_throttled_to_whole_percent_steps(monkeypatch):
+    published = []
+    now = [100.0]
+    monkeypatch.setattr(job_events, "publish", lambda *args: published.append(args[1:]))
+    monkeypatch.setattr(job_events.time, "monotonic", lambda: now[0])
+    reporter = job_events.ProgressReporter("job", "fetch_source")
+
+    reporter.report(10, 1000)  # 1%
+    reporter.report(15)  # still 1%
+    now[0] += 0.1
+    reporter.report(500)  # 50%, but too soon after the last event
+    now[0] += 1
+    reporter.report(600)
+    reporter.report(1000)  # 100% is always sent
+
+    assert published == [
+        ("processing", "fetch_source", 1),
+        ("processing", "fetch_source", 60),
+        ("processing", "fetch_source", 100),
+    ]
+
+
+@pytest.mark.anyio
+async def test_long_poll_wakes_on_the_next_event(bus):
+    job_id = uuid.uuid4()
+    asyncio.get_running_loop().call_later(0.05, job_events.publish, job_id, "processing", "transcode_audio", 40)
+
+    event = await job_events.wait_for_event(job_id, timeout=5)
+
+    assert (event["stage"], event["progress"]) == ("transcode_audio", 40)
+    assert bus.subscribers[job_events.channel(job_id)] == []
+
+
+@pytest.mark.anyio
+async def test_long_poll_returns_a_missed_event_at_once(bus):
+    job_id = uuid.uuid4()
+    job_events.publish(job_id, "completed", progress=100)
+    seen_at = json.loads(bus.values[job_events.snapshot_key(job_id)])["at"]
+
+    assert (await job_events.wait_for_event(job_id, timeout=5, after=seen_at - 1))["status"] == "completed"
+    assert await job_events.wait_for_event(job_id, timeout=0.05, after=seen_at) is None
+
+
+@pytest.mark.anyio
+async def test_event_stream_ends_after_the_job_finishes(bus):
+    from app.api.jobs import _event_stream
+
+    job = SimpleNamespace(id=uuid.uuid4(), status=JobStatus.processing)
+    job_events.publish(job.id, "processing", "transcode_audio", 10)
+    loop = asyncio.get_running_loop()
+    loop.call_later(0.05, job_events.publish, job.id, "processing", "transcribe_and_persist", 50)
+    loop.call_later(0.1, job_events.publish, job.id, "completed", None, 100)
+
+    frames = [frame async for frame in _event_stream(job)]
+
+    events = [json.loads(f.split("data: ", 1)[1]) for f in frames if f.startswith("event: status")]
+    assert [(e["status"], e["stage"]) for e in events] == [
+        ("processing", None),  # stored state from the database first
+        ("processing", "transcode_audio"),
+        ("processing", "transcribe_and_persist"),
+        ("completed", None),
+    ]
@@ -0,0 +1,165 @@
+"""Test: silent processing jobs are requeued, then failed once out of attempts; queued stages are left alone."""
+
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from app.db.models import Base, JobSourceType, JobStatus, TranscriptionJob, User
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from worker import job_state
+
+
+@pytest.fixture
+def factory(monkeypatch, tmp_path):
+    # A file database, so the heartbeat thread sees the same data as the test
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(job_state, "session", factory)
+    return factory
+
+
+@pytest.fixture
+def reaper(monkeypatch, factory):
+    from worker import tasks
+
+    calls: dict[str, list] = {"submitted": [], "released": [], "events": []}
+    monkeypatch.setattr(tasks.scheduler, "submit", calls["submitted"].extend)
+    monkeypatch.setattr(tasks.scheduler, "release", calls["released"].append)
+    monkeypatch.setattr(tasks.job_events, "publish", lambda job_id, status, *a, **kw: calls["events"].append(status))
+    monkeypatch.setattr(tasks.settings, "JOB_STALE_SECONDS", 600)
+    monkeypatch.setattr(tasks.settings, "JOB_QUEUED_STALE_SECONDS", 86400)
+    monkeypatch.setattr(tasks.settings, "PIPELINE_MAX_ATTEMPTS", 3)
+    return calls
+
+
+def _ago(seconds: float | None) -> datetime | None:
+    return None if seconds is None else datetime.now(UTC) - timedelta(seconds=seconds)
+
+
+def _add_job(factory, heartbeat_age: float | None, **values) -> uuid.UUID:
+    heartbeat_at = _ago(heartbeat_age)
+    with factory() as db:
+        user = User(id=uuid.uuid4(), logto_sub=f"sub-{uuid.uuid4()}")
+        job = TranscriptionJob(
+            id=uuid.uuid4(),
+            user_id=user.id,
+            source_type=JobSourceType.upload,
+            source_label="clip.mp4",
+            status=JobStatus.processing,
+            duration_seconds=120,
+            heartbeat_at=heartbeat_at,
+            **values,
+        )
+        db.add_all([user, job])
+        db.commit()
+        return job.id
+
+
+def _job(factory, job_id: uuid.UUID) -> TranscriptionJob:
+    with factory() as db:
+        return db.get(TranscriptionJob, job_id)
+
+
+def test_stale_job_is_requeued_through_the_scheduler(factory, reaper):
+    from worker import tasks
+
+    stale = _add_job(factory, heartbeat_age=3600)
+    alive = _add_job(factory, heartbeat_age=10)
+
+    tasks.reap_stale_jobs()
+
+    job = _job(factory, stale)
+    assert (job.status, job.attempt_count, job.heartbeat_at) == (JobStatus.queued, 1, None)
+    assert reaper["released"] == [stale]
+    assert reaper["submitted"] == [(stale, job.user_id, "fast")]
+    assert reaper["events"] == ["queued"]
+    assert _job(factory, alive).status == JobStatus.processing
+
+
+def test_job_out_of_attempts_is_failed(factory, reaper):
+    from worker import tasks
+
+    job_id = _add_job(factory, heartbeat_age=3600, attempt_count=2)
+
+    tasks.reap_stale_jobs()
+
+    job = _job(factory, job_id)
+    assert (job.status, job.failure_code) == (JobStatus.failed, "worker_lost")
+    assert reaper["submitted"] == []
+    assert reaper["released"] == [job_id]
+    assert reaper["events"] == ["failed"]
+
+
+def test_job_waiting_in_a_stage_queue_is_not_reaped(factory, reaper):
+    from worker import tasks
+
+    queued = _add_job(factory, heartbeat_age=3600, dispatched_at=_ago(3600))
+    lost = _add_job(factory, heartbeat_age=2 * 86400, dispatched_at=_ago(2 * 86400))
+
+    tasks.reap_stale_jobs()
+
+    assert _job(factory, queued).status == JobStatus.processing
+    assert _job(factory, lost).status == JobStatus.queued
+    assert reaper["released"] == [lost]
+
+
+def test_dispatch_lasts_until_the_stage_starts(factory):
+    job_id = _add_job(factory, heartbeat_age=None)
+    assert job_state.checkpoint(job_id, "fetch_source", {})
+    assert _job(factory, job_id).dispatched_at is not None
+
+    assert job_state.start_stage(job_id, None)
+    assert _job(factory, job_id).dispatched_at is None
+
+
+def test_stage_message_from_an_earlier_run_is_dropped(factory):
+    job_id = _add_job(factory, heartbeat_age=3600)
+    with factory() as db:
+        db.get(TranscriptionJob, job_id).status = JobStatus.queued
+        db.commit()
+    _, _, first = job_state.claim(job_id)
+    assert job_state.requeue_stale(job_id, _ago(0), _ago(0), 3) is not None  # the reaper gave up on it
+    _, _, second = job_state.claim(job_id)
+
+    # The dead worker's message is redelivered while the new run is under way
+    assert not job_state.start_stage(job_id, first)
+    assert not job_state.checkpoint(job_id, "fetch_source", {"claim": first})
+    assert job_state.start_stage(job_id, second)
+    assert job_state.checkpoint(job_id, "fetch_source", {"claim": second})
+
+
+def test_heartbeat_after_the_sweep_wins(factory):
+    job_id = _add_job(factory, heartbeat_age=3600)
+    cutoff, queued_cutoff = _ago(600), _ago(86400)
+    assert job_state.stale_jobs(cutoff, queued_cutoff, 10) == [job_id]
+
+    assert job_state.heartbeat(job_id)
+
+    assert job_state.requeue_stale(job_id, cutoff, queued_cutoff, 3) is None
+    assert not job_state.fail_stale(job_id, cutoff, queued_cutoff, "worker_lost", "gone")
+    assert _job(factory, job_id).status == JobStatus.processing
+
+
+def test_running_stage_keeps_the_heartbeat_fresh(factory):
+    job_id = _add_job(factory, heartbeat_age=3600)
+    before = _job(factory, job_id).heartbeat_at
+
+    with job_state.keep_alive(job_id, interval=0.01):
+        time.sleep(0.1)
+
+    assert _job(factory, job_id).heartbeat_at > before
+
+
+def test_claim_starts_the_heartbeat(factory):
+    job_id = _add_job(factory, heartbeat_age=None)
+    with factory() as db:
+        db.get(TranscriptionJob, job_id).status = JobStatus.queued
+        db.commit()
+
+    assert job_state.claim(job_id)[:2] == (None, None)
+    job = _job(factory, job_id)
+    assert job.heartbeat_at is not None
+    assert job.dispatched_at is not None  # the first stage is queued next
@@ -0,0 +1,101 @@
+"""Test: worker job state transitions are conditional single-statement updates."""
+
+import uuid
+
+import pytest
+from app.db.models import Base, JobSourceType, JobStatus, TranscriptionJob, TranscriptSegment, User
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from worker import job_state
+
+
+@pytest.fixture
+def factory(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(job_state, "session", factory)
+    return factory
+
+
+def _add_job(factory, status: JobStatus = JobStatus.queued, **values) -> uuid.UUID:
+    with factory() as db:
+        user = User(id=uuid.uuid4(), logto_sub=f"sub-{uuid.uuid4()}")
+        job = TranscriptionJob(
+            id=uuid.uuid4(),
+            user_id=user.id,
+            source_type=JobSourceType.upload,
+            source_label="clip.mp4",
+            status=status,
+            **values,
+        )
+        db.add_all([user, job])
+        db.commit()
+        return job.id
+
+
+def _job(factory, job_id: uuid.UUID) -> TranscriptionJob:
+    with factory() as db:
+        return db.get(TranscriptionJob, job_id)
+
+
+def test_only_one_delivery_claims_a_queued_job(factory):
+    job_id = _add_job(factory)
+
+    assert job_state.claim(job_id)[:2] == (None, None)
+    assert job_state.claim(job_id) is None
+
+    job = _job(factory, job_id)
+    assert job.status == JobStatus.processing
+    assert job.started_at is not None
+
+
+def test_claim_returns_resumable_checkpoint(factory):
+    ctx = {"job_id": "x", "audio_key": "audio/x/audio.mp3"}
+    job_id = _add_job(factory, pipeline_stage="transcode_audio", pipeline_context=ctx)
+
+    assert job_state.claim(job_id)[:2] == ("transcode_audio", ctx)
+
+
+def test_updates_only_apply_while_processing(factory):
+    job_id = _add_job(factory, status=JobStatus.processing)
+
+    assert job_state.update_active(job_id, duration_seconds=42)
+    assert job_state.fail(job_id, "probe_failed", "boom")
+    assert not job_state.update_active(job_id, duration_seconds=7)
+    assert not job_state.checkpoint(job_id, "fetch_source", {})
+
+    job = _job(factory, job_id)
+    assert (job.status, job.duration_seconds, job.failure_code) == (JobStatus.failed, 42, "probe_failed")
+
+
+def test_fail_does_not_overwrite_a_completed_job(factory):
+    job_id = _add_job(factory, status=JobStatus.completed)
+
+    assert not job_state.fail(job_id, "unknown", "late failure")
+    assert _job(factory, job_id).status == JobStatus.completed
+
+
+def test_requeue_for_retry_stops_at_max_attempts(factory):
+    job_id = _add_job(factory, status=JobStatus.processing)
+
+    assert job_state.requeue_for_retry(job_id, max_attempts=2) == 1
+    assert job_state.requeue_for_retry(job_id, max_attempts=2) is None  # queued, not processing
+    job_state.claim(job_id)
+    assert job_state.requeue_for_retry(job_id, max_attempts=2) is None
+    assert _job(factory, job_id).attempt_count == 1
+
+
+def test_second_completion_writes_nothing(factory):
+    job_id = _add_job(factory, status=JobStatus.processing)
+
+    for _ in range(2):
+        with factory() as db:
+            if job_state.complete(db, job_id):
+                db.add(TranscriptSegment(id=1, job_id=job_id, segment_index=0, start_ms=0, end_ms=1000, text="hi"))
+            db.commit()
+
+    with factory() as db:
+        count = db.execute(select(func.count()).where(TranscriptSegment.job_id == job_id)).scalar_one()
+    assert count == 1
+    assert _job(factory, job_id).status == JobStatus.completed
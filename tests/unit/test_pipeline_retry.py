@@ -0,0 +1,257 @@
+"""Test: transient pipeline failures resume from the last checkpoint; retries of failed jobs."""
+
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from app.db.models import Base, JobSourceType, JobStatus, TranscriptionJob, User
+from app.services import submission_service
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from worker.retry import backoff_seconds, is_transient
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _status_error(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://example.com/v.mp4")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(code, request=request))
+
+
+def test_transient_errors_are_recognised():
+    assert is_transient(httpx.ConnectTimeout("timed out"))
+    assert is_transient(_status_error(503))
+    assert is_transient(_status_error(429))
+    assert not is_transient(_status_error(404))
+    assert not is_transient(ValueError("Download exceeded maximum size"))
+
+
+def test_backoff_doubles_and_is_capped():
+    assert [backoff_seconds(n) for n in (1, 2, 3)] == [30, 60, 120]
+    assert backoff_seconds(20) == 15 * 60
+
+
+@pytest.fixture
+def worker_db(monkeypatch):
+    from worker import job_state, tasks
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(job_state, "session", factory)
+
+    with factory() as db:
+        user = User(id=uuid.uuid4(), logto_sub="sub")
+        job = TranscriptionJob(
+            id=uuid.uuid4(),
+            user_id=user.id,
+            source_type=JobSourceType.url,
+            source_label="clip.mp4",
+            status=JobStatus.processing,
+            pipeline_stage="transcode_audio",
+            pipeline_context={"job_id": "x", "audio_key": "audio/x/audio.mp3"},
+        )
+        db.add_all([user, job])
+        db.commit()
+        job_id = job.id
+
+    scheduled: list[tuple] = []
+    monkeypatch.setattr(
+        tasks.process_transcription_job, "apply_async", lambda args, countdown: scheduled.append((args, countdown))
+    )
+    return SimpleNamespace(factory=factory, job_id=job_id, scheduled=scheduled)
+
+
+def _job(worker_db) -> TranscriptionJob:
+    with worker_db.factory() as db:
+        return db.get(TranscriptionJob, worker_db.job_id)
+
+
+def test_transient_failure_requeues_with_backoff(worker_db):
+    from worker import tasks
+
+    tasks._fail_stage(worker_db.job_id, "transcription_failed", httpx.ReadTimeout("slow"))
+
+    job = _job(worker_db)
+    assert job.status == JobStatus.queued
+    assert job.attempt_count == 1
+    assert job.pipeline_stage == "transcode_audio"  # resumes at transcription, not a re-ingest
+    assert worker_db.scheduled == [((str(worker_db.job_id),), 30)]
+
+
+def test_permanent_failure_fails_the_job(worker_db):
+    from worker import tasks
+
+    tasks._fail_stage(worker_db.job_id, "transcription_failed", ValueError("bad audio"))
+
+    assert _job(worker_db).status == JobStatus.failed
+    assert worker_db.scheduled == []
+
+
+def test_transient_failure_gives_up_after_max_attempts(worker_db, monkeypatch):
+    from worker import tasks
+
+    monkeypatch.setattr(tasks.settings, "PIPELINE_MAX_ATTEMPTS", 2)
+    tasks._fail_stage(worker_db.job_id, "storage_error", httpx.ConnectError("refused"))
+    assert tasks.job_state.claim(worker_db.job_id) is not None  # the retry picks the job up again
+    tasks._fail_stage(worker_db.job_id, "storage_error", httpx.ConnectError("refused"))
+
+    job = _job(worker_db)
+    assert job.status == JobStatus.failed
+    assert job.failure_code == "storage_error"
+    assert len(worker_db.scheduled) == 1
+
+
+@pytest.fixture
+def staged_source(monkeypatch, worker_db):
+    """The worker_db job, checkpointed after fetch_source with its URL source staged in MinIO."""
+    from app.services import storage_minio
+    from worker import tasks
+    from worker.media import ffmpeg, ffprobe
+
+    key = f"sources/{worker_db.job_id}/input"
+    ctx = {"job_id": str(worker_db.job_id), "source_key": key, "staged": True}
+    with worker_db.factory() as db:
+        job = db.get(TranscriptionJob, worker_db.job_id)
+        job.original_object_key, job.pipeline_stage, job.pipeline_context = key, "fetch_source", ctx
+        db.commit()
+
+    storage = SimpleNamespace(fail_puts=0, deleted=[])
+
+    def put_file(key, path, content_type="application/octet-stream"):
+        if storage.fail_puts:
+            storage.fail_puts -= 1
+            raise httpx.ConnectError("refused")
+        return 0
+
+    def extract_audio(source, output_path, plan, **kwargs):
+        with open(output_path, "wb") as f:
+            f.write(b"audio")
+
+    info = {"format": {"duration": "60"}, "streams": [{"codec_type": "audio", "codec_name": "flac"}]}
+    monkeypatch.setattr(tasks.job_events, "publish", lambda *a, **kw: None)
+    monkeypatch.setattr(tasks, "_presign_minio_source", lambda key: f"https://minio/{key}?X-Amz-Signature=s")
+    monkeypatch.setattr(tasks.settings, "VAD_ENABLED", False)
+    monkeypatch.setattr(ffprobe, "probe_media", lambda source: info)
+    monkeypatch.setattr(ffmpeg, "extract_audio", extract_audio)
+    monkeypatch.setattr(storage_minio, "put_file", put_file)
+    monkeypatch.setattr(storage_minio, "delete_object", storage.deleted.append)
+    return SimpleNamespace(key=key, ctx=ctx, storage=storage)
+
+
+def test_staged_source_survives_a_storage_error_until_the_resume_checkpoints(worker_db, staged_source):
+    from worker import tasks
+
+    staged_source.storage.fail_puts = 1
+    assert tasks._transcode_audio(worker_db.job_id, staged_source.ctx) is None
+
+    job = _job(worker_db)
+    assert (job.status, job.pipeline_stage) == (JobStatus.queued, "fetch_source")
+    assert job.original_object_key == staged_source.key
+    assert staged_source.storage.deleted == []
+
+    stage, ctx, _ = tasks.job_state.claim(worker_db.job_id)
+    assert (stage, ctx) == ("fetch_source", staged_source.ctx)
+    assert tasks._transcode_audio(worker_db.job_id, ctx) is not None
+
+    job = _job(worker_db)
+    assert (job.pipeline_stage, job.original_object_key) == ("transcode_audio", None)
+    assert staged_source.storage.deleted == [staged_source.key]
+
+
+def test_staged_source_is_discarded_when_the_job_fails_for_good(worker_db, staged_source, monkeypatch):
+    from worker import tasks
+    from worker.media import ffprobe
+
+    def probe_media(source):
+        raise RuntimeError("moov atom not found")
+
+    monkeypatch.setattr(ffprobe, "probe_media", probe_media)
+    monkeypatch.setattr(tasks.scheduler, "release", lambda job_id: None)
+
+    assert tasks._transcode_audio(worker_db.job_id, staged_source.ctx) is None
+
+    job = _job(worker_db)
+    assert (job.status, job.failure_code) == (JobStatus.failed, "probe_failed")
+    assert staged_source.storage.deleted == [staged_source.key]
+    # A manual retry downloads the source again instead of resuming from the deleted copy
+    assert (job.original_object_key, job.pipeline_stage, job.pipeline_context) == (None, None, None)
+
+
+def test_staged_source_is_discarded_when_the_job_is_deduplicated(worker_db, staged_source, monkeypatch):
+    from app.services.container_probe import ContainerInfo
+    from worker import tasks
+
+    with worker_db.factory() as db:
+        job = db.get(TranscriptionJob, worker_db.job_id)
+        job.source_url, job.original_object_key, job.pipeline_stage = "https://example.com/v.mov", None, None
+        db.commit()
+    monkeypatch.setattr(tasks, "_dedupe", lambda job_id: False)
+    monkeypatch.setattr(tasks, "_probe_url_header", lambda job_id, url: ContainerInfo("mov"))
+    monkeypatch.setattr(tasks, "_can_stream", lambda info: False)
+    monkeypatch.setattr(tasks, "_stage_url_source", lambda job_id, url, hasher: staged_source.key)
+    monkeypatch.setattr(tasks, "_store_hash_and_dedupe", lambda job_id, content_sha256: True)
+
+    assert tasks._fetch_source(worker_db.job_id) is None
+
+    assert staged_source.storage.deleted == [staged_source.key]
+
+
+class FakeAsyncDb:
+    def __init__(self, job):
+        self.job = job
+        self.commits = 0
+
+    async def execute(self, stmt):
+        return SimpleNamespace(scalar_one_or_none=lambda: self.job)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def _failed_job(code: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        status=JobStatus.failed,
+        failure_code=code,
+        failure_message="boom",
+        completed_at="yesterday",
+        attempt_count=3,
+        pipeline_stage="fetch_source",
+    )
+
+
+@pytest.mark.anyio
+async def test_retry_requeues_failed_job(monkeypatch):
+    enqueued: list = []
+    monkeypatch.setattr(submission_service, "_enqueue_job", enqueued.append)
+    job = _failed_job("transcription_failed")
+
+    await submission_service.retry_job(job.id, SimpleNamespace(id=uuid.uuid4()), FakeAsyncDb(job))
+
+    assert job.status == JobStatus.queued
+    assert (job.failure_code, job.failure_message, job.attempt_count) == (None, None, 0)
+    assert enqueued == [job]
+
+
+@pytest.mark.anyio
+async def test_retry_rejects_media_failures_and_unfailed_jobs(monkeypatch):
+    monkeypatch.setattr(submission_service, "_enqueue_job", lambda job: pytest.fail("should not enqueue"))
+    user = SimpleNamespace(id=uuid.uuid4())
+
+    with pytest.raises(submission_service.SubmissionError) as exc:
+        await submission_service.retry_job(uuid.uuid4(), user, FakeAsyncDb(_failed_job("duration_exceeded")))
+    assert exc.value.code == "not_retryable"
+
+    running = _failed_job("transcription_failed")
+    running.status = JobStatus.processing
+    with pytest.raises(submission_service.SubmissionError):
+        await submission_service.retry_job(running.id, user, FakeAsyncDb(running))
+
+    with pytest.raises(submission_service.SubmissionError) as exc:
+        await submission_service.retry_job(uuid.uuid4(), user, FakeAsyncDb(None))
+    assert exc.value.code == "job_not_found"
@@ -0,0 +1,105 @@
+"""Test: the transcription pipeline is a chain of stage tasks on dedicated queues."""
+
+from typing import ClassVar
+
+import pytest
+
+
+def test_stages_are_routed_to_their_queues():
+    from worker.celery_app import celery_app
+
+    router = celery_app.amqp.router
+    stages = ("fetch_source", "transcode_audio", "transcribe_and_persist")
+    queue = {name: router.route({}, f"worker.tasks.{name}")["queue"].name for name in stages}
+
+    assert queue == {"fetch_source": "io", "transcode_audio": "cpu", "transcribe_and_persist": "asr"}
+
+
+class FakeChain:
+    dispatched: ClassVar[list[tuple]] = []
+
+    def __init__(self, *sigs):
+        self.sigs = sigs
+
+    def apply_async(self):
+        self.dispatched.append(self.sigs)
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    from worker import tasks
+
+    monkeypatch.setattr(FakeChain, "dispatched", [])
+    monkeypatch.setattr(tasks, "chain", FakeChain)
+    return FakeChain.dispatched
+
+
+def test_entry_task_dispatches_stage_chain(monkeypatch, dispatched):
+    from worker import tasks
+
+    monkeypatch.setattr(tasks.job_state, "claim", lambda job_id: (None, None, "claim-1"))
+
+    tasks.process_transcription_job.run("00000000-0000-0000-0000-000000000001")
+
+    (sigs,) = dispatched
+    assert [s.task for s in sigs] == [
+        "worker.tasks.fetch_source",
+        "worker.tasks.transcode_audio",
+        "worker.tasks.transcribe_and_persist",
+    ]
+    assert sigs[0].args == ("00000000-0000-0000-0000-000000000001", "claim-1")
+    assert sigs[0].immutable
+
+
+@pytest.mark.parametrize(
+    ("stage", "expected"),
+    [
+        ("fetch_source", ["worker.tasks.transcode_audio", "worker.tasks.transcribe_and_persist"]),
+        ("transcode_audio", ["worker.tasks.transcribe_and_persist"]),
+    ],
+)
+def test_entry_task_resumes_after_last_checkpoint(monkeypatch, dispatched, stage, expected):
+    from worker import tasks
+
+    ctx = {"job_id": "00000000-0000-0000-0000-000000000001", "audio_key": "audio/x/audio.mp3"}
+    monkeypatch.setattr(tasks.job_state, "claim", lambda job_id: (stage, ctx, "claim-2"))
+
+    tasks.process_transcription_job.run(ctx["job_id"])
+
+    (sigs,) = dispatched
+    assert [s.task for s in sigs] == expected
+    assert sigs[0].args == ({**ctx, "claim": "claim-2"},)  # this run's claim, not the checkpoint's
+
+
+def test_entry_task_ignores_a_job_that_is_not_queued(monkeypatch, dispatched):
+    from worker import tasks
+
+    monkeypatch.setattr(tasks.job_state, "claim", lambda job_id: None)
+
+    tasks.process_transcription_job.run("00000000-0000-0000-0000-000000000001")
+
+    assert dispatched == []
+
+
+def test_later_stages_skip_a_finished_job(monkeypatch):
+    from worker import tasks
+
+    monkeypatch.setattr(tasks, "_run_stage", lambda *a: pytest.fail("stage should not run"))
+
+    assert tasks.transcode_audio.run(None) is None
+    assert tasks.transcribe_and_persist.run(None) is None
+
+
+def test_stages_inherit_the_entry_task_priority(monkeypatch, dispatched):
+    from types import SimpleNamespace
+
+    from worker import tasks
+
+    monkeypatch.setattr(tasks.job_state, "claim", lambda job_id: (None, None, "claim-1"))
+    request = SimpleNamespace(delivery_info={"priority": 6})
+    monkeypatch.setattr(tasks, "current_task", SimpleNamespace(request=request))
+
+    tasks.process_transcription_job.run("00000000-0000-0000-0000-000000000001")
+
+    (sigs,) = dispatched
+    assert [s.options.get("priority") for s in sigs] == [6, 6, 6]
@@ -0,0 +1,172 @@
+"""Test: URL downloads over parallel Range connections, against a stand-in HTTP server."""
+
+import hashlib
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+DATA = bytes(range(256)) * 1000  # 256,000 bytes
+
+
+class SourceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(dict(self.headers))
+        data = server.data
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if not server.ranges or match is None or (if_range is not None and if_range != server.etag):
+            self._send(200, data, {})
+            return
+        start, end = int(match.group(1)), min(int(match.group(2) or len(data) - 1), len(data) - 1)
+        self._send(206, data[start : end + 1], {"Content-Range": f"bytes {start}-{end}/{len(data)}"})
+        if server.replace_with:
+            # The file is re-uploaded right after this response
+            server.etag, server.replace_with = server.replace_with, None
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", self.server.etag)
+        self.send_header("Accept-Ranges", "bytes" if self.server.ranges else "none")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        with self.server.lock:
+            drop = self.server.drops.pop(0) if self.server.drops and len(body) > 1 else None
+        if drop is None:
+            self.wfile.write(body)
+            return
+        # Simulate a dropped connection part way through the body
+        self.wfile.write(body[:drop])
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def source(monkeypatch):
+    from worker.media import downloader, resolver
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SourceHandler)
+    server.data, server.etag, server.ranges, server.replace_with = DATA, '"v1"', True, None
+    server.requests, server.lock, server.drops = [], threading.Lock(), []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(resolver, "is_blocked_address", lambda ip: False)  # loopback is blocked by the SSRF check
+    monkeypatch.setattr(downloader, "RANGE_PART_SIZE", 50_000)
+    monkeypatch.setattr(downloader.time, "sleep", lambda seconds: None)
+    server.url = f"http://127.0.0.1:{server.server_port}/video.mp4"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_ranges_are_fetched_in_parallel_into_one_file(source, tmp_path):
+    from worker.media.downloader import download_file
+
+    dest = tmp_path / "input"
+    hasher = hashlib.sha256()
+    assert download_file(source.url, str(dest), hasher, connections=3) == len(DATA)
+
+    assert dest.read_bytes() == DATA
+    assert hasher.hexdigest() == hashlib.sha256(DATA).hexdigest()
+    ranges = sorted(r["Range"] for r in source.requests[1:])
+    assert len(ranges) == 6  # 256,000 bytes in 50,000 byte parts
+    assert all(r["If-Range"] == '"v1"' for r in source.requests[1:])
+
+
+def test_falls_back_to_one_stream_without_range_support(source, tmp_path):
+    from worker.media.downloader import download_file
+
+    source.ranges = False
+    dest = tmp_path / "input"
+
+    assert download_file(source.url, str(dest), connections=3) == len(DATA)
+    assert dest.read_bytes() == DATA
+    assert len(source.requests) == 1
+
+
+def test_fetch_range_never_skips_through_a_body_sent_from_the_start(source):
+    from worker.media.downloader import fetch_range
+
+    assert fetch_range(source.url, 1000, 100) == DATA[1000:1100]
+
+    source.ranges = False
+    assert fetch_range(source.url, 0, 100) == DATA[:100]
+    assert fetch_range(source.url, 1000, 100) is None
+
+
+def test_size_cap_applies_to_ranged_downloads(source, tmp_path, monkeypatch):
+    from worker.media import downloader
+
+    monkeypatch.setattr(downloader, "MAX_DOWNLOAD_SIZE", 1000)
+
+    with pytest.raises(ValueError, match="maximum download size"):
+        downloader.download_file(source.url, str(tmp_path / "input"))
+
+
+def test_source_replaced_mid_download_is_detected(source, tmp_path):
+    from worker.media.downloader import SourceChangedError, download_file
+
+    source.replace_with = '"v2"'
+
+    with pytest.raises(SourceChangedError):
+        download_file(source.url, str(tmp_path / "input"), connections=2)
+
+
+def test_dropped_range_resumes_from_last_byte(source, tmp_path):
+    from app.metrics import get_metrics
+    from worker.media.downloader import download_file
+
+    before = get_metrics()["counters"].get("download_resumed_bytes", 0)
+    source.drops = [20_000, 5_000]
+    dest = tmp_path / "input"
+
+    assert download_file(source.url, str(dest), connections=1) == len(DATA)
+
+    assert dest.read_bytes() == DATA
+    resumed = [r["Range"] for r in source.requests if r["Range"] not in {"bytes=0-0"}]
+    assert resumed[:3] == ["bytes=0-49999", "bytes=20000-49999", "bytes=25000-49999"]
+    assert get_metrics()["counters"]["download_resumed_bytes"] - before == 20_000 + 25_000
+
+
+def test_streamed_download_resumes_transparently(source):
+    from worker.media.downloader import iter_download
+
+    source.drops = [100_000]
+    hasher = hashlib.sha256()
+
+    assert b"".join(iter_download(source.url, hasher)) == DATA
+    assert hasher.hexdigest() == hashlib.sha256(DATA).hexdigest()
+    assert source.requests[1]["Range"] == "bytes=100000-"
+    assert source.requests[1]["If-Range"] == '"v1"'
+
+
+def test_stream_without_range_support_is_not_resumed(source):
+    import httpx
+    from worker.media.downloader import iter_download
+
+    source.ranges = False
+    source.drops = [100_000]
+
+    with pytest.raises(httpx.TransportError):
+        b"".join(iter_download(source.url))
+    assert len(source.requests) == 1
+
+
+def test_resumes_are_bounded(source, tmp_path, monkeypatch):
+    import httpx
+    from worker.media import downloader
+
+    monkeypatch.setattr(downloader, "DOWNLOAD_MAX_RESUMES", 2)
+    source.drops = [1_000] * 10
+
+    with pytest.raises(httpx.TransportError):
+        downloader.download_file(source.url, str(tmp_path / "input"), connections=1)
@@ -0,0 +1,113 @@
+"""Test: resumable chunked uploads (offsets, checksums, received ranges)."""
+
+import hashlib
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from app.db.models import JobStatus
+from app.services import resumable_uploads, storage_minio, submission_service
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def expire(self, key, ttl):
+        return True
+
+    async def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+@pytest.fixture
+def upload_env(monkeypatch):
+    chunk = storage_minio.UPLOAD_PART_SIZE
+    job = SimpleNamespace(
+        id=uuid.uuid4(),
+        status=JobStatus.uploading,
+        original_object_key="uploads/x/clip.mkv",
+        upload_id="upload-1",
+        size_bytes=chunk * 2 + 10,
+    )
+    redis = FakeRedis()
+    uploaded: list[int] = []
+
+    async def fake_get_pending_upload(job_id, user, db):
+        return job
+
+    async def fake_get_redis():
+        return redis
+
+    def fake_upload_part(key, upload_id, part_number, data):
+        uploaded.append(part_number)
+        return f"etag-{part_number}"
+
+    monkeypatch.setattr(resumable_uploads, "get_pending_upload", fake_get_pending_upload)
+    monkeypatch.setattr(resumable_uploads, "get_redis", fake_get_redis)
+    monkeypatch.setattr(storage_minio, "upload_part", fake_upload_part)
+    return SimpleNamespace(job=job, chunk=chunk, uploaded=uploaded)
+
+
+def test_merge_ranges_coalesces_adjacent_and_overlapping():
+    assert resumable_uploads.merge_ranges([(10, 20), (0, 10), (30, 40), (35, 50)]) == [(0, 20), (30, 50)]
+
+
+@pytest.mark.parametrize("offset", [-1, 7, 10_000_000_000])
+def test_expected_chunk_length_rejects_bad_offsets(offset):
+    with pytest.raises(submission_service.SubmissionError):
+        resumable_uploads.expected_chunk_length(offset, size=1000, chunk_size=100)
+
+
+def test_expected_chunk_length_last_chunk_is_remainder():
+    assert resumable_uploads.expected_chunk_length(900, size=950, chunk_size=100) == 50
+
+
+@pytest.mark.anyio
+async def test_put_chunk_rejects_checksum_mismatch(upload_env):
+    data = b"x" * 10
+
+    with pytest.raises(submission_service.SubmissionError) as exc_info:
+        await resumable_uploads.put_chunk(upload_env.job.id, upload_env.chunk * 2, data, "0" * 64, None, None)
+
+    assert exc_info.value.code == "checksum_mismatch"
+    assert upload_env.uploaded == []
+
+
+@pytest.mark.anyio
+async def test_status_reports_received_and_missing_ranges(upload_env):
+    data = b"x" * 10
+    checksum = hashlib.sha256(data).hexdigest()
+
+    await resumable_uploads.put_chunk(upload_env.job.id, upload_env.chunk * 2, data, checksum, None, None)
+    status = await resumable_uploads.get_upload_status(upload_env.job.id, None, None)
+
+    chunk = upload_env.chunk
+    assert upload_env.uploaded == [3]
+    assert status["chunk_count"] == 3
+    assert status["received"] == [[chunk * 2, chunk * 2 + 10]]
+    assert status["missing"] == [[0, chunk * 2]]
+
+
+@pytest.mark.anyio
+async def test_content_digest_comes_from_the_chunk_checksums(upload_env, monkeypatch):
+    monkeypatch.setattr(resumable_uploads, "check_header", lambda header: None)
+    chunks = {0: b"a" * upload_env.chunk, upload_env.chunk: b"b" * upload_env.chunk, upload_env.chunk * 2: b"c" * 10}
+    for offset in sorted(chunks, reverse=True):  # arrival order does not matter
+        data = chunks[offset]
+        await resumable_uploads.put_chunk(upload_env.job.id, offset, data, hashlib.sha256(data).hexdigest(), None, None)
+
+    expected = hashlib.sha256(b"".join(hashlib.sha256(chunks[o]).digest() for o in sorted(chunks)))
+    assert await resumable_uploads.content_digest(upload_env.job.id) == expected.hexdigest()
+    assert await resumable_uploads.content_digest(uuid.uuid4()) is None  # presigned: no chunk records
@@ -0,0 +1,87 @@
+"""Test: retention deletes old jobs with every object the pipeline left in MinIO."""
+
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from app.db.models import Base, JobSourceType, JobStatus, TranscriptionJob, User
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from worker import job_state
+
+
+def test_old_job_objects_are_deleted_including_condensed_speech(monkeypatch):
+    from app.services import storage_minio
+    from worker import tasks
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(job_state, "session", factory)
+    deleted: list[str] = []
+    monkeypatch.setattr(storage_minio, "delete_object", deleted.append)
+
+    with factory() as db:
+        user = User(id=uuid.uuid4(), logto_sub="sub")
+        job = TranscriptionJob(
+            id=uuid.uuid4(),
+            user_id=user.id,
+            source_type=JobSourceType.upload,
+            source_label="clip.mp4",
+            status=JobStatus.completed,
+            created_at=datetime.now(UTC) - timedelta(days=31),
+            original_object_key="uploads/clip.mp4",
+            audio_object_key="audio/x/audio.mp3",
+            pipeline_stage="transcode_audio",
+            pipeline_context={"audio_key": "audio/x/speech.mp3", "speech_key": "audio/x/speech.mp3"},
+        )
+        db.add_all([user, job])
+        db.commit()
+        job_id = job.id
+
+    tasks.retention_cleanup()
+
+    assert deleted == ["uploads/clip.mp4", "audio/x/audio.mp3", "audio/x/speech.mp3"]
+    with factory() as db:
+        assert db.get(TranscriptionJob, job_id) is None
+
+
+def test_old_unfinished_upload_is_aborted_and_deleted_once(monkeypatch):
+    from app.services import storage_minio
+    from worker import tasks
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(job_state, "session", factory)
+    deleted: list[str] = []
+    aborted: list[tuple[str, str]] = []
+    counted: list[int] = []
+    monkeypatch.setattr(storage_minio, "delete_object", deleted.append)
+    monkeypatch.setattr(
+        storage_minio, "abort_multipart_upload", lambda key, upload_id: aborted.append((key, upload_id))
+    )
+    monkeypatch.setattr(tasks, "inc", lambda name, amount=1: counted.append(amount))
+
+    with factory() as db:
+        user = User(id=uuid.uuid4(), logto_sub="sub")
+        job = TranscriptionJob(
+            id=uuid.uuid4(),
+            user_id=user.id,
+            source_type=JobSourceType.upload,
+            source_label="clip.mp4",
+            status=JobStatus.uploading,
+            created_at=datetime.now(UTC) - timedelta(days=31),
+            original_object_key="uploads/clip.mp4",
+            upload_id="upload-1",
+        )
+        db.add_all([user, job])
+        db.commit()
+        job_id = job.id
+
+    tasks.retention_cleanup()
+
+    assert deleted == []
+    assert aborted == [("uploads/clip.mp4", "upload-1")]
+    assert counted == [1]
+    with factory() as db:
+        assert db.get(TranscriptionJob, job_id) is None
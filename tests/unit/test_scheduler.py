@@ -0,0 +1,118 @@
+"""Test: jobs are queued per lane and user, and started with their lane's Celery priority."""
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+import redis
+from app.services import scheduler
+
+
+class FakeScript:
+    def __init__(self, result=None):
+        self.calls: list[dict] = []
+        self.result = result or []
+
+    def __call__(self, keys, args, client=None):
+        self.calls.append({"keys": keys, "args": args})
+        return self.result
+
+
+class FakePipeline:
+    def __init__(self):
+        self.executed = False
+
+    def execute(self):
+        self.executed = True
+
+
+@pytest.fixture
+def started(monkeypatch):
+    calls: list[tuple[str, str]] = []
+    monkeypatch.setattr(scheduler, "_start", lambda job_id, lane, countdown=None: calls.append((job_id, lane)))
+    monkeypatch.setattr(scheduler.settings, "SCHEDULER_MAX_IN_FLIGHT", 4)
+    return calls
+
+
+def test_lane_uses_probed_duration_then_size_estimate(monkeypatch):
+    monkeypatch.setattr(scheduler.settings, "SCHEDULER_FAST_LANE_MAX_SECONDS", 900)
+    monkeypatch.setattr(scheduler.settings, "SCHEDULER_BYTES_PER_SECOND", 250_000)
+
+    assert scheduler.lane_for(120, 10**10) == scheduler.FAST_LANE
+    assert scheduler.lane_for(1800, None) == scheduler.SLOW_LANE
+    assert scheduler.lane_for(None, 100 * 250_000) == scheduler.FAST_LANE
+    assert scheduler.lane_for(None, 1000 * 250_000) == scheduler.SLOW_LANE
+    assert scheduler.lane_for(None, None) == scheduler.SLOW_LANE
+
+
+def test_submit_queues_each_lane_in_one_round_trip(monkeypatch, started):
+    submit_script, pipe = FakeScript(), FakePipeline()
+    client = SimpleNamespace(pipeline=lambda transaction: pipe)
+    monkeypatch.setattr(scheduler, "_client", lambda: (client, SimpleNamespace(submit=submit_script)))
+    dispatched: list[bool] = []
+    monkeypatch.setattr(scheduler, "dispatch", lambda: dispatched.append(True))
+    user = uuid.uuid4()
+    fast, slow_a, slow_b = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    scheduler.submit([(slow_a, user, "slow"), (fast, user, "fast"), (slow_b, user, "slow")])
+
+    assert [call["keys"] for call in submit_script.calls] == [["sched:users:fast"], ["sched:users:slow"]]
+    assert submit_script.calls[1]["args"] == ["sched:pending:slow:", str(slow_a), str(user), str(slow_b), str(user)]
+    assert pipe.executed
+    assert dispatched == [True]
+    assert started == []
+
+
+def test_delayed_submit_waits_outside_the_pending_lists(monkeypatch, started):
+    delayed_script = FakeScript()
+    monkeypatch.setattr(scheduler, "_client", lambda: (None, SimpleNamespace(submit_delayed=delayed_script)))
+    monkeypatch.setattr(scheduler, "dispatch", lambda: pytest.fail("delayed jobs wait for a later dispatch"))
+    job_id, user = uuid.uuid4(), uuid.uuid4()
+
+    scheduler.submit([(job_id, user, "fast")], delay_seconds=30)
+
+    assert delayed_script.calls == [{"keys": ["sched:delayed"], "args": [30_000, f"fast:{user}:{job_id}"]}]
+    assert started == []
+
+
+def test_dispatch_starts_picked_jobs_in_their_lanes(monkeypatch, started):
+    dispatch_script = FakeScript([b"fast", b"job-1", b"slow", b"job-2"])
+    monkeypatch.setattr(scheduler, "_client", lambda: (None, SimpleNamespace(dispatch=dispatch_script)))
+
+    assert scheduler.dispatch() == 2
+
+    assert started == [("job-1", "fast"), ("job-2", "slow")]
+    assert dispatch_script.calls[0]["args"][0] == 4  # SCHEDULER_MAX_IN_FLIGHT
+
+
+def test_disabled_scheduler_starts_jobs_directly(monkeypatch, started):
+    monkeypatch.setattr(scheduler.settings, "SCHEDULER_MAX_IN_FLIGHT", 0)
+    monkeypatch.setattr(scheduler, "_client", lambda: pytest.fail("should not use Redis"))
+    job_id = uuid.uuid4()
+
+    scheduler.submit([(job_id, uuid.uuid4(), "fast")])
+    scheduler.release(job_id)
+
+    assert started == [(str(job_id), "fast")]
+
+
+def test_release_survives_redis_outage(monkeypatch, started):
+    def broken():
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(scheduler, "_client", broken)
+
+    scheduler.release(uuid.uuid4())
+
+    assert started == []
+
+
+def test_lane_priority_is_sent_with_the_entry_task(monkeypatch):
+    from worker import tasks
+
+    sent: list[dict] = []
+    monkeypatch.setattr(tasks.process_transcription_job, "apply_async", lambda args, **options: sent.append(options))
+
+    scheduler._start("job-1", scheduler.SLOW_LANE)
+
+    assert sent == [{"countdown": None, "priority": scheduler.LANE_PRIORITY["slow"]}]
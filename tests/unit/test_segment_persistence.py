@@ -0,0 +1,62 @@
+"""Test: transcript segments are written in bulk."""
+
+import csv
+import uuid
+
+from app.db.models import Base, JobSourceType, JobStatus, TranscriptionJob, TranscriptSegment, User
+from app.services.openai_whisper import WhisperSegment
+from app.services.transcription import SEGMENT_COLUMNS, copy_buffer, segment_rows, write_segments
+from sqlalchemy import BigInteger, create_engine, event, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only autoincrements an INTEGER PRIMARY KEY
+    return "INTEGER"
+
+
+def _segments(count: int) -> list[WhisperSegment]:
+    return [WhisperSegment(i, i * 1000, i * 1000 + 500, f"line {i}", -0.2, 0.8) for i in range(count)]
+
+
+def test_write_segments_uses_one_executemany():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    statements: list[str] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO transcript_segments"):
+            statements.append(statement)
+
+    with Session(engine) as db:
+        user = User(id=uuid.uuid4(), logto_sub="sub")
+        job = TranscriptionJob(
+            id=uuid.uuid4(),
+            user_id=user.id,
+            source_type=JobSourceType.upload,
+            source_label="a.mp4",
+            status=JobStatus.processing,
+        )
+        db.add_all([user, job])
+        db.flush()
+        write_segments(db, job.id, _segments(50))
+        db.commit()
+        texts = db.execute(select(TranscriptSegment.text).order_by(TranscriptSegment.segment_index)).scalars().all()
+
+    assert len(statements) == 1
+    assert texts == [f"line {i}" for i in range(50)]
+
+
+def test_copy_buffer_quotes_text_and_leaves_nulls_empty():
+    job_id = uuid.uuid4()
+    segments = [WhisperSegment(0, 0, 900, 'she said "hi",\nthen left', None, None)]
+
+    (row,) = csv.reader(copy_buffer(segment_rows(job_id, segments)))
+
+    values = dict(zip(SEGMENT_COLUMNS, row, strict=True))
+    assert values["job_id"] == str(job_id)
+    assert values["text"] == 'she said "hi",\nthen left'
+    assert values["avg_logprob"] == values["confidence"] == ""
@@ -0,0 +1,100 @@
+"""Test: a redelivered stage exits at once while another execution holds the stage's lease."""
+
+import threading
+import time
+
+import pytest
+import redis
+from worker import stage_lease
+
+
+class FakeRedis:
+    """Just enough of Redis for the lease: SET NX plus the renew and release scripts."""
+
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self.renewals = 0
+        self.lock = threading.Lock()
+
+    def set(self, key, value, nx, px):
+        with self.lock:
+            if nx and key in self.values:
+                return None
+            self.values[key] = value
+            return True
+
+    def renew(self, keys, args):
+        with self.lock:
+            if self.values.get(keys[0]) != args[0]:
+                return 0
+            self.renewals += 1
+            return 1
+
+    def release(self, keys, args):
+        with self.lock:
+            if self.values.get(keys[0]) == args[0]:
+                del self.values[keys[0]]
+                return 1
+            return 0
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(stage_lease, "_client", lambda: (fake, fake.renew, fake.release))
+    return fake
+
+
+def test_second_execution_is_refused_until_the_first_releases(fake_redis):
+    with stage_lease.hold("job-1", "transcode_audio") as first:
+        assert first
+        with stage_lease.hold("job-1", "transcode_audio") as second:
+            assert not second
+        with stage_lease.hold("job-1", "transcribe_and_persist") as other_stage:
+            assert other_stage
+
+    assert fake_redis.values == {}
+    with stage_lease.hold("job-1", "transcode_audio") as again:
+        assert again
+
+
+def test_heartbeat_renews_and_notices_a_lost_lease(fake_redis):
+    lease = stage_lease.StageLease("job-1", "fetch_source", ttl_seconds=0.03)
+    assert lease.acquire()
+    time.sleep(0.05)
+    assert fake_redis.renewals >= 1
+
+    fake_redis.values[lease.key] = "someone-else"
+    time.sleep(0.05)
+    assert lease.lost
+    lease.release()
+    assert fake_redis.values[lease.key] == "someone-else"  # never deletes another holder's lease
+
+
+def test_stage_runs_unguarded_without_redis(monkeypatch):
+    def down():
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(stage_lease, "_client", down)
+
+    with stage_lease.hold("job-1", "fetch_source") as held:
+        assert held
+
+
+def test_duplicate_delivery_skips_the_stage(fake_redis, monkeypatch):
+    from worker import tasks
+
+    monkeypatch.setattr(tasks.job_state, "start_stage", lambda job_id, claim: True)
+
+    job_id = "00000000-0000-0000-0000-000000000001"
+    fake_redis.values[stage_lease.lease_key(job_id, "transcode_audio")] = "running-elsewhere"
+
+    def _transcode_audio(job_id, ctx):
+        pytest.fail("duplicate delivery should not run the stage")
+
+    def _transcribe_and_persist(job_id, ctx):
+        return "ran"
+
+    assert tasks._run_stage(job_id, None, _transcode_audio, {}) is None
+    assert tasks._run_stage(job_id, None, _transcribe_and_persist, {}) == "ran"
+    assert list(fake_redis.values) == [stage_lease.lease_key(job_id, "transcode_audio")]
@@ -0,0 +1,124 @@
+"""Test: streaming uploads to MinIO stay bounded and enforce the size limit."""
+
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeMinio:
+    """Minimal MinIO client that drains the stream part by part like the real one."""
+
+    def __init__(self):
+        self.calls: list[dict] = []
+        self.largest_read = 0
+
+    def put_object(self, bucket_name, object_name, data, length, part_size, content_type, num_parallel_uploads):
+        self.calls.append({"object_name": object_name, "length": length, "part_size": part_size})
+        while True:
+            chunk = data.read(part_size)
+            self.largest_read = max(self.largest_read, len(chunk))
+            if not chunk:
+                break
+
+
+@pytest.fixture
+def fake_minio(monkeypatch):
+    from app.services import storage_minio
+
+    client = FakeMinio()
+    monkeypatch.setattr(storage_minio, "get_minio_client", lambda: client)
+    return client
+
+
+def test_put_stream_uses_multipart_with_fixed_part_size(fake_minio):
+    from app.services.storage_minio import put_stream
+
+    written = put_stream("uploads/x/video.mp4", BytesIO(b"a" * 1000), part_size=64)
+
+    assert written == 1000
+    assert fake_minio.calls[0]["length"] == -1
+    assert fake_minio.calls[0]["part_size"] == 64
+    assert fake_minio.largest_read <= 64
+
+
+def test_put_stream_rejects_oversized_stream(fake_minio):
+    from app.services.storage_minio import ObjectTooLargeError, put_stream
+
+    with pytest.raises(ObjectTooLargeError):
+        put_stream("uploads/x/video.mp4", BytesIO(b"a" * 1000), max_size=500, part_size=64)
+
+
+def test_put_stream_allows_stream_at_limit(fake_minio):
+    from app.services.storage_minio import put_stream
+
+    assert put_stream("uploads/x/video.mp4", BytesIO(b"a" * 500), max_size=500, part_size=64) == 500
+
+
+def test_presign_get_object_signs_on_internal_client(monkeypatch):
+    from app.services import storage_minio
+
+    calls = []
+
+    class FakeClient:
+        def presigned_get_object(self, bucket_name, object_name, expires):
+            calls.append((object_name, expires.total_seconds()))
+            return f"http://minio:9000/{bucket_name}/{object_name}?X-Amz-Signature=abc"
+
+    monkeypatch.setattr(storage_minio, "get_minio_client", lambda: FakeClient())
+
+    url = storage_minio.presign_get_object("uploads/x/video.mkv", expires_seconds=7200)
+
+    assert url.startswith("http://minio:9000/")
+    assert calls == [("uploads/x/video.mkv", 7200)]
+
+
+class FakeObjectStore:
+    """Serves ranged GETs of one in-memory object, in small chunks like a streamed response."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.size = len(data)
+        self.etag: str | None = "abc"
+        self.ranges: list[tuple[int, int]] = []
+        self.headers: list[dict | None] = []
+
+    def stat_object(self, bucket_name, object_name):
+        return SimpleNamespace(size=self.size, etag=self.etag)
+
+    def get_object(self, bucket_name, object_name, offset=0, length=0, request_headers=None):
+        self.ranges.append((offset, length))
+        self.headers.append(request_headers)
+        body = self.data[offset : offset + length]
+        return SimpleNamespace(
+            stream=lambda size: (body[i : i + 7] for i in range(0, len(body), 7)),
+            close=lambda: None,
+            release_conn=lambda: None,
+        )
+
+
+def test_get_file_assembles_parallel_ranges(monkeypatch, tmp_path):
+    from app.services import storage_minio
+
+    data = bytes(range(256)) * 40
+    store = FakeObjectStore(data)
+    monkeypatch.setattr(storage_minio, "get_minio_client", lambda: store)
+    monkeypatch.setattr(storage_minio.settings, "MINIO_TRANSFER_CONCURRENCY", 4)
+
+    dest = tmp_path / "audio.mp3"
+    assert storage_minio.get_file("audio/x/audio.mp3", str(dest), part_size=1000) == len(data)
+
+    assert dest.read_bytes() == data
+    assert sorted(store.ranges) == [(o, min(1000, len(data) - o)) for o in range(0, len(data), 1000)]
+    assert all(h == {"If-Match": "abc"} for h in store.headers)
+
+
+def test_get_file_rejects_short_range(monkeypatch, tmp_path):
+    from app.services import storage_minio
+
+    store = FakeObjectStore(b"x" * 100)
+    store.size, store.etag = 150, None
+    monkeypatch.setattr(storage_minio, "get_minio_client", lambda: store)
+
+    with pytest.raises(OSError, match="Short read"):
+        storage_minio.get_file("k", str(tmp_path / "out"), part_size=1000)
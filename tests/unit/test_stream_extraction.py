@@ -0,0 +1,128 @@
+"""Test: URL sources piped into ffmpeg without an intermediate video file."""
+
+import hashlib
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch):
+    """Replace ffmpeg with a shell command that copies stdin to the output path."""
+    from worker.media import ffmpeg
+
+    real_popen = subprocess.Popen
+    script = {"body": 'cat > "$0"'}
+
+    def popen(cmd, **kwargs):
+        return real_popen(["sh", "-c", script["body"], cmd[-1]], **kwargs)
+
+    monkeypatch.setattr(ffmpeg.subprocess, "Popen", popen)
+    return script
+
+
+def test_stream_is_fed_to_ffmpeg_stdin(fake_ffmpeg, tmp_path):
+    from worker.media.ffmpeg import extract_audio_from_stream
+
+    out = tmp_path / "audio.mp3"
+    extract_audio_from_stream(iter([b"abc", b"def"]), str(out))
+
+    assert out.read_bytes() == b"abcdef"
+
+
+def test_source_errors_propagate_and_stop_ffmpeg(fake_ffmpeg, tmp_path):
+    from worker.media.ffmpeg import extract_audio_from_stream
+
+    def chunks():
+        yield b"abc"
+        raise ValueError("Download exceeded maximum size")
+
+    with pytest.raises(ValueError, match="maximum size"):
+        extract_audio_from_stream(chunks(), str(tmp_path / "audio.mp3"))
+
+
+def test_ffmpeg_failure_raises_transcode_error(fake_ffmpeg, tmp_path):
+    from worker.media.ffmpeg import TranscodeError, extract_audio_from_stream
+
+    fake_ffmpeg["body"] = "cat > /dev/null; echo 'Invalid data found' >&2; exit 1"
+
+    with pytest.raises(TranscodeError, match="Invalid data"):
+        extract_audio_from_stream(iter([b"abc"]), str(tmp_path / "audio.mp3"))
+
+
+def test_iter_download_hashes_and_enforces_size(monkeypatch):
+    from worker.media import downloader
+
+    class FakeResponse:
+        def __init__(self):
+            self.headers = {}
+
+        def raise_for_status(self):
+            pass
+
+        def iter_bytes(self, chunk_size):
+            yield b"a" * 10
+            yield b"b" * 10
+
+    class FakeStream:
+        def __enter__(self):
+            return FakeResponse()
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(downloader, "validate_url", lambda url: None)
+    monkeypatch.setattr(downloader, "_http_client", lambda: SimpleNamespace(stream=lambda *a, **kw: FakeStream()))
+
+    hasher = hashlib.sha256()
+    assert b"".join(downloader.iter_download("https://example.com/v.mkv", hasher)) == b"a" * 10 + b"b" * 10
+    assert hasher.hexdigest() == hashlib.sha256(b"a" * 10 + b"b" * 10).hexdigest()
+
+    monkeypatch.setattr(downloader, "MAX_DOWNLOAD_SIZE", 15)
+    with pytest.raises(ValueError, match="maximum size"):
+        list(downloader.iter_download("https://example.com/v.mkv"))
+
+
+def test_extract_audio_reads_urls_with_reconnect(monkeypatch, tmp_path):
+    from worker.media import ffmpeg
+
+    commands = []
+
+    def run(cmd, **kwargs):
+        commands.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(ffmpeg.subprocess, "run", run)
+
+    out = str(tmp_path / "audio.mp3")
+    ffmpeg.extract_audio("http://minio:9000/vod/uploads/x/video.mkv?X-Amz-Signature=abc", out)
+    ffmpeg.extract_audio(str(tmp_path / "input_video"), out)
+
+    assert "-reconnect" in commands[0]
+    assert "-reconnect" not in commands[1]
+
+
+def test_presigned_signature_never_reaches_logs_or_errors(monkeypatch, caplog):
+    from worker.media import ffmpeg, ffprobe
+
+    url = "http://minio:9000/vod/uploads/x/video.mkv?X-Amz-Credential=key&X-Amz-Signature=abc123"
+
+    def run(cmd, **kwargs):
+        source = cmd[cmd.index("-i") + 1] if "-i" in cmd else cmd[-1]
+        if source.endswith("&slow"):
+            raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+        return subprocess.CompletedProcess(cmd, 1, "", f"[http @ 0x1] {source}: Server returned 403 Forbidden")
+
+    monkeypatch.setattr(ffmpeg.subprocess, "run", run)
+
+    errors = []
+    for call in (ffprobe.probe_media, lambda source: ffmpeg.extract_audio(source, "audio.mp3")):
+        for source in (url, url + "&slow"):
+            with pytest.raises(RuntimeError) as exc:
+                call(source)
+            errors.append(str(exc.value))
+
+    assert "http://minio:9000/vod/uploads/x/video.mkv: Server returned 403" in errors[0]
+    assert len(caplog.messages) == 2
+    assert not [text for text in errors + caplog.messages if "X-Amz" in text]
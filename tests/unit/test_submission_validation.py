@@ -54,3 +54,40 @@ class TestUrlValidation:
 
         with pytest.raises(ValueError):
             validate_url("http:///path")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class TestJsonBody:
+    """Test that malformed JSON bodies are refused with 400 rather than a server error."""
+
+    @staticmethod
+    def _request(body: bytes):
+        from starlette.requests import Request
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return Request({"type": "http", "method": "POST", "headers": []}, receive)
+
+    @pytest.mark.anyio
+    @pytest.mark.parametrize("body", [b"{not json", b'["https://example.com/v.mp4"]', b'"url"', b"\xff"])
+    async def test_invalid_bodies_are_bad_requests(self, body):
+        from app.api.jobs import _json_object
+        from fastapi import HTTPException
+
+        with pytest.raises(HTTPException) as exc_info:
+            await _json_object(self._request(body))
+
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.anyio
+    async def test_object_body_is_returned(self):
+        from app.api.jobs import _json_object
+
+        assert await _json_object(self._request(b'{"url": "https://example.com/v.mp4"}')) == {
+            "url": "https://example.com/v.mp4"
+        }
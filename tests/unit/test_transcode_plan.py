@@ -0,0 +1,110 @@
+"""Test: the transcode planner copies accepted audio and sizes encodes to the upload limit."""
+
+import subprocess
+
+import pytest
+from worker.media import ffmpeg
+
+
+def probe(codec: str, bit_rate: int | None, format_name: str = "mov,mp4,m4a,3gp,3g2,mj2", video: bool = True) -> dict:
+    streams = [{"index": 1, "codec_type": "audio", "codec_name": codec}]
+    if bit_rate is not None:
+        streams[0]["bit_rate"] = str(bit_rate)
+    if video:
+        streams.insert(0, {"index": 0, "codec_type": "video", "codec_name": "h264"})
+    return {"streams": streams, "format": {"format_name": format_name}}
+
+
+def test_aac_in_a_video_is_remuxed_without_reencoding():
+    plan = ffmpeg.plan_transcode(probe("aac", 128_000), 3600)
+
+    assert (plan.path, plan.extension, plan.content_type) == ("remux", "m4a", "audio/mp4")
+    assert "copy" in plan.codec_args
+    assert plan.codec_args[:2] == ("-map", "0:1")
+
+
+def test_audio_only_mp3_is_copied():
+    info = probe("mp3", 64_000, format_name="mp3", video=False)
+    info["streams"].append(
+        {"index": 2, "codec_type": "video", "codec_name": "mjpeg", "disposition": {"attached_pic": 1}}
+    )
+
+    plan = ffmpeg.plan_transcode(info, 1200)
+
+    assert (plan.path, plan.extension) == ("copy", "mp3")
+
+
+@pytest.mark.parametrize(
+    "info",
+    [
+        probe("aac", 320_000),  # accepted, but too large to keep
+        probe("pcm_s16le", 1_536_000),  # not an accepted codec
+        probe("opus", None),  # bitrate unknown: cannot prove it fits
+    ],
+)
+def test_other_audio_is_encoded(info):
+    assert ffmpeg.plan_transcode(info, 1200) == ffmpeg.DEFAULT_PLAN
+
+
+def test_copy_must_fit_the_upload_limit_per_request(monkeypatch):
+    monkeypatch.setattr(ffmpeg.settings, "TRANSCRIBE_CHUNK_SECONDS", 3 * 3600)
+
+    # 160 kbps for a 3-hour single request is ~216 MB; 24 kbps is the best MP3 that fits
+    plan = ffmpeg.plan_transcode(probe("aac", 160_000), 3 * 3600)
+
+    assert plan.path == "encode"
+    assert plan.codec_args[-2:] == ("-b:a", "24k")
+
+
+def test_extract_audio_uses_the_plan_and_caps_threads(monkeypatch, tmp_path):
+    commands = []
+
+    def run(cmd, **kwargs):
+        commands.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(ffmpeg.subprocess, "run", run)
+    monkeypatch.setattr(ffmpeg.settings, "TRANSCODE_THREADS", 2)
+    plan = ffmpeg.plan_transcode(probe("aac", 96_000), 600)
+
+    ffmpeg.extract_audio(str(tmp_path / "input"), str(tmp_path / "audio.m4a"), plan)
+
+    cmd = commands[0]
+    assert cmd[cmd.index("-c:a") + 1] == "copy"
+    assert "libmp3lame" not in cmd
+    assert cmd[cmd.index("-threads") + 1] == "2"
+
+
+def test_extract_timeout_grows_with_the_media(monkeypatch):
+    monkeypatch.setattr(ffmpeg.settings, "MAX_DURATION_SECONDS", 4 * 3600)
+
+    assert ffmpeg.extract_timeout(300) == ffmpeg.EXTRACT_TIMEOUT
+    assert ffmpeg.extract_timeout(4 * 3600) == 7200
+    assert ffmpeg.extract_timeout(None) == 7200  # unknown length: sized for the longest allowed
+
+    timeouts = []
+
+    def run(cmd, **kwargs):
+        timeouts.append(kwargs["timeout"])
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(ffmpeg.subprocess, "run", run)
+    ffmpeg.extract_audio("input", "audio.mp3", timeout=ffmpeg.extract_timeout(3 * 3600))
+
+    assert timeouts == [5400]
+
+
+def test_extract_audio_reports_media_time_from_ffmpeg_progress(monkeypatch, tmp_path):
+    real_popen = subprocess.Popen
+
+    def popen(cmd, **kwargs):
+        assert cmd[1:4] == ["-progress", "pipe:1", "-nostats"]
+        script = 'printf "out_time_us=1500000\\nprogress=continue\\nout_time_us=N/A\\nout_time_us=3000000\\n"'
+        return real_popen(["sh", "-c", script], **kwargs)
+
+    monkeypatch.setattr(ffmpeg.subprocess, "Popen", popen)
+    seen: list[float] = []
+
+    ffmpeg.extract_audio(str(tmp_path / "input"), str(tmp_path / "audio.mp3"), on_progress=seen.append)
+
+    assert seen == [1.5, 3.0]
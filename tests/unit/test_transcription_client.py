@@ -0,0 +1,100 @@
+"""Test: one keep-alive Whisper client per process, gated by the cluster-wide limiter."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from app.services import openai_whisper, transcription_limiter
+
+
+class StandInWhisper(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections open like the real API
+    peers: set[tuple[str, int]]
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.peers.add(self.client_address)  # type: ignore[attr-defined]
+        body = json.dumps(
+            {
+                "text": "hello there",
+                "segments": [{"id": 0, "start": 0.0, "end": 1.5, "text": " hello there", "avg_logprob": -0.1}],
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def whisper_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInWhisper)
+    server.peers = set()  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(openai_whisper.settings, "OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.setattr(openai_whisper.settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(openai_whisper.settings, "TRANSCRIBE_GLOBAL_CONCURRENCY", 0)
+    monkeypatch.setattr(openai_whisper.settings, "TRANSCRIBE_REQUESTS_PER_MINUTE", 0)
+    monkeypatch.setattr(openai_whisper, "_client", None)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_share_one_keep_alive_connection(whisper_server, tmp_path):
+    audio = tmp_path / "audio.mp3"
+    audio.write_bytes(b"\xff\xfb" * 512)
+
+    first = openai_whisper.transcribe_audio(audio)
+    second = openai_whisper.transcribe_audio(audio)
+
+    assert [s.text for s in first + second] == ["hello there", "hello there"]
+    assert first[0].end_ms == 1500
+    assert len(whisper_server.peers) == 1
+    assert openai_whisper.get_client() is openai_whisper.get_client()
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    monkeypatch.setattr(transcription_limiter.settings, "TRANSCRIBE_GLOBAL_CONCURRENCY", 2)
+    sleeps: list[float] = []
+    released: list[str] = []
+    monkeypatch.setattr(transcription_limiter.time, "sleep", sleeps.append)
+    monkeypatch.setattr(transcription_limiter, "release", released.append)
+    return sleeps, released
+
+
+def test_slot_waiters_queue_until_granted(monkeypatch, limited):
+    sleeps, released = limited
+    answers = iter([250, 1000, 0])
+    monkeypatch.setattr(transcription_limiter, "try_acquire", lambda holder: next(answers))
+
+    with transcription_limiter.transcription_slot():
+        assert released == []
+
+    assert len(sleeps) == 2
+    assert 0.25 <= sleeps[0] <= 0.3
+    assert 1.0 <= sleeps[1] <= 1.2
+    assert len(released) == 1
+
+
+def test_slot_wait_gives_up_after_queue_timeout(monkeypatch, limited):
+    _, released = limited
+    monkeypatch.setattr(transcription_limiter.settings, "TRANSCRIBE_QUEUE_TIMEOUT_SECONDS", 0)
+    monkeypatch.setattr(transcription_limiter, "try_acquire", lambda holder: 500)
+
+    with (
+        pytest.raises(transcription_limiter.TranscriptionQueueTimeoutError),
+        transcription_limiter.transcription_slot(),
+    ):
+        pytest.fail("should not get a slot")
+
+    assert released == []
+    assert isinstance(transcription_limiter.TranscriptionQueueTimeoutError(), TimeoutError)  # retried as transient
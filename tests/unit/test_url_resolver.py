@@ -0,0 +1,84 @@
+"""Test: resolve-once SSRF checks, the DNS cache and IP-pinned connections."""
+
+import socket
+
+import httpx
+import pytest
+from worker.media import resolver
+
+PUBLIC_IP = "93.184.216.34"
+
+
+@pytest.fixture
+def dns(monkeypatch):
+    """Fake DNS: hostname → addresses, counting lookups."""
+    records = {"cdn.example": [PUBLIC_IP], "internal.example": ["10.0.0.5"], "mixed.example": [PUBLIC_IP, "127.0.0.1"]}
+    lookups: list[str] = []
+
+    def getaddrinfo(host, port, family=0, type=0):
+        lookups.append(host)
+        if host not in records:
+            raise socket.gaierror("unknown host")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (ip, 0)) for ip in records[host]]
+
+    monkeypatch.setattr(resolver.socket, "getaddrinfo", getaddrinfo)
+    monkeypatch.setattr(resolver, "dns_cache", resolver.DnsCache(ttl=60))
+    return lookups
+
+
+def test_repeat_lookups_are_served_from_cache(dns, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resolver.time, "monotonic", lambda: now[0])
+
+    assert resolver.resolve_public("cdn.example") == PUBLIC_IP
+    assert resolver.resolve_public("cdn.example") == PUBLIC_IP
+    assert dns == ["cdn.example"]
+
+    now[0] += 61
+    resolver.resolve_public("cdn.example")
+    assert dns == ["cdn.example", "cdn.example"]
+
+
+@pytest.mark.parametrize("host", ["internal.example", "mixed.example", "nowhere.example", "169.254.169.254"])
+def test_private_or_unresolvable_hosts_are_refused(dns, host):
+    with pytest.raises(ValueError, match="private/reserved"):
+        resolver.resolve_public(host)
+
+
+class RecordingTransport(resolver.PinnedTransport):
+    def __init__(self, handler):
+        super().__init__()
+        self.sent: list[httpx.Request] = []
+        self._handler = handler
+
+    def _new_pool(self):
+        def record(request):
+            self.sent.append(request)
+            return self._handler(request)
+
+        return httpx.MockTransport(record)
+
+
+def test_connection_is_pinned_to_the_checked_address(dns):
+    transport = RecordingTransport(lambda request: httpx.Response(200, content=b"ok"))
+
+    with httpx.Client(transport=transport) as client:
+        assert client.get("https://cdn.example/v.mp4").content == b"ok"
+        client.get("https://cdn.example/v.mp4")
+
+    request = transport.sent[0]
+    assert request.url.host == PUBLIC_IP
+    assert request.headers["Host"] == "cdn.example"
+    assert request.extensions["sni_hostname"] == "cdn.example"
+    assert dns == ["cdn.example"]
+
+
+def test_every_redirect_hop_is_checked(dns):
+    def handler(request):
+        return httpx.Response(302, headers={"Location": "http://internal.example/latest/meta-data"})
+
+    transport = RecordingTransport(handler)
+
+    with httpx.Client(transport=transport, follow_redirects=True) as client, pytest.raises(ValueError):
+        client.get("https://cdn.example/v.mp4")
+    assert [r.url.host for r in transport.sent] == [PUBLIC_IP]
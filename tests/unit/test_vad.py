@@ -0,0 +1,65 @@
+"""Test: voice-activity regions, condensed PCM selection and the timestamp map."""
+
+from app.services.openai_whisper import WhisperSegment
+from worker.media.vad import BYTES_PER_SAMPLE, FRAME_MS, SAMPLE_RATE, SpeechMap, select_samples, speech_regions
+
+
+def _flags(pattern: str) -> list[bool]:
+    """One character per 30 ms frame: '#' speech, '.' silence."""
+    return [c == "#" for c in pattern]
+
+
+class TestSpeechRegions:
+    def test_regions_are_padded(self):
+        flags = _flags("." * 100 + "#" * 20 + "." * 100)
+
+        assert speech_regions(flags) == [(100 * FRAME_MS - 200, 120 * FRAME_MS + 200)]
+
+    def test_short_pauses_are_bridged(self):
+        flags = _flags("#" * 20 + "." * 10 + "#" * 20 + "." * 100)
+
+        assert len(speech_regions(flags)) == 1
+
+    def test_blips_are_dropped(self):
+        assert speech_regions(_flags("." * 50 + "##" + "." * 50)) == []
+
+    def test_speech_to_the_end_is_clamped(self):
+        flags = _flags("." * 50 + "#" * 50)
+
+        assert speech_regions(flags)[-1][1] == 100 * FRAME_MS
+
+
+def test_select_samples_keeps_only_regions():
+    pcm = bytes(range(256)) * 1000  # 256 kB, 8 s of 16 kHz s16le
+    blocks = [pcm[i : i + 7000] for i in range(0, len(pcm), 7000)]
+    regions = [(1000, 2000), (5000, 5500)]
+
+    kept = b"".join(select_samples(blocks, regions))
+
+    per_ms = SAMPLE_RATE // 1000 * BYTES_PER_SAMPLE
+    assert kept == pcm[1000 * per_ms : 2000 * per_ms] + pcm[5000 * per_ms : 5500 * per_ms]
+
+
+class TestSpeechMap:
+    def test_timestamps_map_back_to_original_timeline(self):
+        speech_map = SpeechMap.from_regions([(10_000, 20_000), (50_000, 55_000)])
+
+        assert speech_map.condensed_ms == 15_000
+        assert speech_map.to_original(0) == 10_000
+        assert speech_map.to_original(9_000) == 19_000
+        assert speech_map.to_original(12_000) == 52_000
+
+    def test_boundary_belongs_to_the_segment_side(self):
+        speech_map = SpeechMap.from_regions([(10_000, 20_000), (50_000, 55_000)])
+
+        assert speech_map.to_original(10_000, is_end=True) == 20_000
+        assert speech_map.to_original(10_000) == 50_000
+
+    def test_restore_rewrites_segments(self):
+        speech_map = SpeechMap.from_regions([(10_000, 20_000), (50_000, 55_000)])
+        segments = [WhisperSegment(0, 9_000, 11_000, "across the gap", None, None)]
+
+        restored = speech_map.restore(segments)
+
+        assert (restored[0].start_ms, restored[0].end_ms) == (19_000, 51_000)
+        assert restored[0].text == "across the gap"
@@ -25,6 +25,16 @@ celery_app.conf.update(
     task_always_eager=CELERY_ALWAYS_EAGER,
     task_eager_propagates=CELERY_ALWAYS_EAGER,
     broker_connection_retry_on_startup=True,
+    # Pipeline stages run on separate queues so each worker pool is sized for its bottleneck:
+    # io (downloads, MinIO transfers), cpu (ffmpeg/ffprobe), asr (Whisper API calls)
+    task_default_queue="io",
+    task_routes={
+        "worker.tasks.fetch_source": {"queue": "io"},
+        "worker.tasks.transcode_audio": {"queue": "cpu"},
+        "worker.tasks.transcribe_and_persist": {"queue": "asr"},
+    },
+    # Take one message at a time so scheduler lane priorities decide what runs next
+    worker_prefetch_multiplier=1,
 )
 
 celery_app.conf.beat_schedule = {
@@ -32,6 +42,14 @@ celery_app.conf.beat_schedule = {
         "task": "worker.tasks.retention_cleanup",
         "schedule": crontab(hour=3, minute=0),  # Run daily at 03:00 UTC
     },
+    "scheduler-dispatch": {
+        "task": "worker.tasks.dispatch_scheduled_jobs",
+        "schedule": 30.0,
+    },
+    "reap-stale-jobs": {
+        "task": "worker.tasks.reap_stale_jobs",
+        "schedule": 60.0,
+    },
 }
 
 # Auto-discover tasks
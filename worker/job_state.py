@@ -0,0 +1,319 @@
+"""Job state transitions for the worker.
+
+Every transition is a single conditional ``UPDATE ... WHERE id = ? AND status = ?
+RETURNING``, so a transition is one round trip and only one of two racing workers
+(a duplicate delivery under ``acks_late``, a retry overlapping a slow stage) wins it.
+Callers that get ``None``/``False`` back lost the race and must not touch the job.
+
+The engine is created per Celery child process on ``worker_process_init`` (and lazily
+elsewhere), never at import time, so forked children do not share pooled connections.
+"""
+
+import threading
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from typing import Any
+
+from app.config import settings
+from app.db.models import JobStatus, TranscriptionJob
+from app.logging import get_logger
+from celery.signals import worker_process_init
+from sqlalchemy import Engine, Row, create_engine, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+
+logger = get_logger(__name__)
+
+_TERMINAL = (JobStatus.completed, JobStatus.failed)
+# Checkpoints a claimed job can resume after; anything else restarts the pipeline
+_RESUMABLE_STAGES = ("fetch_source", "transcode_audio")
+
+_engine: Engine | None = None
+_SessionFactory: sessionmaker[Session] | None = None
+
+
+def init_engine(**_kwargs: Any) -> sessionmaker[Session]:
+    """(Re)create the sync engine for this process."""
+    global _engine, _SessionFactory
+    if _engine is not None:
+        # Inherited from the parent across fork: drop the pool without closing its sockets
+        _engine.dispose(close=False)
+    # Name psycopg2 explicitly: newer SQLAlchemy defaults a bare postgresql:// URL to psycopg 3
+    sync_url = settings.DATABASE_URL.replace("+asyncpg", "+psycopg2")
+    _engine = create_engine(sync_url, pool_pre_ping=True)
+    _SessionFactory = sessionmaker(bind=_engine)
+    return _SessionFactory
+
+
+worker_process_init.connect(init_engine, weak=False)
+
+
+def session() -> Session:
+    """Open a sync session, creating the engine on first use."""
+    factory = _SessionFactory or init_engine()
+    return factory()
+
+
+def _transition(db: Session, job_id: uuid.UUID, allowed: Any, values: dict, *returning: Any) -> Any:
+    stmt = (
+        update(TranscriptionJob)
+        .where(TranscriptionJob.id == job_id, allowed)
+        .values(**values)
+        .returning(TranscriptionJob.id, *returning)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).one_or_none()
+
+
+def claim(job_id: uuid.UUID) -> tuple[str | None, dict | None, str] | None:
+    """Move a queued job to processing. Returns its resumable checkpoint and claim token, or None if not queued.
+
+    The token travels with every stage message of this run. A message left over from an
+    earlier run of the job (a dead worker's unacked delivery) carries an older token and
+    is dropped by ``start_stage``.
+    """
+    token = uuid.uuid4()
+    with session() as db:
+        row = _transition(
+            db,
+            job_id,
+            TranscriptionJob.status == JobStatus.queued,
+            {
+                "status": JobStatus.processing,
+                "started_at": func.coalesce(TranscriptionJob.started_at, datetime.now(UTC)),
+                "heartbeat_at": datetime.now(UTC),
+                "dispatched_at": datetime.now(UTC),  # the caller queues the first stage next
+                "claim_token": token,
+            },
+            TranscriptionJob.pipeline_stage,
+            TranscriptionJob.pipeline_context,
+        )
+        db.commit()
+    if row is None:
+        return None
+    if row.pipeline_stage not in _RESUMABLE_STAGES or row.pipeline_context is None:
+        return None, None, str(token)
+    return row.pipeline_stage, dict(row.pipeline_context), str(token)
+
+
+def _held(claim: str | None) -> Any:
+    """Processing under ``claim``; messages from before claim tokens (None) are let through."""
+    allowed = TranscriptionJob.status == JobStatus.processing
+    if claim is not None:
+        allowed &= TranscriptionJob.claim_token == uuid.UUID(claim)
+    return allowed
+
+
+def get_active(job_id: uuid.UUID) -> TranscriptionJob | None:
+    """Load a job that is still processing, or None if it finished or was taken back."""
+    with session() as db:
+        return db.execute(
+            select(TranscriptionJob).where(
+                TranscriptionJob.id == job_id, TranscriptionJob.status == JobStatus.processing
+            )
+        ).scalar_one_or_none()
+
+
+def update_active(job_id: uuid.UUID, **values: Any) -> bool:
+    """Set columns on a job that is still processing."""
+    with session() as db:
+        row = _transition(db, job_id, TranscriptionJob.status == JobStatus.processing, values)
+        db.commit()
+    return row is not None
+
+
+def checkpoint(job_id: uuid.UUID, stage: str, ctx: dict) -> bool:
+    """Record that ``stage`` finished and what it handed on; resets the retry budget.
+
+    The next stage's message is queued once this returns, so the job counts as dispatched.
+    Only the run holding ``ctx["claim"]`` can checkpoint.
+    """
+    now = datetime.now(UTC)
+    values = {
+        "pipeline_stage": stage,
+        "pipeline_context": ctx,
+        "attempt_count": 0,
+        "heartbeat_at": now,
+        "dispatched_at": now,
+    }
+    with session() as db:
+        row = _transition(db, job_id, _held(ctx.get("claim")), values)
+        db.commit()
+    return row is not None
+
+
+def start_stage(job_id: uuid.UUID, claim: str | None) -> bool:
+    """Mark the job's queued stage as running. False when the job is not processing under ``claim``.
+
+    Starting clears ``dispatched_at``: from here on the job is alive only while it beats.
+    """
+    with session() as db:
+        row = _transition(db, job_id, _held(claim), {"heartbeat_at": datetime.now(UTC), "dispatched_at": None})
+        db.commit()
+    return row is not None
+
+
+def heartbeat(job_id: uuid.UUID) -> bool:
+    """Show that a worker is still running the job."""
+    return update_active(job_id, heartbeat_at=datetime.now(UTC))
+
+
+@contextmanager
+def keep_alive(job_id: uuid.UUID, interval: float | None = None) -> Iterator[None]:
+    """Refresh the job's heartbeat every ``JOB_HEARTBEAT_SECONDS`` while the block runs."""
+    stop = threading.Event()
+
+    def beat() -> None:
+        while not stop.wait(interval or settings.JOB_HEARTBEAT_SECONDS):
+            try:
+                if not heartbeat(job_id):
+                    return
+            except SQLAlchemyError:
+                logger.warning("Could not refresh heartbeat of job %s", job_id)
+
+    thread = threading.Thread(target=beat, name=f"heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _silent(cutoff: datetime, queued_cutoff: datetime) -> Any:
+    """Processing, no heartbeat since ``cutoff``, and not a stage message queued since ``queued_cutoff``."""
+    return (
+        (TranscriptionJob.status == JobStatus.processing)
+        & (TranscriptionJob.heartbeat_at < cutoff)
+        & (TranscriptionJob.dispatched_at.is_(None) | (TranscriptionJob.dispatched_at < queued_cutoff))
+    )
+
+
+def stale_jobs(cutoff: datetime, queued_cutoff: datetime, limit: int) -> list[uuid.UUID]:
+    """Processing jobs gone silent (see ``_silent``), stalest first."""
+    with session() as db:
+        return list(
+            db.scalars(
+                select(TranscriptionJob.id)
+                .where(_silent(cutoff, queued_cutoff))
+                .order_by(TranscriptionJob.heartbeat_at)
+                .limit(limit)
+            )
+        )
+
+
+def requeue_stale(job_id: uuid.UUID, cutoff: datetime, queued_cutoff: datetime, max_attempts: int) -> Row | None:
+    """Hand a job whose worker went silent back to the queue, counting an attempt.
+
+    Returns the job's scheduling columns, or None when the attempts are spent or a
+    heartbeat arrived since the sweep looked.
+    """
+    with session() as db:
+        row: Row | None = _transition(
+            db,
+            job_id,
+            _silent(cutoff, queued_cutoff) & (TranscriptionJob.attempt_count + 1 < max_attempts),
+            {
+                "status": JobStatus.queued,
+                "attempt_count": TranscriptionJob.attempt_count + 1,
+                "heartbeat_at": None,
+                "dispatched_at": None,
+            },
+            TranscriptionJob.user_id,
+            TranscriptionJob.duration_seconds,
+            TranscriptionJob.size_bytes,
+            TranscriptionJob.attempt_count,
+        )
+        db.commit()
+    return row
+
+
+def fail_stale(job_id: uuid.UUID, cutoff: datetime, queued_cutoff: datetime, code: str, message: str) -> bool:
+    """Fail a job whose worker went silent, unless a heartbeat arrived since the sweep looked."""
+    with session() as db:
+        row = _transition(
+            db,
+            job_id,
+            _silent(cutoff, queued_cutoff),
+            {
+                "status": JobStatus.failed,
+                "failure_code": code,
+                "failure_message": message,
+                "completed_at": datetime.now(UTC),
+            },
+        )
+        db.commit()
+    return row is not None
+
+
+def requeue(db: Session, job_id: uuid.UUID, **values: Any) -> bool:
+    """Hand a processing job back to the queue, in the caller's transaction."""
+    row = _transition(
+        db, job_id, TranscriptionJob.status == JobStatus.processing, {"status": JobStatus.queued, **values}
+    )
+    return row is not None
+
+
+def requeue_for_retry(job_id: uuid.UUID, max_attempts: int) -> int | None:
+    """Re-queue a processing job for another attempt. Returns the attempt number, or None when spent."""
+    with session() as db:
+        row = _transition(
+            db,
+            job_id,
+            (TranscriptionJob.status == JobStatus.processing) & (TranscriptionJob.attempt_count + 1 < max_attempts),
+            {"status": JobStatus.queued, "attempt_count": TranscriptionJob.attempt_count + 1},
+            TranscriptionJob.attempt_count,
+        )
+        db.commit()
+    return None if row is None else row.attempt_count
+
+
+def complete(db: Session, job_id: uuid.UUID, **values: Any) -> bool:
+    """Mark a processing job completed, in the caller's transaction.
+
+    Run it before writing results: the UPDATE row-locks the job, so a racing duplicate
+    blocks here and then finds the job already completed.
+    """
+    values = {"status": JobStatus.completed, "completed_at": datetime.now(UTC), **values}
+    row = _transition(db, job_id, TranscriptionJob.status == JobStatus.processing, values)
+    return row is not None
+
+
+def fail(job_id: uuid.UUID, code: str, message: str) -> Row | None:
+    """Mark a job failed unless it already reached a terminal state. Returns its source key column."""
+    with session() as db:
+        row: Row | None = _transition(
+            db,
+            job_id,
+            TranscriptionJob.status.not_in(_TERMINAL),
+            {
+                "status": JobStatus.failed,
+                "failure_code": code,
+                "failure_message": message,
+                "completed_at": datetime.now(UTC),
+            },
+            TranscriptionJob.original_object_key,
+        )
+        db.commit()
+    return row
+
+
+def forget_source(job_id: uuid.UUID, key: str) -> None:
+    """Clear a deleted source object from the job, with any fetch_source checkpoint that reads it.
+
+    Works in any status: a failed job retried later then fetches its source again.
+    """
+    with session() as db:
+        for condition, values in (
+            (TranscriptionJob.original_object_key == key, {"original_object_key": None}),
+            (TranscriptionJob.pipeline_stage == "fetch_source", {"pipeline_stage": None, "pipeline_context": None}),
+        ):
+            db.execute(
+                update(TranscriptionJob)
+                .where(TranscriptionJob.id == job_id, condition)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
@@ -0,0 +1,71 @@
+"""Split long audio at silences so it can be transcribed in parallel chunks."""
+
+import os
+
+from app.config import settings
+from app.logging import get_logger
+from app.services.openai_whisper import AudioChunk
+
+logger = get_logger(__name__)
+
+# Cut at the latest silence in the back half of a chunk window; fall back to a hard
+# cut with this much lead-in overlap when the window has no silence at all.
+MIN_CHUNK_FRACTION = 0.5
+HARD_CUT_OVERLAP_SECONDS = 2.0
+
+
+def plan_chunks(
+    duration_s: float,
+    silences: list[tuple[float, float]],
+    chunk_seconds: float,
+    overlap_s: float = HARD_CUT_OVERLAP_SECONDS,
+) -> list[tuple[float, float, float]]:
+    """Plan ``(start, end, read_start)`` seconds for each chunk of a recording.
+
+    Chunks never exceed ``chunk_seconds`` (plus overlap), so each request stays well
+    under the Whisper upload limit.
+    """
+    cut_points = [(s + e) / 2 for s, e in silences]
+    plan: list[tuple[float, float, float]] = []
+    start, read_start = 0.0, 0.0
+    while duration_s - start > chunk_seconds:
+        window_end = start + chunk_seconds
+        window_start = start + chunk_seconds * MIN_CHUNK_FRACTION
+        candidates = [p for p in cut_points if window_start <= p <= window_end]
+        if candidates:
+            end = max(candidates)
+            next_read_start = end
+        else:
+            end = window_end
+            next_read_start = max(start, end - overlap_s)
+        plan.append((start, end, read_start))
+        start, read_start = end, next_read_start
+    plan.append((start, duration_s, read_start))
+    return plan
+
+
+def split_audio(audio_path: str, duration_s: float | None, workdir: str) -> list[AudioChunk]:
+    """Split ``audio_path`` into chunks for parallel transcription.
+
+    Audio no longer than one chunk is returned whole without running ffmpeg.
+    """
+    from worker.media.ffmpeg import cut_audio, detect_silences
+
+    chunk_seconds = settings.TRANSCRIBE_CHUNK_SECONDS
+    if duration_s is None or duration_s <= chunk_seconds:
+        return [AudioChunk(path=audio_path, start_ms=0, end_ms=int((duration_s or 0) * 1000), read_start_ms=0)]
+
+    plan = plan_chunks(duration_s, detect_silences(audio_path), chunk_seconds)
+    # Chunks are stream copies, so they keep the codec and container of the source audio
+    extension = os.path.splitext(audio_path)[1] or ".mp3"
+    chunks: list[AudioChunk] = []
+    for idx, (start, end, read_start) in enumerate(plan):
+        path = os.path.join(workdir, f"chunk_{idx:04d}{extension}")
+        cut_audio(audio_path, read_start, end, path)
+        chunks.append(
+            AudioChunk(
+                path=path, start_ms=int(start * 1000), end_ms=int(end * 1000), read_start_ms=int(read_start * 1000)
+            )
+        )
+    logger.info("Split %.0fs of audio into %d chunks", duration_s, len(chunks))
+    return chunks
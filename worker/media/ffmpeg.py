@@ -1,36 +1,302 @@
 """FFmpeg helper — extract and transcode audio."""
 
+import re
 import subprocess
+import tempfile
+import threading
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
 
+from app.config import settings
 from app.logging import get_logger
 
+from worker.media.ffprobe import scrub, source_label
+
 logger = get_logger(__name__)
 
+EXTRACT_TIMEOUT = 600
+# Extraction reads the source over HTTP and may re-encode; allow this much wall time per media second
+EXTRACT_SECONDS_PER_MEDIA_SECOND = 0.5
+
+_AUDIO_ARGS = [
+    "-vn",  # No video
+    "-acodec",
+    "libmp3lame",  # MP3 codec
+    "-ar",
+    "16000",  # 16 kHz sample rate
+    "-ac",
+    "1",  # Mono
+    "-b:a",
+    "48k",  # 48 kbps bitrate
+]
+
+
+# Whisper rejects uploads above 25 MB; plans keep every request under this share of it
+WHISPER_UPLOAD_LIMIT_BYTES = 25 * 1024 * 1024
+UPLOAD_HEADROOM = 0.9
+# Accepted audio above this bitrate is re-encoded anyway, to keep storage and uploads small
+COPY_MAX_BITRATE = 160_000
+# 16 kHz mono MP3 bitrates, best first; the first one that fits the longest request wins
+ENCODE_BITRATES_KBPS = (48, 40, 32, 24)
+
+# Codecs the transcription API accepts as-is → (file extension, ffmpeg muxer, Content-Type)
+_COPYABLE_CODECS = {
+    "mp3": ("mp3", "mp3", "audio/mpeg"),
+    "aac": ("m4a", "ipod", "audio/mp4"),
+    "opus": ("ogg", "ogg", "audio/ogg"),
+    "vorbis": ("ogg", "ogg", "audio/ogg"),
+}
+# ffprobe format names that already are the target container of a copyable codec
+_NATIVE_FORMATS = {"mp3": "mp3", "m4a": "mov", "ogg": "ogg"}
+
+
+@dataclass(frozen=True)
+class TranscodePlan:
+    """How to turn a source into the audio sent for transcription.
+
+    ``path`` is ``copy`` (audio-only source already in the target container), ``remux``
+    (the audio stream copied into a new container, dropping video) or ``encode``.
+    """
+
+    path: str
+    extension: str
+    content_type: str
+    codec_args: tuple[str, ...]
+
+
+def _encode_plan(kbps: int) -> TranscodePlan:
+    return TranscodePlan("encode", "mp3", "audio/mpeg", (*_AUDIO_ARGS[:-2], "-b:a", f"{kbps}k"))
+
+
+DEFAULT_PLAN = _encode_plan(48)
+
+
+def _bitrate(info: dict, stream: dict) -> int | None:
+    rate = stream.get("bit_rate")
+    if rate is None and len(info.get("streams", [])) == 1:
+        rate = info.get("format", {}).get("bit_rate")
+    try:
+        return int(rate) if rate is not None else None
+    except ValueError:
+        return None
+
+
+def _request_seconds(duration_s: float) -> float:
+    """Longest audio sent in one request: the whole file, or one chunk plus hard-cut lead-in."""
+    from worker.media.chunking import HARD_CUT_OVERLAP_SECONDS
+
+    chunk_seconds = settings.TRANSCRIBE_CHUNK_SECONDS
+    return duration_s if duration_s <= chunk_seconds else chunk_seconds + HARD_CUT_OVERLAP_SECONDS
+
+
+def _fits(bits_per_second: float, duration_s: float) -> bool:
+    return bits_per_second / 8 * _request_seconds(duration_s) <= WHISPER_UPLOAD_LIMIT_BYTES * UPLOAD_HEADROOM
+
+
+def plan_transcode(info: dict, duration_s: float | None) -> TranscodePlan:
+    """Pick the cheapest way to get transcribable audio out of an ffprobe result.
+
+    An audio stream the API accepts is stream-copied (no decode, no encode) when its
+    bitrate is known, modest, and every request cut from it stays under the upload
+    limit. Anything else is encoded to MP3 at the best bitrate that fits.
+    """
+    streams = info.get("streams", [])
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    if audio is None or duration_s is None:
+        return DEFAULT_PLAN
+
+    target = _COPYABLE_CODECS.get(audio.get("codec_name", ""))
+    bitrate = _bitrate(info, audio)
+    if target is not None and bitrate is not None and bitrate <= COPY_MAX_BITRATE and _fits(bitrate, duration_s):
+        extension, muxer, content_type = target
+        # Cover art shows up as a video stream with the attached_pic disposition
+        audio_only = all(
+            s.get("codec_type") != "video" or s.get("disposition", {}).get("attached_pic") for s in streams
+        )
+        native = _NATIVE_FORMATS[extension] in info.get("format", {}).get("format_name", "").split(",")
+        path = "copy" if audio_only and native else "remux"
+        args = ("-map", f"0:{audio.get('index', 'a:0')}", "-vn", "-sn", "-dn", "-c:a", "copy", "-f", muxer)
+        return TranscodePlan(path, extension, content_type, args)
+
+    kbps = next((k for k in ENCODE_BITRATES_KBPS if _fits(k * 1000, duration_s)), ENCODE_BITRATES_KBPS[-1])
+    return _encode_plan(kbps)
+
+
+def _thread_args() -> list[str]:
+    return ["-threads", str(settings.TRANSCODE_THREADS)] if settings.TRANSCODE_THREADS > 0 else []
 
-def extract_audio(input_path: str, output_path: str) -> None:
-    """Extract audio from video, transcode to mono 16kHz MP3 at 48kbps.
 
-    This ensures the output stays well under OpenAI's 25MB limit for 30-minute videos.
-    30 min × 48 kbps ≈ 10.8 MB.
+# Presigned MinIO sources are read over HTTP; ride out dropped connections mid-transcode
+_HTTP_INPUT_ARGS = ["-reconnect", "1", "-reconnect_on_network_error", "1", "-reconnect_delay_max", "5"]
+
+
+class TranscodeError(RuntimeError):
+    """ffmpeg could not produce the audio track."""
+
+
+def extract_timeout(duration_s: float | None) -> float:
+    """How long ffmpeg may take to extract ``duration_s`` of media; unknown lengths get the maximum's."""
+    if duration_s is None:
+        duration_s = settings.MAX_DURATION_SECONDS
+    return max(EXTRACT_TIMEOUT, duration_s * EXTRACT_SECONDS_PER_MEDIA_SECOND)
+
+
+def extract_audio(
+    input_path: str,
+    output_path: str,
+    plan: TranscodePlan = DEFAULT_PLAN,
+    on_progress: Callable[[float], None] | None = None,
+    timeout: float = EXTRACT_TIMEOUT,
+) -> None:
+    """Extract audio from a video file or URL as ``plan`` says; by default mono 16kHz MP3 at 48kbps.
+
+    At 48 kbps a 10-minute transcription chunk is about 3.6 MB, well under OpenAI's 25MB limit.
+    ``on_progress`` is called with the seconds of media processed so far. Long sources
+    should pass ``timeout=extract_timeout(duration)``.
+    """
+    input_args = _HTTP_INPUT_ARGS if input_path.startswith(("http://", "https://")) else []
+    cmd = ["ffmpeg", "-y", *input_args, "-i", input_path, *plan.codec_args, *_thread_args(), output_path]
+    if on_progress is None:
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise TranscodeError("ffmpeg audio extraction timed out") from None
+        returncode, stderr = result.returncode, result.stderr
+    else:
+        returncode, stderr = _run_with_progress(cmd, on_progress, timeout)
+    if returncode != 0:
+        stderr = scrub(stderr, input_path)
+        logger.warning("ffmpeg failed: %s", stderr[:500])
+        raise TranscodeError(f"ffmpeg audio extraction failed: {stderr[:200]}")
+    logger.info("Extracted audio (%s): %s -> %s", plan.path, source_label(input_path), output_path)
+
+
+def _run_with_progress(cmd: list[str], on_progress: Callable[[float], None], timeout: float) -> tuple[int, str]:
+    """Run ffmpeg with ``-progress`` on stdout, reporting media time as it advances.
+
+    Returns the exit code and stderr. The process is killed after ``timeout`` seconds.
+    """
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr, text=True)
+        watchdog = threading.Timer(timeout, proc.kill)
+        watchdog.start()
+        try:
+            for line in proc.stdout or ():
+                key, _, value = line.strip().partition("=")
+                if key == "out_time_us" and value.isdigit():
+                    on_progress(int(value) / 1_000_000)
+        except BaseException:
+            proc.kill()
+            raise
+        finally:
+            returncode = proc.wait()
+            watchdog.cancel()
+        stderr.seek(0)
+        return returncode, stderr.read().decode(errors="replace")
+
+
+def extract_audio_from_stream(chunks: Iterator[bytes], output_path: str, input_args: list[str] | None = None) -> None:
+    """Extract audio from a video fed to ffmpeg's stdin, so the source never touches disk.
+
+    Only works for containers that decode front to back (MKV/WebM, MP4/MOV with the
+    moov atom first). Errors raised by ``chunks`` (download failures, size limits)
+    propagate unchanged after ffmpeg is stopped; ffmpeg failures raise TranscodeError.
+    ffmpeg must consume the whole input, so callers hashing ``chunks`` see every byte.
+    ``input_args`` describe headerless input such as raw PCM (``-f s16le ...``).
     """
+    cmd = ["ffmpeg", "-y", *(input_args or []), "-i", "pipe:0", *_AUDIO_ARGS, *_thread_args(), output_path]
+    # stderr goes to a file rather than a pipe so a chatty ffmpeg can never block on it
+    # while we are blocked writing its stdin
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr)
+        stdin = proc.stdin
+        if stdin is None:
+            raise TranscodeError("ffmpeg stdin unavailable")
+        truncated = False
+        try:
+            for chunk in chunks:
+                stdin.write(chunk)
+        except BrokenPipeError:
+            truncated = True  # ffmpeg exited before the end of the input
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            raise
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            try:
+                stdin.close()
+            except BrokenPipeError:
+                truncated = True
+
+        try:
+            returncode = proc.wait(timeout=EXTRACT_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            raise TranscodeError("ffmpeg audio extraction timed out") from None
+
+        if returncode != 0 or truncated:
+            stderr.seek(0)
+            message = stderr.read().decode(errors="replace")
+            logger.warning("ffmpeg failed: %s", message[-500:])
+            raise TranscodeError(f"ffmpeg audio extraction failed: {message[-200:]}")
+    logger.info("Extracted audio from stream -> %s", output_path)
+
+
+_SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end: (-?[\d.]+)")
+
+
+def detect_silences(audio_path: str, noise_db: int = -35, min_duration: float = 0.4) -> list[tuple[float, float]]:
+    """Return ``(start, end)`` seconds of each silence ffmpeg's silencedetect finds."""
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-nostats",
+        "-i",
+        audio_path,
+        "-af",
+        f"silencedetect=noise={noise_db}dB:d={min_duration}",
+        "-f",
+        "null",
+        "-",
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=EXTRACT_TIMEOUT)
+    if result.returncode != 0:
+        logger.warning("ffmpeg silencedetect failed: %s", result.stderr[:500])
+        raise TranscodeError(f"ffmpeg silence detection failed: {result.stderr[:200]}")
+
+    silences: list[tuple[float, float]] = []
+    start: float | None = None
+    for line in result.stderr.splitlines():
+        if (match := _SILENCE_START.search(line)) is not None:
+            start = max(0.0, float(match.group(1)))
+        elif (match := _SILENCE_END.search(line)) is not None and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    return silences
+
+
+def cut_audio(audio_path: str, start_s: float, end_s: float, output_path: str) -> None:
+    """Copy ``[start_s, end_s)`` of an audio file into a new file without re-encoding."""
     cmd = [
         "ffmpeg",
         "-y",
+        "-ss",
+        f"{start_s:.3f}",
+        "-to",
+        f"{end_s:.3f}",
         "-i",
-        input_path,
-        "-vn",  # No video
-        "-acodec",
-        "libmp3lame",  # MP3 codec
-        "-ar",
-        "16000",  # 16 kHz sample rate
-        "-ac",
-        "1",  # Mono
-        "-b:a",
-        "48k",  # 48 kbps bitrate
+        audio_path,
+        "-c",
+        "copy",
         output_path,
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=EXTRACT_TIMEOUT)
     if result.returncode != 0:
-        logger.warning("ffmpeg failed: %s", result.stderr[:500])
-        raise RuntimeError(f"ffmpeg audio extraction failed: {result.stderr[:200]}")
-    logger.info("Extracted audio: %s -> %s", input_path, output_path)
+        logger.warning("ffmpeg cut failed: %s", result.stderr[:500])
+        raise TranscodeError(f"ffmpeg audio cut failed: {result.stderr[:200]}")
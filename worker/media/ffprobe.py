@@ -8,8 +8,18 @@ from app.logging import get_logger
 logger = get_logger(__name__)
 
 
+def source_label(source: str) -> str:
+    """Loggable form of a path or URL: presigned query strings carry credentials."""
+    return source.split("?", 1)[0]
+
+
+def scrub(text: str, source: str) -> str:
+    """``text`` with ``source`` in its loggable form; ffmpeg and ffprobe echo their input in errors."""
+    return text.replace(source, source_label(source))
+
+
 def probe_media(file_path: str) -> dict:
-    """Run ffprobe on a file and return parsed JSON output."""
+    """Run ffprobe on a file or HTTP(S) URL and return parsed JSON output."""
     cmd = [
         "ffprobe",
         "-v",
@@ -20,31 +30,42 @@ def probe_media(file_path: str) -> dict:
         "-show_streams",
         file_path,
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+    except subprocess.TimeoutExpired:
+        # The stock message repeats the whole command line, presigned URL included
+        raise RuntimeError(f"ffprobe timed out on {source_label(file_path)}") from None
     if result.returncode != 0:
-        logger.warning("ffprobe failed: %s", result.stderr[:500])
-        raise RuntimeError(f"ffprobe failed: {result.stderr[:200]}")
+        stderr = scrub(result.stderr, file_path)
+        logger.warning("ffprobe failed: %s", stderr[:500])
+        raise RuntimeError(f"ffprobe failed: {stderr[:200]}")
     return dict(json.loads(result.stdout))
 
 
+def duration_from(info: dict) -> int | None:
+    """Duration in seconds (rounded down) from a ``probe_media`` result."""
+    duration_str = info.get("format", {}).get("duration")
+    return int(float(duration_str)) if duration_str else None
+
+
+def has_audio_stream(info: dict) -> bool:
+    """Whether a ``probe_media`` result has at least one audio stream."""
+    return any(s.get("codec_type") == "audio" for s in info.get("streams", []))
+
+
 def get_duration_seconds(file_path: str) -> int | None:
     """Get duration of the media file in seconds (rounded)."""
     try:
-        info = probe_media(file_path)
-        duration_str = info.get("format", {}).get("duration")
-        if duration_str:
-            return int(float(duration_str))
+        return duration_from(probe_media(file_path))
     except Exception:
-        logger.exception("Failed to get duration for %s", file_path)
+        logger.exception("Failed to get duration for %s", source_label(file_path))
     return None
 
 
 def has_audio(file_path: str) -> bool:
     """Check if the media file has at least one audio stream."""
     try:
-        info = probe_media(file_path)
-        streams = info.get("streams", [])
-        return any(s.get("codec_type") == "audio" for s in streams)
+        return has_audio_stream(probe_media(file_path))
     except Exception:
-        logger.exception("Failed to check audio for %s", file_path)
+        logger.exception("Failed to check audio for %s", source_label(file_path))
         return False
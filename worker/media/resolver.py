@@ -0,0 +1,123 @@
+"""Resolve-once SSRF guard: cached DNS, address checks and IP-pinned httpx connections.
+
+A hostname is resolved once (then served from a small TTL cache), every address it
+resolves to is checked, and the connection goes to the checked address. httpx never
+resolves the name itself, so a DNS answer cannot change between the check and the
+connect (DNS rebinding). ``PinnedTransport`` sits below httpx's redirect handling, so
+every redirect hop is checked and pinned the same way.
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+
+ALLOWED_SCHEMES = {"http", "https"}
+DNS_CACHE_TTL_SECONDS = 60
+DNS_CACHE_MAX_ENTRIES = 256
+
+
+def is_blocked_address(ip: ipaddress.IPv4Address | ipaddress.IPv6Address) -> bool:
+    """Whether ``ip`` is private, loopback, reserved or link-local."""
+    return ip.is_private or ip.is_loopback or ip.is_reserved or ip.is_link_local
+
+
+class DnsCache:
+    """Thread-safe hostname → addresses cache with a fixed TTL and LRU eviction."""
+
+    def __init__(self, ttl: float = DNS_CACHE_TTL_SECONDS, max_entries: int = DNS_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str) -> list[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(host)
+                return entry[1]
+
+        infos = socket.getaddrinfo(host, None, socket.AF_UNSPEC, socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(str(sockaddr[0]) for _, _, _, _, sockaddr in infos))
+        with self._lock:
+            self._entries[host] = (now + self.ttl, addresses)
+            self._entries.move_to_end(host)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return addresses
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+dns_cache = DnsCache()
+
+
+def resolve_public(host: str) -> str:
+    """Return an address of ``host`` that is safe to connect to.
+
+    Raises ValueError when the host cannot be resolved or any of its addresses is
+    private/reserved; a name with one public and one internal address is refused.
+    """
+    try:
+        addresses = [str(ipaddress.ip_address(host))]
+    except ValueError:
+        try:
+            addresses = dns_cache.resolve(host)
+        except (socket.gaierror, UnicodeError):
+            addresses = []
+    try:
+        parsed = [ipaddress.ip_address(address.split("%", 1)[0]) for address in addresses]
+    except ValueError:
+        parsed = []
+    if not parsed or any(is_blocked_address(ip) for ip in parsed):
+        raise ValueError("URL points to a private/reserved address")
+    return str(parsed[0])
+
+
+class PinnedTransport(httpx.BaseTransport):
+    """httpx transport that connects to the validated address instead of resolving again.
+
+    The request keeps its original Host header and TLS server name, so virtual hosting
+    and certificate checks work as usual. Each hostname gets its own connection pool,
+    so a TLS connection verified for one name is never reused for another on the same IP.
+    """
+
+    def __init__(self, **transport_kwargs):
+        self._transport_kwargs = transport_kwargs
+        self._pools: dict[str, httpx.BaseTransport] = {}
+        self._lock = threading.Lock()
+
+    def _new_pool(self) -> httpx.BaseTransport:
+        return httpx.HTTPTransport(**self._transport_kwargs)
+
+    def _pool(self, host: str) -> httpx.BaseTransport:
+        with self._lock:
+            pool = self._pools.get(host)
+            if pool is None:
+                pool = self._pools[host] = self._new_pool()
+            return pool
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.scheme not in ALLOWED_SCHEMES:
+            raise ValueError(f"Unsupported scheme: {request.url.scheme}")
+        host = request.url.host
+        if not host:
+            raise ValueError("No hostname in URL")
+        address = resolve_public(host)
+        if address != host:
+            request.url = request.url.copy_with(host=address)
+            request.extensions = {**request.extensions, "sni_hostname": host}
+        return self._pool(host).handle_request(request)
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
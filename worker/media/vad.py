@@ -0,0 +1,202 @@
+"""Voice-activity pre-pass — drop intros, music beds and dead air before transcription.
+
+The extracted audio is decoded to 16 kHz mono PCM and scored per 30 ms frame by
+energy and zero-crossing rate (NumPy, from the optional ``vad`` extra). Speech
+regions are re-encoded back to back into a condensed file, and a ``SpeechMap``
+translates timestamps on the condensed timeline back to the original recording.
+"""
+
+import bisect
+import subprocess
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, replace
+
+from app.logging import get_logger
+from app.services.openai_whisper import WhisperSegment
+
+logger = get_logger(__name__)
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2  # s16le
+FRAME_MS = 30
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+_READ_FRAMES = 1000  # decode 30 s of PCM at a time
+
+# A frame is speech when it is this far above the recording's noise floor...
+SPEECH_ABOVE_FLOOR_DB = 10.0
+MIN_SPEECH_DBFS = -50.0
+# ...and not dominated by zero crossings (hiss, cymbals)
+MAX_SPEECH_ZCR = 0.5
+# Smoothing: pad each region, bridge short pauses, drop blips
+PAD_MS = 200
+MIN_GAP_MS = 300
+MIN_SPEECH_MS = 250
+# Not worth a second encode unless at least this share of the audio is dropped
+MIN_SAVINGS = 0.1
+
+_PCM_ARGS = ["-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE)]
+
+
+@dataclass
+class SpeechMap:
+    """Where each kept region sits on the condensed and the original timeline (ms)."""
+
+    condensed_starts: list[int]
+    original_starts: list[int]
+    lengths: list[int]
+
+    @classmethod
+    def from_regions(cls, regions: list[tuple[int, int]]) -> "SpeechMap":
+        condensed, original, lengths = [], [], []
+        cursor = 0
+        for start, end in regions:
+            condensed.append(cursor)
+            original.append(start)
+            lengths.append(end - start)
+            cursor += end - start
+        return cls(condensed, original, lengths)
+
+    @property
+    def condensed_ms(self) -> int:
+        return sum(self.lengths)
+
+    def to_original(self, ms: int, is_end: bool = False) -> int:
+        """Map a condensed timestamp to the original timeline.
+
+        A timestamp on a region boundary belongs to the region before it when it ends a
+        segment and to the region after it when it starts one.
+        """
+        if not self.condensed_starts:
+            return ms
+        find = bisect.bisect_left if is_end else bisect.bisect_right
+        idx = max(0, find(self.condensed_starts, ms) - 1)
+        offset = min(max(ms - self.condensed_starts[idx], 0), self.lengths[idx])
+        return self.original_starts[idx] + offset
+
+    def restore(self, segments: list[WhisperSegment]) -> list[WhisperSegment]:
+        """Return copies of ``segments`` with timestamps on the original timeline."""
+        return [
+            replace(seg, start_ms=self.to_original(seg.start_ms), end_ms=self.to_original(seg.end_ms, is_end=True))
+            for seg in segments
+        ]
+
+
+def speech_regions(flags: Iterable[bool], frame_ms: int = FRAME_MS) -> list[tuple[int, int]]:
+    """Turn per-frame speech flags into padded, merged ``[start, end)`` ms regions."""
+    raw: list[tuple[int, int]] = []
+    start: int | None = None
+    total = 0
+    for idx, is_speech in enumerate(flags):
+        total = idx + 1
+        if is_speech and start is None:
+            start = idx
+        elif not is_speech and start is not None:
+            raw.append((start * frame_ms, idx * frame_ms))
+            start = None
+    if start is not None:
+        raw.append((start * frame_ms, total * frame_ms))
+
+    end_ms = total * frame_ms
+    merged: list[tuple[int, int]] = []
+    for r_start, r_end in raw:
+        if r_end - r_start < MIN_SPEECH_MS:
+            continue
+        r_start, r_end = max(0, r_start - PAD_MS), min(end_ms, r_end + PAD_MS)
+        if merged and r_start - merged[-1][1] < MIN_GAP_MS:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], r_end))
+        else:
+            merged.append((r_start, r_end))
+    return merged
+
+
+def select_samples(blocks: Iterable[bytes], regions: list[tuple[int, int]]) -> Iterator[bytes]:
+    """Yield only the PCM bytes that fall inside ``regions`` (ms, sorted)."""
+    bounds = [
+        (s * SAMPLE_RATE // 1000 * BYTES_PER_SAMPLE, e * SAMPLE_RATE // 1000 * BYTES_PER_SAMPLE) for s, e in regions
+    ]
+    position = 0
+    idx = 0
+    for block in blocks:
+        block_end = position + len(block)
+        while idx < len(bounds) and bounds[idx][0] < block_end:
+            start, end = bounds[idx]
+            lo, hi = max(start, position), min(end, block_end)
+            if hi > lo:
+                yield block[lo - position : hi - position]
+            if end > block_end:
+                break
+            idx += 1
+        position = block_end
+        if idx >= len(bounds):
+            return
+
+
+def _iter_pcm(audio_path: str, block_bytes: int = FRAME_SAMPLES * BYTES_PER_SAMPLE * _READ_FRAMES) -> Iterator[bytes]:
+    """Decode ``audio_path`` to 16 kHz mono s16le PCM, streamed in blocks."""
+    cmd = ["ffmpeg", "-hide_banner", "-nostats", "-i", audio_path, *_PCM_ARGS, "pipe:1"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    stdout = proc.stdout
+    if stdout is None:
+        raise RuntimeError("ffmpeg stdout unavailable")
+    finished = False
+    try:
+        while block := stdout.read(block_bytes):
+            yield block
+        finished = True
+    finally:
+        stdout.close()
+        if not finished:
+            proc.kill()  # the consumer stopped early
+        proc.wait()
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg PCM decode failed with exit code {proc.returncode}")
+
+
+def frame_flags(audio_path: str) -> list[bool]:
+    """Classify every 30 ms frame of ``audio_path`` as speech or not."""
+    import numpy as np
+
+    db_parts, zcr_parts = [], []
+    for block in _iter_pcm(audio_path):
+        samples = np.frombuffer(block, dtype="<i2")
+        usable = len(samples) - len(samples) % FRAME_SAMPLES
+        if not usable:
+            continue
+        frames = samples[:usable].reshape(-1, FRAME_SAMPLES).astype(np.float32) / 32768.0
+        energy = np.mean(frames * frames, axis=1)
+        db_parts.append(10.0 * np.log10(energy + 1e-10))
+        signs = np.signbit(frames)
+        zcr_parts.append(np.mean(signs[:, 1:] != signs[:, :-1], axis=1))
+    if not db_parts:
+        return []
+
+    db = np.concatenate(db_parts)
+    zcr = np.concatenate(zcr_parts)
+    threshold = max(float(np.percentile(db, 10)) + SPEECH_ABOVE_FLOOR_DB, MIN_SPEECH_DBFS)
+    return [bool(flag) for flag in (db > threshold) & (zcr < MAX_SPEECH_ZCR)]
+
+
+def condense_speech(audio_path: str, output_path: str) -> SpeechMap | None:
+    """Write only the speech in ``audio_path`` to ``output_path``.
+
+    Returns the map back to the original timeline, or None when the pre-pass is
+    unavailable (NumPy missing) or would not drop enough audio to be worth it.
+    """
+    try:
+        flags = frame_flags(audio_path)
+    except ImportError:
+        logger.warning("VAD_ENABLED is set but NumPy is not installed; install the 'vad' extra")
+        return None
+
+    regions = speech_regions(flags)
+    total_ms = len(flags) * FRAME_MS
+    speech_map = SpeechMap.from_regions(regions)
+    if not regions or speech_map.condensed_ms > total_ms * (1 - MIN_SAVINGS):
+        logger.info("VAD kept %d of %d ms; transcribing the full audio", speech_map.condensed_ms, total_ms)
+        return None
+
+    from worker.media.ffmpeg import extract_audio_from_stream
+
+    extract_audio_from_stream(select_samples(_iter_pcm(audio_path), regions), output_path, input_args=_PCM_ARGS)
+    logger.info("VAD kept %d of %d ms of audio in %d speech regions", speech_map.condensed_ms, total_ms, len(regions))
+    return speech_map
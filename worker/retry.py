@@ -0,0 +1,39 @@
+"""Classify pipeline errors as transient and compute retry backoff."""
+
+import httpx
+import openai
+from app.config import settings
+from minio.error import S3Error
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+
+from worker.media.downloader import SourceChangedError
+
+MAX_BACKOFF_SECONDS = 15 * 60
+
+# S3 error codes MinIO returns for overload or a node restarting
+_TRANSIENT_S3_CODES = {
+    "InternalError",
+    "ServiceUnavailable",
+    "SlowDown",
+    "RequestTimeout",
+    "XMinioServerNotInitialized",
+}
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether a failure is worth retrying as-is: network blips, rate limits, 5xx responses."""
+    if isinstance(exc, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    if isinstance(exc, S3Error):
+        return exc.code in _TRANSIENT_S3_CODES
+    # A source replaced mid-download is simply fetched again
+    return isinstance(exc, (Urllib3HTTPError, ConnectionError, TimeoutError, SourceChangedError))
+
+
+def backoff_seconds(attempt: int) -> int:
+    """Exponential backoff for the ``attempt``-th retry (1-based), capped."""
+    return min(settings.PIPELINE_RETRY_BACKOFF_SECONDS << max(attempt - 1, 0), MAX_BACKOFF_SECONDS)
@@ -0,0 +1,130 @@
+"""Execution leases: at most one live run of each pipeline stage per job.
+
+Stage tasks are ``acks_late``, so a message is redelivered when its worker dies, or
+when the broker's visibility timeout passes while a long stage is still running.
+Before a stage starts it takes a lease in Redis (``SET NX PX``). A heartbeat thread
+renews the lease while the stage runs. A second delivery that finds a live lease exits
+at once instead of downloading, transcoding and paying for the same job again. A
+killed worker stops renewing, so its lease expires after ``STAGE_LEASE_SECONDS`` and
+the redelivered message can take over.
+
+The lease is long gone by the time the broker's visibility timeout (an hour by default)
+redelivers a dead worker's message. By then the reaper may have requeued the job
+(``JOB_STALE_SECONDS``) and started a new run. Stage messages therefore carry the claim
+token of the run that queued them, and ``job_state.start_stage`` drops any whose token
+is no longer current.
+"""
+
+import threading
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import redis
+from app.config import settings
+from app.logging import get_logger
+from redis.commands.core import Script
+
+logger = get_logger(__name__)
+
+LEASE_PREFIX = "stage-lease:"
+
+# Renew or release only while we still hold the lease, never someone else's
+_RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_redis: redis.Redis | None = None
+_renew_script: Script | None = None
+_release_script: Script | None = None
+
+
+def _client() -> tuple[redis.Redis, Script, Script]:
+    global _redis, _renew_script, _release_script
+    if _redis is None or _renew_script is None or _release_script is None:
+        _redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=5, socket_connect_timeout=5)
+        _renew_script = _redis.register_script(_RENEW_LUA)
+        _release_script = _redis.register_script(_RELEASE_LUA)
+    return _redis, _renew_script, _release_script
+
+
+def lease_key(job_id: uuid.UUID | str, stage: str) -> str:
+    return f"{LEASE_PREFIX}{job_id}:{stage}"
+
+
+class StageLease:
+    """One execution's claim on a (job, stage), renewed from a background thread."""
+
+    def __init__(self, job_id: uuid.UUID | str, stage: str, ttl_seconds: float | None = None):
+        self.key = lease_key(job_id, stage)
+        self.holder = uuid.uuid4().hex
+        self.ttl_ms = int((ttl_seconds or settings.STAGE_LEASE_SECONDS) * 1000)
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def acquire(self) -> bool:
+        """Take the lease and start renewing it. False when another execution holds it."""
+        client, _, _ = _client()
+        if not client.set(self.key, self.holder, nx=True, px=self.ttl_ms):
+            return False
+        self._thread = threading.Thread(target=self._heartbeat, name=f"lease-{self.key}", daemon=True)
+        self._thread.start()
+        return True
+
+    def _heartbeat(self) -> None:
+        # Renew three times per TTL, so one slow round trip cannot let the lease lapse
+        while not self._stop.wait(self.ttl_ms / 3000):
+            _, renew, _ = _client()
+            try:
+                renewed = renew(keys=[self.key], args=[self.holder, self.ttl_ms])
+            except redis.RedisError as exc:
+                logger.warning("Could not renew lease %s: %s", self.key, exc)
+                continue
+            if not renewed:
+                # Expired or taken over; the job's DB transitions still stop a double commit
+                logger.warning("Lost lease %s while the stage was still running", self.key)
+                self.lost = True
+                return
+
+    def release(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        _, _, release = _client()
+        try:
+            release(keys=[self.key], args=[self.holder])
+        except redis.RedisError:
+            logger.warning("Could not release lease %s; it will expire", self.key)
+
+
+@contextmanager
+def hold(job_id: uuid.UUID | str, stage: str) -> Iterator[bool]:
+    """Hold the stage's lease for the block. Yields False when another execution is running it.
+
+    Without Redis the stage runs unguarded (yields True): the job's conditional state
+    transitions still keep a duplicate from completing it twice.
+    """
+    lease = StageLease(job_id, stage)
+    try:
+        acquired = lease.acquire()
+    except redis.RedisError as exc:
+        logger.warning("Could not take lease %s, running unguarded: %s", lease.key, exc)
+        yield True
+        return
+    if not acquired:
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        lease.release()
@@ -1,235 +1,622 @@
 """Celery tasks for VOD transcription processing."""
 
+import hashlib
 import os
 import tempfile
 import uuid
+from collections.abc import Callable
+from dataclasses import asdict
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
+from typing import Any
 
 from app.config import settings
 from app.db.models import (
     JobSourceType,
     JobStatus,
     TranscriptionJob,
-    TranscriptSegment,
 )
 from app.logging import get_logger, job_id_var
 from app.metrics import Timer, inc
+from app.services import job_events, scheduler
+from app.services.container_probe import ContainerInfo, rejection_code
+from app.services.dedup import (
+    DUPLICATE_MAX_WAITS,
+    DUPLICATE_WAIT_SECONDS,
+    clone_segments_stmt,
+    completed_duplicate_stmt,
+    in_flight_leader_stmt,
+)
 from app.services.failures import get_failure_message
-from celery import shared_task
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session, sessionmaker
+from celery import chain, current_task, shared_task
+from sqlalchemy import select
 
+from worker import job_state, stage_lease
 from worker.celery_app import celery_app as _celery_app  # noqa: F401 — ensure app is current
+from worker.media.ffmpeg import DEFAULT_PLAN, TranscodeError, plan_transcode
 
 logger = get_logger(__name__)
 
-# Sync engine for Celery tasks (Celery doesn't support async easily)
-_sync_url = settings.DATABASE_URL.replace("+asyncpg", "+psycopg2").replace("postgresql+psycopg2", "postgresql")
-_engine = create_engine(_sync_url, pool_pre_ping=True)
-_SessionFactory = sessionmaker(bind=_engine)
+# Presigned source URLs must outlive a full probe + the longest extract_timeout, reconnects included
+SOURCE_URL_EXPIRY_SECONDS = 3 * 3600
+# Most stale jobs one reaper sweep handles; the next sweep picks up the rest
+REAP_BATCH_SIZE = 100
 
 
-def _get_sync_session() -> Session:
-    return _SessionFactory()
+@shared_task(bind=True, max_retries=0, acks_late=True)
+def process_transcription_job(self, job_id_str: str) -> None:
+    """Entry point: run the pipeline as a chain of stage tasks, each on its own queue.
+
+    fetch_source (io) → transcode_audio (cpu) → transcribe_and_persist (asr). Each stage
+    hands the next a small context dict; a stage that finishes the job (failure or
+    dedup) returns None and the rest of the chain does nothing. A job with a recorded
+    checkpoint resumes after the last stage that finished. Only the delivery that moves
+    the job from queued to processing starts a pipeline; duplicates are dropped.
+    """
+    claimed = job_state.claim(uuid.UUID(job_id_str))
+    if claimed is None:
+        logger.info("Job %s is not queued; ignoring duplicate delivery", job_id_str)
+        return
+    stage, ctx, claim = claimed
+    if ctx is not None:
+        ctx = {**ctx, "claim": claim}  # the checkpoint was written under an earlier claim
+    if stage == "fetch_source":
+        logger.info("Job %s resuming after stage %s", job_id_str, stage)
+        stages = [transcode_audio.si(ctx), transcribe_and_persist.s()]
+    elif stage == "transcode_audio":
+        logger.info("Job %s resuming after stage %s", job_id_str, stage)
+        stages = [transcribe_and_persist.si(ctx)]
+    else:
+        stages = [fetch_source.si(job_id_str, claim), transcode_audio.s(), transcribe_and_persist.s()]
+    # Every stage keeps the scheduler lane's priority, so short jobs stay ahead on each queue
+    options = _priority_options()
+    chain(*(stage.set(**options) for stage in stages)).apply_async()
+
+
+def _priority_options() -> dict[str, Any]:
+    """Delivery options that keep a re-dispatched job at its scheduler lane's priority."""
+    request = current_task.request if current_task else None
+    priority = ((request.delivery_info if request else None) or {}).get("priority")
+    return {} if priority is None else {"priority": priority}
 
 
 @shared_task(bind=True, max_retries=0, acks_late=True)
-def process_transcription_job(self, job_id_str: str) -> None:
-    """Main transcription pipeline: download/fetch → probe → transcode → transcribe → persist."""
+def fetch_source(self, job_id_str: str, claim: str | None = None) -> dict | None:
+    """io stage: check, hash and stage the source so the cpu stage can range-read it."""
+    return _run_stage(job_id_str, claim, _fetch_source, claim)
+
+
+@shared_task(bind=True, max_retries=0, acks_late=True)
+def transcode_audio(self, ctx: dict | None) -> dict | None:
+    """cpu stage: probe the source, extract the audio track and run the VAD pre-pass."""
+    if ctx is None:
+        return None
+    return _run_stage(ctx["job_id"], ctx.get("claim"), _transcode_audio, ctx)
+
+
+@shared_task(bind=True, max_retries=0, acks_late=True)
+def transcribe_and_persist(self, ctx: dict | None) -> None:
+    """asr stage: transcribe the audio in parallel chunks and store the segments."""
+    if ctx is not None:
+        _run_stage(ctx["job_id"], ctx.get("claim"), _transcribe_and_persist, ctx)
+
+
+def _run_stage[T](job_id_str: str, claim: str | None, stage: Callable[..., T], *args: Any) -> T | None:
+    """Run one pipeline stage with the job id bound for logging; unexpected errors fail the job.
+
+    The stage runs under its execution lease, so a redelivered message for a stage that
+    is still running elsewhere is dropped instead of doing the work twice, and keeps
+    the job's heartbeat fresh so the reaper leaves it alone. A message from an earlier
+    run of the job (its ``claim`` no longer current) is dropped too.
+    """
     job_id = uuid.UUID(job_id_str)
     token = job_id_var.set(str(job_id))
+    name = stage.__name__.lstrip("_")
 
     try:
-        _process_job(job_id)
-    except Exception:
+        with stage_lease.hold(job_id, name) as held:
+            if not held:
+                logger.warning(
+                    "Job %s stage %s is already running elsewhere; dropping duplicate delivery", job_id, name
+                )
+                inc("duplicate_deliveries")
+                return None
+            if not job_state.start_stage(job_id, claim):
+                logger.warning("Job %s stage %s belongs to an earlier run; dropping stale delivery", job_id, name)
+                inc("stale_deliveries")
+                return None
+            with job_state.keep_alive(job_id):
+                return stage(job_id, *args)
+    except Exception as exc:
         logger.exception("Unhandled error processing job %s", job_id)
-        _fail_job(job_id, "unknown", get_failure_message("unknown"))
-        inc("jobs_failed")
+        _fail_stage(job_id, "unknown", exc)
+        return None
     finally:
         job_id_var.reset(token)
 
 
-def _process_job(job_id: uuid.UUID) -> None:
-    with _get_sync_session() as db:
-        job = db.execute(select(TranscriptionJob).where(TranscriptionJob.id == job_id)).scalar_one_or_none()
-        if job is None:
-            logger.warning("Job %s not found", job_id)
-            return
+def _fetch_source(job_id: uuid.UUID, claim: str | None = None) -> dict | None:
+    job = job_state.get_active(job_id)
+    if job is None:
+        logger.warning("Job %s is not processing; skipping", job_id)
+        return None
+    job_events.publish(job_id, "processing", "fetch_source", 0)
 
-        # Mark as processing
-        job.status = JobStatus.processing
-        job.started_at = datetime.now(UTC)
-        db.commit()
+    # Uploads hashed on the way in can be deduplicated before any download
+    if _dedupe(job_id):
+        return None
+
+    ctx: dict = {"job_id": str(job_id), "claim": claim}
+    hasher = hashlib.sha256()
+    try:
+        if job.source_type == JobSourceType.upload:
+            if not job.original_object_key:
+                raise ValueError("No object key")
+            # Never read back to hash: uploads without a hash from the API are not deduplicated
+            ctx["source_key"] = job.original_object_key
+        elif job.source_type == JobSourceType.url:
+            # Reject from the container header before paying for the full download
+            header = _probe_url_header(job_id, job.source_url)
+            rejection = rejection_code(header)
+            if rejection:
+                _fail_job(job_id, rejection, get_failure_message(rejection))
+                inc("jobs_failed")
+                return None
+            ctx["header_duration"] = header.duration_seconds
+            if _can_stream(header):
+                # Front-to-back containers are piped straight into ffmpeg by the cpu stage
+                ctx["stream_url"] = True
+            else:
+                ctx["source_key"] = _stage_url_source(job_id, job.source_url, hasher)
+                ctx["staged"] = True
+    except ValueError as e:
+        code = _download_failure_code(e)
+        _fail_job(job_id, code, get_failure_message(code))
+        inc("jobs_failed")
+        return None
+    except Exception as exc:
+        logger.exception("Download failed for job %s", job_id)
+        _fail_stage(job_id, "download_failed", exc)
+        return None
+
+    # Staged URL sources were hashed on the way into MinIO
+    if ctx.get("staged") and job.content_sha256 is None and _store_hash_and_dedupe(job_id, hasher.hexdigest()):
+        # Deduplicated, or waiting on a duplicate: either way a rerun fetches afresh
+        _discard_staged_source(job_id)
+        return None
+    if not job_state.checkpoint(job_id, "fetch_source", ctx):
+        return None
+    return ctx
+
+
+def _transcode_audio(job_id: uuid.UUID, ctx: dict) -> dict | None:
+    job = job_state.get_active(job_id)
+    if job is None:
+        logger.warning("Job %s is not processing; skipping", job_id)
+        return None
+    job_events.publish(job_id, "processing", "transcode_audio", 0)
+    progress = job_events.ProgressReporter(job_id, "transcode_audio")
 
     with tempfile.TemporaryDirectory() as tmpdir:
-        video_path = os.path.join(tmpdir, "input_video")
         audio_path = os.path.join(tmpdir, "audio.mp3")
-
-        # Step 1: Get the video file
-        with _get_sync_session() as db:
-            job = db.execute(select(TranscriptionJob).where(TranscriptionJob.id == job_id)).scalar_one()
-
-        try:
-            if job.source_type == JobSourceType.upload:
-                _download_from_minio(job.original_object_key, video_path)
-            elif job.source_type == JobSourceType.url:
-                _download_from_url(job.source_url, video_path, job_id)
-        except ValueError as e:
-            error_str = str(e)
-            if "private" in error_str.lower() or "reserved" in error_str.lower():
-                code = "ssrf_blocked"
-            elif "size" in error_str.lower():
-                code = "download_size_exceeded"
-            elif "timeout" in error_str.lower():
-                code = "download_timeout"
-            else:
-                code = "download_failed"
-            _fail_job(job_id, code, get_failure_message(code))
-            inc("jobs_failed")
-            return
-        except Exception:
-            logger.exception("Download failed for job %s", job_id)
-            _fail_job(job_id, "download_failed", get_failure_message("download_failed"))
-            inc("jobs_failed")
-            return
+        streamed = bool(ctx.get("stream_url"))
+
+        # Step 1: Streamed URL sources are fetched and transcoded in one pass
+        if streamed:
+            hasher = hashlib.sha256()
+            try:
+                _stream_url_to_audio(job.source_url, audio_path, hasher, progress.report)
+            except TranscodeError:
+                logger.exception("Transcode failed for job %s", job_id)
+                _fail_job(job_id, "transcode_failed", get_failure_message("transcode_failed"))
+                inc("jobs_failed")
+                return None
+            except ValueError as e:
+                code = _download_failure_code(e)
+                _fail_job(job_id, code, get_failure_message(code))
+                inc("jobs_failed")
+                return None
+            except Exception as exc:
+                logger.exception("Download failed for job %s", job_id)
+                _fail_stage(job_id, "download_failed", exc)
+                return None
+            if job.content_sha256 is None and _store_hash_and_dedupe(job_id, hasher.hexdigest()):
+                return None
 
         # Step 2: Probe media
+        # Sources are read in place from MinIO; only the extracted audio lands on local disk
+        video_source = None if streamed else _presign_minio_source(ctx["source_key"])
+        plan = DEFAULT_PLAN  # streamed sources were already encoded on the way in
         try:
-            from worker.media.ffprobe import get_duration_seconds
-            from worker.media.ffprobe import has_audio as check_audio
+            from worker.media.ffprobe import duration_from, get_duration_seconds, has_audio_stream, probe_media
 
-            duration = get_duration_seconds(video_path)
-            audio_present = check_audio(video_path)
+            if video_source is None:
+                # ffmpeg already produced an audio track; fall back to the audio for the duration
+                header_duration = ctx.get("header_duration")
+                duration = int(header_duration) if header_duration else get_duration_seconds(audio_path)
+                audio_present = True
+            else:
+                # One probe of the presigned source answers duration, audio presence and the plan
+                info = probe_media(video_source)
+                duration = duration_from(info)
+                audio_present = has_audio_stream(info)
+                plan = plan_transcode(info, duration)
         except Exception:
             logger.exception("Probe failed for job %s", job_id)
             _fail_job(job_id, "probe_failed", get_failure_message("probe_failed"))
             inc("jobs_failed")
-            return
+            return None
 
         if not audio_present:
             _fail_job(job_id, "no_audio_track", get_failure_message("no_audio_track"))
             inc("jobs_failed")
-            return
+            return None
 
-        if duration is not None and duration > 1800:
+        if duration is not None and duration > settings.MAX_DURATION_SECONDS:
             _fail_job(job_id, "duration_exceeded", get_failure_message("duration_exceeded"))
             inc("jobs_failed")
-            return
+            return None
 
         # Update job with duration
-        with _get_sync_session() as db:
-            j = db.execute(select(TranscriptionJob).where(TranscriptionJob.id == job_id)).scalar_one()
-            j.duration_seconds = duration
-            # Detect format from extension
-            if j.source_type == JobSourceType.upload and j.original_object_key:
-                ext = Path(j.original_object_key).suffix.lstrip(".").lower()
-                j.input_format = ext
-            db.commit()
-
-        # Step 3: Extract audio
+        updates: dict[str, Any] = {"duration_seconds": duration}
+        # Detect format from extension
+        if job.source_type == JobSourceType.upload and job.original_object_key:
+            updates["input_format"] = Path(job.original_object_key).suffix.lstrip(".").lower()
+        if not job_state.update_active(job_id, **updates):
+            return None
+
+        # Step 3: Extract audio, copying the stream instead of re-encoding when the plan allows
+        if video_source is not None:
+            audio_path = os.path.join(tmpdir, f"audio.{plan.extension}")
+            try:
+                from worker.media.ffmpeg import extract_audio, extract_timeout
+
+                # ffmpeg reports media time; the probed duration turns it into a percent
+                progress.total = duration
+                with Timer("transcode_duration"):
+                    extract_audio(
+                        video_source, audio_path, plan, on_progress=progress.report, timeout=extract_timeout(duration)
+                    )
+            except Exception:
+                logger.exception("Transcode failed for job %s", job_id)
+                _fail_job(job_id, "transcode_failed", get_failure_message("transcode_failed"))
+                inc("jobs_failed")
+                return None
+
+        # Step 4: Optionally drop non-speech audio before paying for transcription
+        speech_map = None
+        speech_path = os.path.join(tmpdir, "speech.mp3")
+        if settings.VAD_ENABLED:
+            try:
+                from worker.media.vad import condense_speech
+
+                speech_map = condense_speech(audio_path, speech_path)
+            except Exception:
+                logger.exception("VAD pre-pass failed for job %s; transcribing the full audio", job_id)
+
+        # Upload audio to MinIO for the asr stage
         try:
-            from worker.media.ffmpeg import extract_audio
+            from app.services.storage_minio import put_file
+
+            audio_key = f"audio/{job_id}/{os.path.basename(audio_path)}"
+            put_file(audio_key, audio_path, content_type=plan.content_type)
+            transcribe_key = audio_key
+            transcribe_duration: float | None = duration
+            if speech_map is not None:
+                transcribe_key = f"audio/{job_id}/speech.mp3"
+                put_file(transcribe_key, speech_path, content_type="audio/mpeg")
+                transcribe_duration = speech_map.condensed_ms / 1000
+
+            job_state.update_active(job_id, audio_object_key=audio_key, transcode_path=plan.path)
+            inc(f"transcode_{plan.path}")
+        except Exception as exc:
+            logger.exception("Storage error for job %s", job_id)
+            _fail_stage(job_id, "storage_error", exc)
+            return None
+
+    next_ctx = {
+        "job_id": str(job_id),
+        "claim": ctx.get("claim"),
+        "audio_key": transcribe_key,
+        "duration": transcribe_duration,
+        "speech_map": asdict(speech_map) if speech_map is not None else None,
+        # Recorded so retention can delete the condensed audio along with the full track
+        "speech_key": transcribe_key if speech_map is not None else None,
+    }
+    if not job_state.checkpoint(job_id, "transcode_audio", next_ctx):
+        return None
+    if ctx.get("staged"):
+        # Not before the checkpoint: until then a retry resumes from fetch_source and reads the copy again
+        _discard_staged_source(job_id)
+    return next_ctx
+
+
+def _transcribe_and_persist(job_id: uuid.UUID, ctx: dict) -> None:
+    if job_state.get_active(job_id) is None:
+        logger.warning("Job %s is not processing; skipping", job_id)
+        return
+    job_events.publish(job_id, "processing", "transcribe_and_persist", 0)
 
-            extract_audio(video_path, audio_path)
-        except Exception:
-            logger.exception("Transcode failed for job %s", job_id)
-            _fail_job(job_id, "transcode_failed", get_failure_message("transcode_failed"))
-            inc("jobs_failed")
-            return
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Keep the extension: copied audio may be MP3, M4A or Ogg
+        audio_path = os.path.join(tmpdir, os.path.basename(ctx["audio_key"]))
 
-        # Upload audio to MinIO
         try:
-            from app.services.storage_minio import put_object
+            _download_from_minio(ctx["audio_key"], audio_path)
+        except Exception as exc:
+            logger.exception("Storage error for job %s", job_id)
+            _fail_stage(job_id, "storage_error", exc)
+            return
 
-            audio_key = f"audio/{job_id}/audio.mp3"
-            with open(audio_path, "rb") as f:
-                put_object(audio_key, f.read(), content_type="audio/mpeg")
+        # Step 5: Split long audio at silences
+        try:
+            from worker.media.chunking import split_audio
 
-            with _get_sync_session() as db:
-                j = db.execute(select(TranscriptionJob).where(TranscriptionJob.id == job_id)).scalar_one()
-                j.audio_object_key = audio_key
-                db.commit()
+            chunks = split_audio(audio_path, ctx.get("duration"), tmpdir)
         except Exception:
-            logger.exception("Storage error for job %s", job_id)
-            _fail_job(job_id, "storage_error", get_failure_message("storage_error"))
+            logger.exception("Audio split failed for job %s", job_id)
+            _fail_job(job_id, "transcode_failed", get_failure_message("transcode_failed"))
             inc("jobs_failed")
             return
 
-        # Step 4: Transcribe with Whisper
+        # Step 6: Transcribe chunks with Whisper in parallel
         try:
-            from app.services.openai_whisper import transcribe_audio
+            from app.services.openai_whisper import transcribe_chunks
 
             with Timer("transcription_duration"):
-                whisper_segments = transcribe_audio(audio_path)
-        except Exception:
+                progress = job_events.ProgressReporter(job_id, "transcribe_and_persist")
+                whisper_segments = transcribe_chunks(chunks, on_progress=progress.report)
+            if ctx.get("speech_map"):
+                from worker.media.vad import SpeechMap
+
+                whisper_segments = SpeechMap(**ctx["speech_map"]).restore(whisper_segments)
+        except Exception as exc:
             logger.exception("Transcription failed for job %s", job_id)
-            _fail_job(job_id, "transcription_failed", get_failure_message("transcription_failed"))
-            inc("jobs_failed")
+            _fail_stage(job_id, "transcription_failed", exc)
             return
 
-        # Step 5: Persist segments and mark complete
+        # Step 7: Persist segments and mark complete
         try:
-            with _get_sync_session() as db:
-                j = db.execute(select(TranscriptionJob).where(TranscriptionJob.id == job_id)).scalar_one()
-
-                for ws in whisper_segments:
-                    seg = TranscriptSegment(
-                        job_id=job_id,
-                        segment_index=ws.segment_index,
-                        start_ms=ws.start_ms,
-                        end_ms=ws.end_ms,
-                        text=ws.text,
-                        avg_logprob=ws.avg_logprob,
-                        confidence=ws.confidence,
-                    )
-                    db.add(seg)
-
-                j.status = JobStatus.completed
-                j.completed_at = datetime.now(UTC)
+            from app.services.transcription import write_segments
+
+            with job_state.session() as db:
+                # Completing first locks the job row, so a duplicate delivery cannot store segments twice
+                if not job_state.complete(db, job_id):
+                    logger.warning("Job %s is no longer processing; dropping its transcript", job_id)
+                    return
+                write_segments(db, job_id, whisper_segments)
                 db.commit()
+            _announce_finished(job_id, "completed")
 
             inc("jobs_completed")
             logger.info("Job %s completed with %d segments", job_id, len(whisper_segments))
-        except Exception:
+        except Exception as exc:
             logger.exception("Failed to persist segments for job %s", job_id)
-            _fail_job(job_id, "unknown", get_failure_message("unknown"))
-            inc("jobs_failed")
+            _fail_stage(job_id, "unknown", exc)
 
 
-def _download_from_minio(object_key: str | None, dest_path: str) -> None:
-    """Download a file from MinIO to local path."""
+def _presign_minio_source(object_key: str | None) -> str:
+    """Presigned URL for an uploaded source, so ffprobe and ffmpeg range-read it from MinIO."""
     if not object_key:
         raise ValueError("No object key")
-    from app.services.storage_minio import get_object
+    from app.services.storage_minio import presign_get_object
+
+    return presign_get_object(object_key, expires_seconds=SOURCE_URL_EXPIRY_SECONDS)
+
+
+def _download_from_minio(object_key: str, dest_path: str) -> None:
+    """Download an object from MinIO to a local path, in parallel ranges when it is large."""
+    from app.services.storage_minio import get_file
+
+    get_file(object_key, dest_path)
 
-    data = get_object(object_key)
-    with open(dest_path, "wb") as f:
-        f.write(data)
 
+def _stage_url_source(job_id: uuid.UUID, url: str | None, hasher) -> str:
+    """Copy a URL source into MinIO, hashing it on the way, so the cpu stage can range-read it.
 
-def _download_from_url(url: str | None, dest_path: str, job_id: uuid.UUID) -> None:
-    """Download a file from external URL to local path."""
+    The source is pulled over parallel Range connections into a scratch file and pushed
+    up in parallel multipart parts; the scratch file is gone when this returns.
+    """
     if not url:
         raise ValueError("No URL")
+    from app.services.storage_minio import put_file
+
     from worker.media.downloader import download_file
 
-    download_file(url, dest_path)
+    key = _staged_source_key(job_id)
+    job_state.update_active(job_id, original_object_key=key)  # lets retention clean up if the pipeline dies mid-way
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "input")
+        download_file(url, path, hasher, on_progress=job_events.ProgressReporter(job_id, "fetch_source").report)
+        put_file(key, path)
+    return key
+
+
+def _staged_source_key(job_id: uuid.UUID) -> str:
+    return f"sources/{job_id}/input"
+
+
+def _discard_staged_source(job_id: uuid.UUID) -> None:
+    """Delete a staged URL source once nothing will read it: extracted, deduplicated or failed for good."""
+    from app.services.storage_minio import delete_object
+
+    key = _staged_source_key(job_id)
+    try:
+        delete_object(key)
+    except Exception:
+        logger.warning("Failed to delete staged source: %s", key)
+        return
+    job_state.forget_source(job_id, key)
+
+
+def _store_hash_and_dedupe(job_id: uuid.UUID, content_sha256: str) -> bool:
+    """Record the source hash computed in transit, then check for duplicates."""
+    if not job_state.update_active(job_id, content_sha256=content_sha256):
+        return True
+    return _dedupe(job_id)
+
+
+def _stream_url_to_audio(url: str | None, audio_path: str, hasher, on_progress=None) -> None:
+    """Pipe a URL source straight into ffmpeg, hashing it on the way; no video file is written."""
+    if not url:
+        raise ValueError("No URL")
+    from worker.media.downloader import iter_download
+    from worker.media.ffmpeg import extract_audio_from_stream
+
+    extract_audio_from_stream(iter_download(url, hasher=hasher, on_progress=on_progress), audio_path)
+
+
+def _download_failure_code(exc: ValueError) -> str:
+    """Map a downloader ValueError onto a failure code."""
+    error_str = str(exc).lower()
+    if "private" in error_str or "reserved" in error_str:
+        return "ssrf_blocked"
+    if "size" in error_str:
+        return "download_size_exceeded"
+    if "timeout" in error_str:
+        return "download_timeout"
+    return "download_failed"
+
+
+def _can_stream(info: ContainerInfo) -> bool:
+    """Whether a URL source can be decoded from a pipe instead of a downloaded file."""
+    return settings.STREAM_URL_SOURCES and info.streamable and info.has_audio is True
+
+
+def _probe_url_header(job_id: uuid.UUID, url: str | None) -> ContainerInfo:
+    """Probe a URL source from Range reads of its header."""
+    if not url:
+        raise ValueError("No URL")
+    from app.services.container_probe import PROBE_BYTES, probe_header, probe_moov
+
+    from worker.media.downloader import MAX_DOWNLOAD_SIZE, fetch_range
+
+    info = probe_header(fetch_range(url, 0, PROBE_BYTES) or b"")
+    if info.moov_offset is not None and info.moov_offset < MAX_DOWNLOAD_SIZE:
+        moov = fetch_range(url, info.moov_offset, PROBE_BYTES)
+        if moov is not None:  # without Range support the duration waits for the full download
+            probe_moov(moov, info)
+
+    if info.duration_seconds is not None:
+        updates: dict[str, Any] = {"duration_seconds": int(info.duration_seconds)}
+        if info.container:
+            updates["input_format"] = info.container
+        job_state.update_active(job_id, **updates)
+    return info
+
+
+def _dedupe(job_id: uuid.UUID) -> bool:
+    """Reuse or wait on another job with the same content hash. Returns True if this run is done.
+
+    A completed duplicate has its segments cloned in one statement. An older in-flight
+    duplicate makes this job go back to queued and re-check later instead of starting a
+    second pipeline for the same media. While it waits the job holds no scheduler slot
+    and no Celery message: it sits in the scheduler's delayed set and is admitted again
+    like any other submitted job.
+    """
+    with job_state.session() as db:
+        job = db.execute(select(TranscriptionJob).where(TranscriptionJob.id == job_id)).scalar_one_or_none()
+        if job is None or job.status != JobStatus.processing:
+            return True
+        if not job.content_sha256:
+            return False
+
+        source = db.execute(completed_duplicate_stmt(job.content_sha256, job.id)).scalar_one_or_none()
+        if source is not None:
+            if not job_state.complete(db, job_id, duration_seconds=source.duration_seconds):
+                return True
+            db.execute(clone_segments_stmt(source.id, job.id))
+            db.commit()
+            _announce_finished(job_id, "completed")
+            inc("jobs_completed")
+            inc("jobs_deduplicated")
+            logger.info("Job %s reused transcript of job %s (same content hash)", job_id, source.id)
+            return True
+
+        if job.dedup_waits >= DUPLICATE_MAX_WAITS:
+            return False
+        leader = db.execute(in_flight_leader_stmt(job)).scalar_one_or_none()
+        if leader is None:
+            return False
+        leader_id = leader.id
+        entry = (job_id, job.user_id, scheduler.lane_for(job.duration_seconds, job.size_bytes))
+        if not job_state.requeue(db, job_id, dedup_waits=TranscriptionJob.dedup_waits + 1):
+            return True
+        db.commit()
+    job_events.publish(job_id, "queued")
+
+    scheduler.release(job_id)
+    scheduler.submit([entry], delay_seconds=DUPLICATE_WAIT_SECONDS)
+    logger.info("Job %s waiting on in-flight job %s with the same content", job_id, leader_id)
+    return True
+
+
+def _fail_stage(job_id: uuid.UUID, code: str, exc: BaseException) -> None:
+    """Fail the job, or re-queue it to resume from its last checkpoint when ``exc`` is transient."""
+    from worker.retry import backoff_seconds, is_transient
+
+    if is_transient(exc):
+        attempt = job_state.requeue_for_retry(job_id, settings.PIPELINE_MAX_ATTEMPTS)
+        if attempt is not None:
+            delay = backoff_seconds(attempt)
+            job_events.publish(job_id, "queued")
+            process_transcription_job.apply_async((str(job_id),), countdown=delay, **_priority_options())
+            inc("jobs_retried")
+            logger.warning("Job %s hit a transient error (%s); retry %d in %ds", job_id, code, attempt, delay)
+            return
+
+    _fail_job(job_id, code, get_failure_message(code))
+    inc("jobs_failed")
 
 
 def _fail_job(job_id: uuid.UUID, code: str, message: str) -> None:
     """Mark a job as failed in the DB."""
     try:
-        with _get_sync_session() as db:
-            j = db.execute(select(TranscriptionJob).where(TranscriptionJob.id == job_id)).scalar_one_or_none()
-            if j and j.status not in (JobStatus.completed, JobStatus.failed):
-                j.status = JobStatus.failed
-                j.failure_code = code
-                j.failure_message = message
-                j.completed_at = datetime.now(UTC)
-                db.commit()
+        failed = job_state.fail(job_id, code, message)
     except Exception:
         logger.exception("Failed to mark job %s as failed", job_id)
+        return
+    if failed is not None:
+        # Transient errors retry without coming here, so a staged source is not needed again
+        if failed.original_object_key == _staged_source_key(job_id):
+            _discard_staged_source(job_id)
+        _announce_finished(job_id, "failed")
+
+
+def _announce_finished(job_id: uuid.UUID, status: str) -> None:
+    """Tell watchers the job is done and hand its scheduler slot to the next waiting job."""
+    job_events.publish(job_id, status, progress=100 if status == "completed" else None)
+    scheduler.release(job_id)
+
+
+@shared_task
+def dispatch_scheduled_jobs() -> None:
+    """Start delayed jobs now due, and waiting jobs whose slots were freed by expired leases rather than a release."""
+    started = scheduler.dispatch()
+    if started:
+        logger.info("Scheduler started %d waiting jobs", started)
+
+
+@shared_task
+def reap_stale_jobs() -> None:
+    """Requeue processing jobs whose worker stopped heartbeating, or fail them once out of attempts."""
+    now = datetime.now(UTC)
+    cutoff = now - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    queued_cutoff = now - timedelta(seconds=settings.JOB_QUEUED_STALE_SECONDS)
+    for job_id in job_state.stale_jobs(cutoff, queued_cutoff, REAP_BATCH_SIZE):
+        row = job_state.requeue_stale(job_id, cutoff, queued_cutoff, settings.PIPELINE_MAX_ATTEMPTS)
+        if row is not None:
+            # The dead run's scheduler slot goes back before the job queues for a new one
+            scheduler.release(job_id)
+            job_events.publish(job_id, "queued")
+            scheduler.submit([(job_id, row.user_id, scheduler.lane_for(row.duration_seconds, row.size_bytes))])
+            inc("jobs_reaped")
+            logger.warning("Job %s stopped heartbeating; requeued (attempt %d)", job_id, row.attempt_count)
+        elif job_state.fail_stale(job_id, cutoff, queued_cutoff, "worker_lost", get_failure_message("worker_lost")):
+            _announce_finished(job_id, "failed")
+            inc("jobs_reaped")
+            inc("jobs_failed")
+            logger.warning("Job %s stopped heartbeating and is out of attempts; failed", job_id)
 
 
 @shared_task
@@ -238,30 +625,57 @@ def retention_cleanup() -> None:
     cutoff = datetime.now(UTC) - timedelta(days=30)
     logger.info("Running retention cleanup for jobs older than %s", cutoff.isoformat())
 
-    with _get_sync_session() as db:
-        old_jobs = db.execute(select(TranscriptionJob).where(TranscriptionJob.created_at < cutoff)).scalars().all()
+    with job_state.session() as db:
+        # Unfinished uploads are left to the pass below, which also aborts their multipart upload
+        old_jobs = (
+            db.execute(
+                select(TranscriptionJob).where(
+                    TranscriptionJob.created_at < cutoff,
+                    TranscriptionJob.status != JobStatus.uploading,
+                )
+            )
+            .scalars()
+            .all()
+        )
 
         deleted_count = 0
         for job in old_jobs:
             # Delete MinIO objects
             from app.services.storage_minio import delete_object
 
-            if job.original_object_key:
+            speech_key = (job.pipeline_context or {}).get("speech_key")
+            for key in (job.original_object_key, job.audio_object_key, speech_key):
+                if not key:
+                    continue
                 try:
-                    delete_object(job.original_object_key)
+                    delete_object(key)
                 except Exception:
-                    logger.warning("Failed to delete MinIO object: %s", job.original_object_key)
-
-            if job.audio_object_key:
-                try:
-                    delete_object(job.audio_object_key)
-                except Exception:
-                    logger.warning("Failed to delete MinIO object: %s", job.audio_object_key)
+                    logger.warning("Failed to delete MinIO object: %s", key)
 
             # Delete job (cascades to segments)
             db.delete(job)
             deleted_count += 1
 
+        # Abandoned direct uploads: discard their multipart parts after a day
+        upload_cutoff = datetime.now(UTC) - timedelta(days=1)
+        stale_uploads = (
+            db.execute(
+                select(TranscriptionJob).where(
+                    TranscriptionJob.status == JobStatus.uploading,
+                    TranscriptionJob.created_at < upload_cutoff,
+                )
+            )
+            .scalars()
+            .all()
+        )
+        for job in stale_uploads:
+            from app.services.storage_minio import abort_multipart_upload
+
+            if job.original_object_key and job.upload_id:
+                abort_multipart_upload(job.original_object_key, job.upload_id)
+            db.delete(job)
+            deleted_count += 1
+
         db.commit()
         logger.info("Retention cleanup: deleted %d jobs", deleted_count)
         inc("retention_deleted", deleted_count)